@@ -0,0 +1,38 @@
+"""composite indexes for hot queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_halls_theater_id'), 'halls', ['theater_id'], unique=False)
+    op.create_index('ix_shows_movie_time', 'shows', ['movie_id', 'show_time', 'id'], unique=False)
+    op.create_index('ix_shows_theater_time', 'shows', ['theater_id', 'show_time', 'id'], unique=False)
+    op.create_index('ix_seats_show_booked', 'seats', ['show_id', 'is_booked', 'row_number', 'seat_number'],
+                    unique=False, postgresql_include=['id'])
+    op.create_index('ix_seats_hall_show', 'seats', ['hall_id', 'show_id'], unique=False)
+    op.create_index(op.f('ix_seats_booking_id'), 'seats', ['booking_id'], unique=False)
+    op.create_index('ix_bookings_show_time_status', 'bookings', ['show_id', 'booking_time', 'booking_status'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_show_time_status', table_name='bookings')
+    op.drop_index(op.f('ix_seats_booking_id'), table_name='seats')
+    op.drop_index('ix_seats_hall_show', table_name='seats')
+    op.drop_index('ix_seats_show_booked', table_name='seats')
+    op.drop_index('ix_shows_theater_time', table_name='shows')
+    op.drop_index('ix_shows_movie_time', table_name='shows')
+    op.drop_index(op.f('ix_halls_theater_id'), table_name='halls')
@@ -0,0 +1,68 @@
+"""daily analytics rollups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:00:00.000000
+
+Existing bookings are not rolled up by the migration; run
+scripts/backfill_rollups.py after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def counter_columns():
+    return [
+        sa.Column('bookings', sa.Integer(), nullable=False),
+        sa.Column('tickets', sa.Integer(), nullable=False),
+        sa.Column('gmv', sa.Float(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table('daily_movie_stats',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    *counter_columns(),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ),
+    sa.PrimaryKeyConstraint('movie_id', 'day')
+    )
+    op.create_table('daily_theater_stats',
+    sa.Column('theater_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    *counter_columns(),
+    sa.ForeignKeyConstraint(['theater_id'], ['theaters.id'], ),
+    sa.PrimaryKeyConstraint('theater_id', 'day')
+    )
+    op.create_table('daily_hall_stats',
+    sa.Column('hall_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('theater_id', sa.Integer(), nullable=False),
+    *counter_columns(),
+    sa.ForeignKeyConstraint(['hall_id'], ['halls.id'], ),
+    sa.ForeignKeyConstraint(['theater_id'], ['theaters.id'], ),
+    sa.PrimaryKeyConstraint('hall_id', 'day')
+    )
+    op.create_index('ix_daily_hall_stats_theater_day', 'daily_hall_stats', ['theater_id', 'day'], unique=False)
+    op.create_table('daily_show_stats',
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    *counter_columns(),
+    sa.ForeignKeyConstraint(['show_id'], ['shows.id'], ),
+    sa.PrimaryKeyConstraint('show_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_show_stats')
+    op.drop_index('ix_daily_hall_stats_theater_day', table_name='daily_hall_stats')
+    op.drop_table('daily_hall_stats')
+    op.drop_table('daily_theater_stats')
+    op.drop_table('daily_movie_stats')
@@ -0,0 +1,28 @@
+"""rollup day indexes for the dashboard
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_daily_movie_stats_day', 'daily_movie_stats', ['day', 'movie_id'], unique=False,
+                    postgresql_include=['bookings', 'tickets', 'gmv'])
+    op.create_index('ix_daily_theater_stats_day', 'daily_theater_stats', ['day', 'theater_id'], unique=False,
+                    postgresql_include=['bookings', 'tickets', 'gmv'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_theater_stats_day', table_name='daily_theater_stats')
+    op.drop_index('ix_daily_movie_stats_day', table_name='daily_movie_stats')
@@ -0,0 +1,25 @@
+"""show index for hall schedule loads
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_shows_hall_id', 'shows', ['hall_id', 'id'], unique=False,
+                    postgresql_include=['show_time', 'movie_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shows_hall_id', table_name='shows')
@@ -0,0 +1,64 @@
+"""monthly movie and theater rollups for the dashboard
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 16:00:00.000000
+
+The monthly rollups are filled from the daily ones by the migration.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def counter_columns():
+    return [
+        sa.Column('bookings', sa.Integer(), nullable=False),
+        sa.Column('tickets', sa.Integer(), nullable=False),
+        sa.Column('gmv', sa.Float(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table('monthly_movie_stats',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    *counter_columns(),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ),
+    sa.PrimaryKeyConstraint('movie_id', 'month')
+    )
+    op.create_index('ix_monthly_movie_stats_month', 'monthly_movie_stats', ['month', 'movie_id'], unique=False,
+                    postgresql_include=['bookings', 'tickets', 'gmv'])
+    op.create_table('monthly_theater_stats',
+    sa.Column('theater_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    *counter_columns(),
+    sa.ForeignKeyConstraint(['theater_id'], ['theaters.id'], ),
+    sa.PrimaryKeyConstraint('theater_id', 'month')
+    )
+    op.create_index('ix_monthly_theater_stats_month', 'monthly_theater_stats', ['month', 'theater_id'],
+                    unique=False, postgresql_include=['bookings', 'tickets', 'gmv'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        month = "CAST(date_trunc('month', day) AS DATE)"
+    else:
+        month = "date(day, 'start of month')"
+    for key, entity in (('movie_id', 'movie'), ('theater_id', 'theater')):
+        op.execute(
+            f"INSERT INTO monthly_{entity}_stats ({key}, month, bookings, tickets, gmv) "
+            f"SELECT {key}, {month}, SUM(bookings), SUM(tickets), SUM(gmv) "
+            f"FROM daily_{entity}_stats GROUP BY {key}, {month}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_monthly_theater_stats_month', table_name='monthly_theater_stats')
+    op.drop_table('monthly_theater_stats')
+    op.drop_index('ix_monthly_movie_stats_month', table_name='monthly_movie_stats')
+    op.drop_table('monthly_movie_stats')
@@ -0,0 +1,25 @@
+"""drop the redundant seat id index
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The primary key already indexes seats.id
+    op.drop_index('ix_seats_id', table_name='seats')
+
+
+def downgrade() -> None:
+    op.create_index('ix_seats_id', 'seats', ['id'], unique=False)
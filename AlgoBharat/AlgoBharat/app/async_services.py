@@ -0,0 +1,278 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import redis.asyncio as aioredis
+from starlette.concurrency import run_in_threadpool
+import os
+from . import services
+from .models import Movie, Theater, Hall, Show
+from .schemas import (
+    MovieCreate, TheaterCreate, HallCreate, ShowCreate, BookingCreate, BulkBookingCreate
+)
+from .locks import create_async_seat_locks
+from .layout_cache import LAYOUT_FORMAT_FULL, LayoutVersion
+from .pagination import DEFAULT_PAGE_SIZE
+from .services import (
+    MovieService,
+    TheaterService,
+    HallService,
+    ShowService,
+    SeatService,
+    BookingService,
+    AnalyticsService,
+    ANALYTICS_SOURCE_ROLLUP,
+    DASHBOARD_TOP_K
+)
+from .exceptions import SeatAlreadyBookedException, ShowNotFoundException
+
+# The service logic lives in services.py and runs unchanged on the AsyncSession's
+# sync facade via run_sync; only the database driver and Redis calls are awaited.
+# Redis calls the services make themselves (catalog cache) go through
+# app/blocking.py, so they run in a worker thread instead of on the event loop.
+
+# Async Redis connection for seat locks on the async request path
+async_redis_client = aioredis.Redis(
+    connection_pool=aioredis.BlockingConnectionPool(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=0,
+        decode_responses=True,
+        max_connections=services.REDIS_POOL_SIZE,
+        timeout=services.REDIS_POOL_TIMEOUT
+    )
+)
+
+# Shares the in-process lock table with services.seat_locks when SEAT_LOCK_BACKEND=local
+async_seat_locks = create_async_seat_locks(async_redis_client, services.seat_locks)
+
+def _booking_row(db: Session, method, *args) -> Dict[str, Any]:
+    """Call a booking service method and read the booking back as a BookingResponse-shaped dict"""
+    return BookingService.get_booking_row(db, method(db, *args).id)
+
+class AsyncMovieService:
+    @staticmethod
+    async def create_movie(db: AsyncSession, movie_data: MovieCreate) -> Movie:
+        return await db.run_sync(MovieService.create_movie, movie_data)
+
+    @staticmethod
+    async def get_movie(db: AsyncSession, movie_id: int) -> Optional[Movie]:
+        return await db.run_sync(MovieService.get_movie, movie_id)
+
+    @staticmethod
+    async def get_movies(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Movie]:
+        return await db.run_sync(MovieService.get_movies, skip, limit)
+
+    @staticmethod
+    async def get_movies_page(db: AsyncSession, cursor: Optional[str] = None,
+                              limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Movie], Optional[str]]:
+        return await db.run_sync(MovieService.get_movies_page, cursor, limit)
+
+    @staticmethod
+    async def update_movie(db: AsyncSession, movie_id: int, movie_data: dict) -> Optional[Movie]:
+        return await db.run_sync(MovieService.update_movie, movie_id, movie_data)
+
+    @staticmethod
+    async def delete_movie(db: AsyncSession, movie_id: int) -> bool:
+        return await db.run_sync(MovieService.delete_movie, movie_id)
+
+class AsyncTheaterService:
+    @staticmethod
+    async def create_theater(db: AsyncSession, theater_data: TheaterCreate) -> Theater:
+        return await db.run_sync(TheaterService.create_theater, theater_data)
+
+    @staticmethod
+    async def get_theater(db: AsyncSession, theater_id: int) -> Optional[Theater]:
+        return await db.run_sync(TheaterService.get_theater, theater_id)
+
+    @staticmethod
+    async def get_theaters(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Theater]:
+        return await db.run_sync(TheaterService.get_theaters, skip, limit)
+
+    @staticmethod
+    async def get_theaters_page(db: AsyncSession, cursor: Optional[str] = None,
+                                limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Theater], Optional[str]]:
+        return await db.run_sync(TheaterService.get_theaters_page, cursor, limit)
+
+    @staticmethod
+    async def update_theater(db: AsyncSession, theater_id: int, theater_data: dict) -> Optional[Theater]:
+        return await db.run_sync(TheaterService.update_theater, theater_id, theater_data)
+
+    @staticmethod
+    async def delete_theater(db: AsyncSession, theater_id: int) -> bool:
+        return await db.run_sync(TheaterService.delete_theater, theater_id)
+
+class AsyncHallService:
+    @staticmethod
+    async def create_hall(db: AsyncSession, theater_id: int, hall_data: HallCreate) -> Hall:
+        return await db.run_sync(HallService.create_hall, theater_id, hall_data)
+
+    @staticmethod
+    async def get_hall(db: AsyncSession, hall_id: int) -> Optional[Hall]:
+        return await db.run_sync(HallService.get_hall, hall_id)
+
+    @staticmethod
+    async def get_halls_by_theater(db: AsyncSession, theater_id: int) -> List[Hall]:
+        return await db.run_sync(HallService.get_halls_by_theater, theater_id)
+
+    @staticmethod
+    async def update_hall_layout(db: AsyncSession, hall_id: int, layout_data: dict) -> Optional[Hall]:
+        return await db.run_sync(HallService.update_hall_layout, hall_id, layout_data)
+
+class AsyncShowService:
+    @staticmethod
+    async def create_show(db: AsyncSession, show_data: ShowCreate) -> Show:
+        return await db.run_sync(ShowService.create_show, show_data)
+
+    @staticmethod
+    async def create_shows(db: AsyncSession,
+                           shows_data: List[ShowCreate]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        return await db.run_sync(ShowService.create_shows, shows_data)
+
+    @staticmethod
+    async def next_free_slot(db: AsyncSession, hall_id: int, after: datetime,
+                             duration_minutes: int) -> Dict[str, Any]:
+        return await db.run_sync(ShowService.next_free_slot, hall_id, after, duration_minutes)
+
+    @staticmethod
+    async def get_show(db: AsyncSession, show_id: int) -> Optional[Show]:
+        return await db.run_sync(ShowService.get_show, show_id)
+
+    @staticmethod
+    async def get_shows(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Show]:
+        return await db.run_sync(ShowService.get_shows, skip, limit)
+
+    @staticmethod
+    async def get_shows_page(db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                             projected: bool = False) -> Tuple[List[Any], Optional[str]]:
+        return await db.run_sync(ShowService.get_shows_page, cursor, limit, projected)
+
+    @staticmethod
+    async def get_shows_by_movie(db: AsyncSession, movie_id: int, cursor: Optional[str] = None,
+                                 limit: int = DEFAULT_PAGE_SIZE, projected: bool = False) -> Tuple[List[Any], Optional[str]]:
+        return await db.run_sync(ShowService.get_shows_by_movie, movie_id, cursor, limit, projected)
+
+    @staticmethod
+    async def get_shows_by_theater(db: AsyncSession, theater_id: int, cursor: Optional[str] = None,
+                                   limit: int = DEFAULT_PAGE_SIZE, projected: bool = False) -> Tuple[List[Any], Optional[str]]:
+        return await db.run_sync(ShowService.get_shows_by_theater, theater_id, cursor, limit, projected)
+
+    @staticmethod
+    async def update_show(db: AsyncSession, show_id: int, show_data: dict) -> Optional[Show]:
+        return await db.run_sync(ShowService.update_show, show_id, show_data)
+
+    @staticmethod
+    async def delete_show(db: AsyncSession, show_id: int) -> bool:
+        return await db.run_sync(ShowService.delete_show, show_id)
+
+class AsyncSeatService:
+    @staticmethod
+    async def get_hall_layout(db: AsyncSession, hall_id: int, show_id: int,
+                              version: Optional[LayoutVersion] = None) -> Dict[str, Any]:
+        return await db.run_sync(SeatService.get_hall_layout, hall_id, show_id, version)
+
+    @staticmethod
+    async def get_layout_version(hall_id: int, show_id: int) -> Optional[LayoutVersion]:
+        # Version counters may live in (sync) Redis; keep the round trip off the event loop
+        return await run_in_threadpool(SeatService.get_layout_version, hall_id, show_id)
+
+    @staticmethod
+    async def start_layout_version(hall_id: int, show_id: int) -> None:
+        await run_in_threadpool(SeatService.start_layout_version, hall_id, show_id)
+
+    @staticmethod
+    async def get_hall_layout_payload(db: AsyncSession, hall_id: int, show_id: int,
+                                      version: Optional[LayoutVersion] = None,
+                                      layout_format: str = LAYOUT_FORMAT_FULL) -> bytes:
+        return await db.run_sync(SeatService.get_hall_layout_payload, hall_id, show_id, version, layout_format)
+
+    @staticmethod
+    async def find_consecutive_seats(db: AsyncSession, show_id: int, num_seats: int) -> List[Dict[str, Any]]:
+        return await db.run_sync(SeatService.find_consecutive_seats, show_id, num_seats)
+
+    @staticmethod
+    async def suggest_alternative_shows(db: AsyncSession, movie_id: int, num_seats: int,
+                                        preferred_time: datetime = None) -> List[Dict[str, Any]]:
+        return await db.run_sync(SeatService.suggest_alternative_shows, movie_id, num_seats, preferred_time)
+
+class AsyncBookingService:
+    @staticmethod
+    async def create_booking(db: AsyncSession, booking_data: BookingCreate, strategy: str = None) -> Dict[str, Any]:
+        """Create a booking; lock waits and database I/O yield to the event loop"""
+        show = await AsyncShowService.get_show(db, booking_data.show_id)
+        if not show:
+            raise ShowNotFoundException(f"Show with id {booking_data.show_id} not found")
+
+        strategy = strategy or services.BOOKING_STRATEGY
+        if strategy == services.BOOKING_STRATEGY_OPTIMISTIC:
+            return await db.run_sync(_booking_row, BookingService._book_seats, show, booking_data, True)
+
+        lock_token = await async_seat_locks.acquire(booking_data.show_id, booking_data.seat_ids)
+
+        if lock_token is None:
+            BookingService._invalidate_shows([booking_data.show_id])
+            raise SeatAlreadyBookedException("Seats are being booked by another user. Please try again.")
+
+        try:
+            return await db.run_sync(_booking_row, BookingService._book_seats, show, booking_data)
+        finally:
+            await async_seat_locks.release(booking_data.show_id, booking_data.seat_ids, lock_token)
+
+    @staticmethod
+    async def create_bulk_booking(db: AsyncSession, bulk: BulkBookingCreate,
+                                  strategy: str = None) -> List[Dict[str, Any]]:
+        """BookingService.create_bulk_booking; lock waits yield to the event loop"""
+        shows = await db.run_sync(BookingService._bulk_shows, bulk)
+
+        strategy = strategy or services.BOOKING_STRATEGY
+        if strategy == services.BOOKING_STRATEGY_OPTIMISTIC:
+            return await db.run_sync(BookingService._book_bulk, shows, bulk, True)
+
+        seats_by_show = {item.show_id: item.seat_ids for item in bulk.items}
+        lock_token = await async_seat_locks.acquire_shows(seats_by_show)
+
+        if lock_token is None:
+            BookingService._invalidate_shows(seats_by_show)
+            raise SeatAlreadyBookedException("Seats are being booked by another user. Please try again.")
+
+        try:
+            return await db.run_sync(BookingService._book_bulk, shows, bulk)
+        finally:
+            await async_seat_locks.release_shows(seats_by_show, lock_token)
+
+    @staticmethod
+    async def get_booking(db: AsyncSession, booking_id: int) -> Optional[Dict[str, Any]]:
+        return await db.run_sync(BookingService.get_booking_row, booking_id)
+
+    @staticmethod
+    async def get_user_booking_rows(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+        return await db.run_sync(BookingService.get_user_booking_rows, user_id)
+
+    @staticmethod
+    async def stream_export_rows(db: AsyncSession, start_date: Optional[datetime] = None,
+                                 end_date: Optional[datetime] = None, theater_id: Optional[int] = None,
+                                 movie_id: Optional[int] = None) -> AsyncIterator:
+        """Stream export rows from a server-side cursor (see BookingService.export_statement)"""
+        result = await db.stream(BookingService.export_statement(start_date, end_date, theater_id, movie_id))
+        try:
+            async for row in result:
+                yield row
+        finally:
+            await result.close()
+
+class AsyncAnalyticsService:
+    @staticmethod
+    async def get_movie_analytics(db: AsyncSession, movie_id: int, start_date: datetime,
+                                  end_date: datetime, source: str = ANALYTICS_SOURCE_ROLLUP) -> Dict[str, Any]:
+        return await db.run_sync(AnalyticsService.get_movie_analytics, movie_id, start_date, end_date, source)
+
+    @staticmethod
+    async def get_theater_analytics(db: AsyncSession, theater_id: int, start_date: datetime,
+                                    end_date: datetime, source: str = ANALYTICS_SOURCE_ROLLUP) -> Dict[str, Any]:
+        return await db.run_sync(AnalyticsService.get_theater_analytics, theater_id, start_date, end_date,
+                                 source)
+
+    @staticmethod
+    async def get_dashboard_analytics(db: AsyncSession, start_date: datetime, end_date: datetime,
+                                      top: int = DASHBOARD_TOP_K, rank_by: str = "gmv") -> Dict[str, Any]:
+        return await db.run_sync(AnalyticsService.get_dashboard_analytics, start_date, end_date, top, rank_by)
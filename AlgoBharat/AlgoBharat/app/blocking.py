@@ -0,0 +1,32 @@
+from typing import Any, Callable
+import asyncio
+
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.util import await_only
+from starlette.concurrency import run_in_threadpool
+
+# The async request path runs the sync service code on the event loop's own
+# thread (AsyncSession.run_sync), so a blocking network call made from it, such
+# as a sync Redis command, would stall every request of the process until it
+# returns. Such calls go through run_blocking, which then makes them in a
+# worker thread and awaits the result through SQLAlchemy's greenlet bridge.
+
+
+def on_event_loop() -> bool:
+    """True when called from the thread of a running event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """``func(*args, **kwargs)``, made in a worker thread when on the event loop thread"""
+    if not on_event_loop():
+        return func(*args, **kwargs)
+    try:
+        return await_only(run_in_threadpool(func, *args, **kwargs))
+    except MissingGreenlet:
+        # On the loop but not under run_sync: there is nothing to await through
+        return func(*args, **kwargs)
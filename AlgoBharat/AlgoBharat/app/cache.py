@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Type
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from .blocking import run_blocking
+
+# Catalog rows (movies, theaters, halls, shows) cached in two tiers: a bounded
+# in-process LRU (L1) in front of Redis (L2). Writes through the service layer
+# invalidate both tiers; other processes' L1 copies expire after the L1 TTL.
+CACHE_BACKEND = os.getenv("CATALOG_CACHE_BACKEND", "redis")  # redis (L1 + L2), local (L1 only) or off
+CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", 10000))
+CACHE_L1_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_L1_TTL_SECONDS", 30))
+CACHE_L2_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_L2_TTL_SECONDS", 300))
+
+# After a Redis error the cache runs on L1 alone for this long before retrying L2
+L2_RETRY_SECONDS = 30
+
+
+def _encode(model: Type, obj) -> str:
+    values = {column.key: getattr(obj, column.key) for column in inspect(model).column_attrs}
+    return json.dumps(values, default=lambda value: value.isoformat())
+
+
+def _decode(model: Type, payload: str) -> Dict[str, Any]:
+    values = json.loads(payload)
+    for column in inspect(model).column_attrs:
+        value = values.get(column.key)
+        if value is not None and isinstance(column.expression.type, DateTime):
+            values[column.key] = datetime.fromisoformat(value)
+    return values
+
+
+class CatalogCache:
+    """Read-through cache of catalog rows by primary key"""
+
+    def __init__(self, redis_client=None, max_entries: int = CACHE_MAX_ENTRIES,
+                 l1_ttl: float = CACHE_L1_TTL_SECONDS, l2_ttl: int = CACHE_L2_TTL_SECONDS,
+                 enabled: bool = True):
+        self.redis = redis_client
+        self.max_entries = max_entries
+        self.l1_ttl = l1_ttl
+        self.l2_ttl = l2_ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._l2_down_until = 0.0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, kind: str, event: str) -> None:
+        with self._lock:
+            counters = self.counters.setdefault(
+                kind, {"l1_hits": 0, "l2_hits": 0, "misses": 0, "invalidations": 0, "l2_errors": 0}
+            )
+            counters[event] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = {kind: dict(counters) for kind, counters in self.counters.items()}
+            entries = len(self._entries)
+        for counters in kinds.values():
+            lookups = counters["l1_hits"] + counters["l2_hits"] + counters["misses"]
+            counters["hit_ratio"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else None
+        return {
+            "backend": CACHE_BACKEND if self.enabled else "off",
+            "l1_entries": entries,
+            "l1_max_entries": self.max_entries,
+            "l2_available": self.redis is not None and time.monotonic() >= self._l2_down_until,
+            "kinds": kinds,
+        }
+
+    @staticmethod
+    def _redis_key(kind: str, key: int) -> str:
+        return f"catalog:{kind}:{key}"
+
+    def _get_l1(self, cache_key: Tuple[str, int]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.l1_ttl:
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry[0]
+
+    def _put_l1(self, cache_key: Tuple[str, int], payload: str) -> None:
+        with self._lock:
+            self._entries[cache_key] = (payload, time.monotonic())
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _l2(self, kind: str, operation, *args):
+        """Run a Redis call; any failure degrades the cache to L1 for a while.
+
+        On the async path the call is made off the event loop (see app/blocking.py).
+        """
+        if self.redis is None or time.monotonic() < self._l2_down_until:
+            return None
+        try:
+            return run_blocking(operation, *args)
+        except Exception:
+            self._l2_down_until = time.monotonic() + L2_RETRY_SECONDS
+            self._count(kind, "l2_errors")
+            return None
+
+    def get(self, db: Session, model: Type, key: int):
+        """Return the row with primary key ``key``, attached to ``db``, or None"""
+        if not self.enabled:
+            return db.query(model).filter(model.id == key).first()
+
+        # Already in this session: no cache or database round trip needed
+        existing = db.identity_map.get(identity_key(model, key))
+        if existing is not None:
+            return existing
+
+        kind = model.__tablename__
+        cache_key = (kind, key)
+        payload = self._get_l1(cache_key)
+        if payload is not None:
+            self._count(kind, "l1_hits")
+        else:
+            payload = self._l2(kind, self.redis.get, self._redis_key(kind, key)) if self.redis else None
+            if payload is not None:
+                self._count(kind, "l2_hits")
+                self._put_l1(cache_key, payload)
+
+        if payload is None:
+            self._count(kind, "misses")
+            obj = db.query(model).filter(model.id == key).first()
+            if obj is not None:
+                payload = _encode(model, obj)
+                self._put_l1(cache_key, payload)
+                if self.redis:
+                    self._l2(kind, self.redis.set, self._redis_key(kind, key), payload, self.l2_ttl)
+            return obj
+
+        # Attach a detached copy as a persistent object without loading it
+        obj = model(**_decode(model, payload))
+        make_transient_to_detached(obj)
+        db.add(obj)
+        return obj
+
+    def invalidate(self, model: Type, key: int) -> None:
+        kind = model.__tablename__
+        with self._lock:
+            self._entries.pop((kind, key), None)
+        if self.redis:
+            self._l2(kind, self.redis.delete, self._redis_key(kind, key))
+        self._count(kind, "invalidations")
+
+    def clear(self) -> None:
+        """Drop the local tier (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+
+
+def create_catalog_cache(redis_client) -> CatalogCache:
+    """Pick the cache tiers from CATALOG_CACHE_BACKEND (redis, local or off)"""
+    if CACHE_BACKEND == "off":
+        return CatalogCache(enabled=False)
+    if CACHE_BACKEND == "local":
+        return CatalogCache()
+    return CatalogCache(redis_client)
@@ -0,0 +1,191 @@
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Booking, Movie, Seat, Show, Theater
+
+# Columnar snapshot of confirmed bookings for ad-hoc analytics (GMV by hour,
+# genre, city, ...) without touching the OLTP tables. Layout under the
+# snapshot directory:
+#
+#   manifest.json                  dictionaries (genres, cities), id ranges, when written
+#   dims/movie_genre.npy           genre code per movie id (-1: no movie)
+#   dims/theater_city.npy          city code per theater id (-1: no theater)
+#   bookings/YYYY-MM-DD/<col>.npy  one array per column, one directory per booking day
+SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR", "analytics_snapshot")
+# Rows fetched per round trip while writing a snapshot
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", 50000))
+
+BOOKING_COLUMNS = {
+    "booking_id": "int64",
+    "booking_time": "datetime64[s]",
+    "show_id": "int32",
+    "movie_id": "int32",
+    "theater_id": "int32",
+    "hall_id": "int32",
+    "tickets": "int32",
+    "gmv": "float64",
+}
+UNKNOWN = "unknown"
+
+
+def _write_partition(bookings_dir: str, day: date, rows: List[Tuple]) -> None:
+    """Write one day's rows, replacing any earlier copy of the day in one rename"""
+    staging = os.path.join(bookings_dir, f".{day.isoformat()}-{uuid.uuid4().hex}")
+    os.makedirs(staging)
+    for name, values in zip(BOOKING_COLUMNS, zip(*rows)):
+        np.save(os.path.join(staging, f"{name}.npy"), np.array(values, dtype=BOOKING_COLUMNS[name]))
+    target = os.path.join(bookings_dir, day.isoformat())
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    os.replace(staging, target)
+
+
+def _dictionary(pairs: List[Tuple[int, Optional[str]]]) -> Tuple[Any, List[str]]:
+    """Dense code-per-id array for (id, label) pairs, and the labels in code order"""
+    labels = sorted({label or UNKNOWN for _, label in pairs})
+    code_of = {label: code for code, label in enumerate(labels)}
+    codes = np.full(max((key for key, _ in pairs), default=0) + 1, -1, dtype="int16")
+    for key, label in pairs:
+        codes[key] = code_of[label or UNKNOWN]
+    return codes, labels
+
+
+def write_snapshot(db: Session, path: str = SNAPSHOT_DIR, since: Optional[date] = None) -> int:
+    """Dump confirmed bookings (all days, or days from ``since`` on) and the
+    dimension tables into the snapshot at ``path``; returns bookings written.
+
+    Days before ``since`` keep their partitions, so a nightly run only needs
+    ``since`` = the first day that can still change.
+    """
+    bookings_dir = os.path.join(path, "bookings")
+    os.makedirs(bookings_dir, exist_ok=True)
+    os.makedirs(os.path.join(path, "dims"), exist_ok=True)
+    stale = set()
+    for name in os.listdir(bookings_dir):
+        if name.startswith("."):
+            # Left behind by an interrupted run
+            shutil.rmtree(os.path.join(bookings_dir, name))
+        elif since is None or date.fromisoformat(name) >= since:
+            stale.add(name)
+
+    tickets = select(func.count(Seat.id)).where(Seat.booking_id == Booking.id).scalar_subquery()
+    statement = select(
+        Booking.id, Booking.booking_time, Booking.show_id, Show.movie_id, Show.theater_id, Show.hall_id,
+        tickets, Booking.total_amount
+    ).join(Show, Booking.show_id == Show.id).where(Booking.booking_status == "confirmed")
+    if since is not None:
+        statement = statement.where(Booking.booking_time >= datetime.combine(since, datetime.min.time()))
+    # Day by day: each partition is written once its last row has been read
+    statement = statement.order_by(Booking.booking_time, Booking.id) \
+        .execution_options(yield_per=SNAPSHOT_BATCH_SIZE)
+
+    written, day, rows = 0, None, []
+    for booking_id, booking_time, *rest in db.execute(statement):
+        # Wall-clock time as the database session reports it, so hours and days
+        # match the SQL analytics
+        booking_time = booking_time.replace(tzinfo=None)
+        if booking_time.date() != day:
+            if rows:
+                _write_partition(bookings_dir, day, rows)
+                stale.discard(day.isoformat())
+            day, rows = booking_time.date(), []
+        rows.append((booking_id, booking_time, *rest))
+        written += 1
+    if rows:
+        _write_partition(bookings_dir, day, rows)
+        stale.discard(day.isoformat())
+    # Rewritten days that no longer have any bookings
+    for name in stale:
+        shutil.rmtree(os.path.join(bookings_dir, name))
+
+    genre_codes, genres = _dictionary(db.execute(select(Movie.id, Movie.genre)).all())
+    city_codes, cities = _dictionary(db.execute(select(Theater.id, Theater.city)).all())
+    np.save(os.path.join(path, "dims", "movie_genre.npy"), genre_codes)
+    np.save(os.path.join(path, "dims", "theater_city.npy"), city_codes)
+    manifest = {
+        "written_at": datetime.now().isoformat(),
+        "genres": genres,
+        "cities": cities,
+        "max_ids": {
+            "movie": len(genre_codes) - 1,
+            "theater": len(city_codes) - 1,
+            "hall": db.query(func.coalesce(func.max(Show.hall_id), 0)).scalar(),
+            "show": db.query(func.coalesce(func.max(Show.id), 0)).scalar(),
+        },
+    }
+    staging = os.path.join(path, f".manifest-{uuid.uuid4().hex}.json")
+    with open(staging, "w") as f:
+        json.dump(manifest, f)
+    os.replace(staging, os.path.join(path, "manifest.json"))
+    return written
+
+
+class ColumnarSnapshot:
+    """Vectorized group-by aggregates over a snapshot written by write_snapshot"""
+
+    def __init__(self, path: str = SNAPSHOT_DIR):
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.movie_genre = np.load(os.path.join(path, "dims", "movie_genre.npy"))
+        self.theater_city = np.load(os.path.join(path, "dims", "theater_city.npy"))
+        # Grouping: (number of keys, source column, source values -> key codes, label of a code)
+        max_ids = self.manifest["max_ids"]
+        self.groupings: Dict[str, Tuple[int, str, Callable, Callable]] = {
+            "hour": (24, "booking_time", lambda times: times.astype("int64") // 3600 % 24, int),
+            "genre": (len(self.manifest["genres"]), "movie_id", lambda ids: self.movie_genre[ids],
+                      lambda code: self.manifest["genres"][code]),
+            "city": (len(self.manifest["cities"]), "theater_id", lambda ids: self.theater_city[ids],
+                     lambda code: self.manifest["cities"][code]),
+            "movie": (max_ids["movie"] + 1, "movie_id", lambda ids: ids, int),
+            "theater": (max_ids["theater"] + 1, "theater_id", lambda ids: ids, int),
+            "hall": (max_ids["hall"] + 1, "hall_id", lambda ids: ids, int),
+            "show": (max_ids["show"] + 1, "show_id", lambda ids: ids, int),
+        }
+
+    def days(self, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        """Booking days in the snapshot, optionally limited to start..end"""
+        days = sorted(date.fromisoformat(name) for name in os.listdir(os.path.join(self.path, "bookings"))
+                      if not name.startswith("."))
+        return [day for day in days if (start is None or day >= start) and (end is None or day <= end)]
+
+    def partition(self, day: date, names) -> Dict[str, Any]:
+        """Memory-mapped columns of one booking day"""
+        directory = os.path.join(self.path, "bookings", day.isoformat())
+        return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in names}
+
+    def aggregate(self, by: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Bookings, tickets and GMV per ``by`` key over whole booking days start..end"""
+        if by == "day":
+            results = []
+            for day in self.days(start, end):
+                columns = self.partition(day, ("tickets", "gmv"))
+                results.append({"key": day.isoformat(), "bookings": len(columns["gmv"]),
+                                "tickets": int(columns["tickets"].sum()), "gmv": float(columns["gmv"].sum())})
+            return results
+        if by not in self.groupings:
+            raise ValueError(f"Unknown grouping {by!r}; expected day or one of {sorted(self.groupings)}")
+
+        size, source, key_codes, label = self.groupings[by]
+        bookings = np.zeros(size, dtype="int64")
+        tickets = np.zeros(size, dtype="float64")
+        gmv = np.zeros(size, dtype="float64")
+        for day in self.days(start, end):
+            columns = self.partition(day, (source, "tickets", "gmv"))
+            keys = key_codes(columns[source])
+            bookings += np.bincount(keys, minlength=size)
+            tickets += np.bincount(keys, weights=columns["tickets"], minlength=size)
+            gmv += np.bincount(keys, weights=columns["gmv"], minlength=size)
+        return [
+            {"key": label(code), "bookings": int(bookings[code]), "tickets": int(tickets[code]),
+             "gmv": float(gmv[code])}
+            for code in np.flatnonzero(bookings)
+        ]
@@ -0,0 +1,16 @@
+import logging
+
+from .outbox import BOOKING_CONFIRMED, Event, consumer
+
+# Booking event consumers. They run in the Celery worker (app/worker.py), never
+# in the request that created the booking; each must tolerate seeing the same
+# event twice.
+logger = logging.getLogger(__name__)
+
+
+@consumer(BOOKING_CONFIRMED)
+def log_booking_confirmed(event: Event) -> None:
+    """Confirmation notice for the customer; logged until notifications are wired up"""
+    payload = event["payload"]
+    logger.info("Booking %s confirmed: %d ticket(s) for show %d, total %.2f",
+                payload["booking_reference"], payload["tickets"], payload["show_id"], payload["total_amount"])
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import heapq
+import os
+import threading
+import time
+
+from .blocking import run_blocking
+
+# Dashboard totals are summed per calendar month: whole months from the monthly
+# rollups, partial months at the window edges from the daily ones. Months that
+# are over no longer change, so their sums are also cached in-process.
+DASHBOARD_BUCKET_CACHE_SIZE = int(os.getenv("DASHBOARD_BUCKET_CACHE_SIZE", 240))
+# Rebuilding the rollups (scripts/backfill_rollups.py) can rewrite past months.
+# It bumps a rollup generation shared through Redis, and months cached under an
+# older generation are re-read; without Redis (DASHBOARD_BUCKET_BACKEND=local)
+# cached months are only dropped after the TTL.
+DASHBOARD_BUCKET_BACKEND = os.getenv("DASHBOARD_BUCKET_BACKEND", "redis")
+DASHBOARD_BUCKET_TTL_SECONDS = float(os.getenv("DASHBOARD_BUCKET_TTL_SECONDS", 3600))
+DASHBOARD_GENERATION_KEY = "dashboard:rollup_generation"
+
+# A booking is stamped when it is created but counted once committed; a month
+# is only treated as over once this long has passed since it ended
+CLOSE_GRACE = timedelta(minutes=5)
+
+# Counters per movie or theater id: [bookings, tickets, gmv]
+Counters = Dict[int, List[float]]
+COUNTER_FIELDS = ("bookings", "tickets", "gmv")
+
+
+def month_buckets(first: date, last: date, now: datetime) -> List[Tuple[date, date, bool]]:
+    """Split [first, last] into per-month spans: (span first day, span last day, closed)
+
+    A span is closed when it covers its whole month and the month is over.
+    """
+    buckets = []
+    month_start = first.replace(day=1)
+    while month_start <= last:
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        month_end = next_month - timedelta(days=1)
+        span_first, span_last = max(first, month_start), min(last, month_end)
+        closed = (span_first, span_last) == (month_start, month_end) and month_end < (now - CLOSE_GRACE).date()
+        buckets.append((span_first, span_last, closed))
+        month_start = next_month
+    return buckets
+
+
+def covers_month(first: date, last: date) -> bool:
+    """True when the days first..last are one whole calendar month"""
+    return first.day == 1 and last.month == first.month and (last + timedelta(days=1)).day == 1
+
+
+def merge_counters(target: Counters, source: Counters) -> None:
+    for key, counters in source.items():
+        totals = target.setdefault(key, [0, 0, 0.0])
+        for i, value in enumerate(counters):
+            totals[i] += value
+
+
+def top_k(counters: Counters, k: int, field: str) -> List[Tuple[int, List[float]]]:
+    """The ``k`` ids with the largest ``field`` (ties: lowest id), without sorting them all"""
+    index = COUNTER_FIELDS.index(field)
+    return heapq.nlargest(k, counters.items(), key=lambda item: (item[1][index], -item[0]))
+
+
+class DashboardBucketCache:
+    """Per-movie and per-theater counters of closed months, by month and rollup generation.
+
+    With a Redis ``client`` the generation is shared by every process, so
+    ``invalidate`` (run by the backfill) reaches them all. Generation reads
+    made on the event loop thread run in a worker thread (run_blocking).
+    """
+
+    def __init__(self, max_entries: int = DASHBOARD_BUCKET_CACHE_SIZE,
+                 ttl: float = DASHBOARD_BUCKET_TTL_SECONDS, client=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.client = client
+        self._buckets: "OrderedDict[date, Tuple[Counters, Counters, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generation(self) -> Optional[str]:
+        """Current rollup generation, or None when it cannot be read (then nothing is cached)"""
+        if self.client is None:
+            return ""
+        try:
+            return run_blocking(self.client.get, DASHBOARD_GENERATION_KEY) or ""
+        except Exception:
+            return None
+
+    def get(self, month: date, generation: str = "") -> Optional[Tuple[Counters, Counters]]:
+        with self._lock:
+            entry = self._buckets.get(month)
+            if entry is None:
+                return None
+            movies, theaters, cached_generation, expires = entry
+            if cached_generation != generation or expires <= time.monotonic():
+                del self._buckets[month]
+                return None
+            self._buckets.move_to_end(month)
+            return movies, theaters
+
+    def put(self, month: date, movies: Counters, theaters: Counters, generation: str = "") -> None:
+        with self._lock:
+            self._buckets[month] = (movies, theaters, generation, time.monotonic() + self.ttl)
+            self._buckets.move_to_end(month)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop the cached months of this process and, through the shared generation, of all others"""
+        self.clear()
+        if self.client is not None:
+            self.client.incr(DASHBOARD_GENERATION_KEY)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+def create_dashboard_buckets(redis_client) -> DashboardBucketCache:
+    """Pick where the rollup generation lives from DASHBOARD_BUCKET_BACKEND (redis or local)"""
+    if DASHBOARD_BUCKET_BACKEND == "local":
+        return DashboardBucketCache()
+    return DashboardBucketCache(client=redis_client)
@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import os
 from dotenv import load_dotenv
+from .pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, register_pool
 
 load_dotenv()
 
@@ -13,13 +15,71 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./algobharat.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+# Connection pool sizing; the async engine gets its own pool with the same settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+
+def pool_options(database_url: str, poolclass=InstrumentedQueuePool, **overrides) -> dict:
+    """Engine pool arguments from the DB_POOL_* settings, with per-call overrides"""
+    if database_url in ("sqlite://", "sqlite:///:memory:"):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+        return {}
+    options = {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    options.update(overrides)
+    return options
+
+def create_db_engine(database_url: str, metrics_name: str = "database", **pool_overrides):
+    """Engine with a sized, instrumented pool; stats are reported under ``metrics_name``"""
+    db_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {},
+        **pool_options(database_url, **pool_overrides)
+    )
+    if isinstance(db_engine.pool, InstrumentedQueuePool):
+        register_pool(metrics_name, db_engine.pool)
+    return db_engine
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ASYNC_MODE=1 serves the API from async routers on an AsyncSession
+# (aiosqlite for SQLite, asyncpg for PostgreSQL)
+ASYNC_MODE = os.getenv("ASYNC_MODE", "0") == "1"
+
+def async_database_url(database_url: str) -> str:
+    """Swap the driver in a sync database URL for its asyncio counterpart"""
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2:", "postgresql:"):
+        if database_url.startswith(prefix):
+            return database_url.replace(prefix, "postgresql+asyncpg:", 1)
+    return database_url
+
+def create_async_session_factory(database_url: str, metrics_name: str = "database_async",
+                                 **engine_options) -> async_sessionmaker:
+    """Async engine and session factory for ``database_url`` (a sync-style URL)"""
+    if "poolclass" not in engine_options:
+        engine_options = {**pool_options(database_url, poolclass=InstrumentedAsyncQueuePool), **engine_options}
+    async_engine = create_async_engine(async_database_url(database_url), **engine_options)
+    if isinstance(async_engine.pool, InstrumentedAsyncQueuePool):
+        register_pool(metrics_name, async_engine.pool)
+    # Objects stay usable after commit; reloading them would need another await
+    return async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Only built in async mode so the sync path does not need the async drivers
+AsyncSessionLocal = create_async_session_factory(DATABASE_URL) if ASYNC_MODE else None
+
 Base = declarative_base()
 
 # Dependency to get database session
@@ -29,3 +89,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async database session (ASYNC_MODE=1)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependencies to get the session factory, for work that outlives the request
+# and opens sessions of its own
+def get_session_factory() -> sessionmaker:
+    return SessionLocal
+
+def get_async_session_factory() -> async_sessionmaker:
+    return AsyncSessionLocal
@@ -26,6 +26,10 @@ class MovieNotFoundException(AlgoBharatException):
     """Raised when movie is not found"""
     pass
 
+class ShowScheduleConflictException(AlgoBharatException):
+    """Raised when a show would overlap another show in the same hall"""
+    pass
+
 class BookingNotFoundException(AlgoBharatException):
     """Raised when booking is not found"""
     pass
@@ -37,3 +41,7 @@ class InvalidSeatLayoutException(AlgoBharatException):
 class ConcurrentBookingException(AlgoBharatException):
     """Raised when concurrent booking attempt is detected"""
     pass
+
+class InvalidCursorException(AlgoBharatException):
+    """Raised when a pagination cursor cannot be decoded"""
+    pass
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence
+import csv
+import io
+import json
+import os
+
+# Rows fetched from the database per round trip while exporting, and rows
+# encoded into each chunk of the response body
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_MEDIA_TYPES = {EXPORT_FORMAT_NDJSON: "application/x-ndjson", EXPORT_FORMAT_CSV: "text/csv"}
+
+# Output columns, in order; export rows are selected with these labels
+EXPORT_COLUMNS = (
+    "booking_id", "booking_reference", "user_id", "booking_status", "booking_time", "total_amount",
+    "tickets", "show_id", "show_time", "hall_id", "movie_id", "movie_title", "theater_id", "theater_name",
+)
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode(rows: Sequence, export_format: str) -> bytes:
+    if export_format == EXPORT_FORMAT_CSV:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_value(value) for value in row] for row in rows)
+        return buffer.getvalue().encode()
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_value, row)))) + "\n" for row in rows
+    ).encode()
+
+
+def _header(export_format: str) -> bytes:
+    if export_format != EXPORT_FORMAT_CSV:
+        return b""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue().encode()
+
+
+def export_chunks(rows: Iterable[Sequence], export_format: str) -> Iterator[bytes]:
+    """Encode rows as NDJSON or CSV, one chunk per EXPORT_BATCH_SIZE rows"""
+    header = _header(export_format)
+    if header:
+        yield header
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield _encode(batch, export_format)
+            batch = []
+    if batch:
+        yield _encode(batch, export_format)
+
+
+async def async_export_chunks(rows: AsyncIterable[Sequence], export_format: str) -> AsyncIterator[bytes]:
+    """export_chunks for rows streamed from an AsyncSession"""
+    header = _header(export_format)
+    if header:
+        yield header
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield _encode(batch, export_format)
+            batch = []
+    if batch:
+        yield _encode(batch, export_format)
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from . import models, schemas
+from .pagination import NEXT_CURSOR_HEADER
+
+# Fast path for large list responses. Rows are selected as plain column tuples
+# (no ORM objects, no identity map), zipped into dicts and encoded with orjson,
+# instead of validating every item through its response model and encoding it
+# with the stdlib JSON encoder. Only for rows read from our own tables, whose
+# columns already have the types the schema declares.
+#
+# The columns are taken from the schema's fields, so responses carry exactly the
+# fields (and JSON values) the response_model path would produce.
+
+
+def schema_columns(schema: Type[BaseModel], model, exclude: Sequence[str] = ()) -> tuple:
+    """The model's columns for each field of ``schema``, in field order"""
+    return tuple(getattr(model, name) for name in schema.model_fields if name not in exclude)
+
+
+SHOW_COLUMNS = schema_columns(schemas.Show, models.Show)
+SEAT_COLUMNS = schema_columns(schemas.Seat, models.Seat)
+# Seats are attached per booking after a second query
+BOOKING_COLUMNS = schema_columns(schemas.BookingResponse, models.Booking, exclude=("seats",))
+
+
+def rows_to_dicts(rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Column tuples from a select (sqlalchemy Rows) as dicts keyed by column name"""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def pick_fields(items: Iterable[Dict[str, Any]], schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Drop keys ``schema`` does not declare, as response_model filtering would"""
+    names = tuple(schema.model_fields)
+    return [{name: item[name] for name in names if name in item} for item in items]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson; datetimes come out as Pydantic writes them"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def page_response(rows: Sequence[Any], next_cursor: Optional[str]) -> FastJSONResponse:
+    """One page of projected rows, with the next page's cursor header"""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return FastJSONResponse(rows_to_dicts(rows), headers=headers)
@@ -0,0 +1,245 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+import os
+import random
+import threading
+import uuid
+
+from .blocking import run_blocking
+
+# Layout versions: a counter per show (bumped after every committed booking and
+# on show deletion or seat-mode conversion) and per hall (bumped on layout
+# edits). Together they identify a hall layout response, so a poll whose ETag
+# still matches is answered with 304 before any database work.
+LAYOUT_PAYLOAD_CACHE_SIZE = int(os.getenv("LAYOUT_PAYLOAD_CACHE_SIZE", 1024))
+
+# Shared (Redis) counters expire this long after their last bump or creation,
+# so counters of deleted and past shows do not pile up
+LAYOUT_VERSION_TTL_SECONDS = int(os.getenv("LAYOUT_VERSION_TTL_SECONDS", 30 * 24 * 3600))
+
+# Layout representations: one object per seat (full), or each row's seat states
+# run-length encoded (compact), asked for with ?format=compact or by Accept
+LAYOUT_FORMAT_FULL = "full"
+LAYOUT_FORMAT_COMPACT = "compact"
+COMPACT_LAYOUT_MEDIA_TYPE = "application/vnd.algobharat.layout.compact+json"
+LAYOUT_MEDIA_TYPES = {LAYOUT_FORMAT_FULL: "application/json", LAYOUT_FORMAT_COMPACT: COMPACT_LAYOUT_MEDIA_TYPE}
+
+
+def _key(kind: str, key: int) -> str:
+    return f"layout_version:{kind}:{key}"
+
+
+class LayoutVersion(NamedTuple):
+    """Versions of one (show, hall) layout; ``epoch`` tells counter stores apart"""
+    epoch: str
+    show: int
+    hall: int
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self.epoch}{self.show}.{self.hall}"'
+
+    def etag_for(self, layout_format: str) -> str:
+        """ETag of one representation of this version"""
+        if layout_format == LAYOUT_FORMAT_FULL:
+            return self.etag
+        return f'W/"{self.epoch}{self.show}.{self.hall}-{layout_format}"'
+
+
+def _quality(params) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate_layout_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """The format query parameter if given, else compact when Accept lists it (not at q=0)"""
+    if requested:
+        return requested
+    for media_range in (accept or "").split(","):
+        media_type, *params = media_range.split(";")
+        if media_type.strip().lower() == COMPACT_LAYOUT_MEDIA_TYPE and _quality(params) > 0:
+            return LAYOUT_FORMAT_COMPACT
+    return LAYOUT_FORMAT_FULL
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+class LayoutVersions(ABC):
+    """Version counters for show seat maps and hall layouts"""
+
+    # Distinguishes ETags minted by independent counter stores
+    epoch = ""
+
+    @abstractmethod
+    def current(self, show_id: int, hall_id: int) -> Optional[LayoutVersion]:
+        """Current versions, or None when they are unavailable"""
+
+    @abstractmethod
+    def bump(self, kind: str, key: int) -> Optional[int]:
+        """Advance a version; returns the new value, or None if it could not be recorded"""
+
+    def start(self, show_id: int, hall_id: int) -> None:
+        """Create missing versions of a show and hall that are known to exist"""
+
+    def bump_show(self, show_id: int) -> Optional[int]:
+        return self.bump("show", show_id)
+
+    def bump_hall(self, hall_id: int) -> Optional[int]:
+        return self.bump("hall", hall_id)
+
+
+class LocalLayoutVersions(LayoutVersions):
+    """In-process counters (single worker); ETags carry a per-process epoch.
+
+    As with RedisLayoutVersions, a show or hall has no version until it is
+    bumped or started, so made-up ids never match an If-None-Match.
+    """
+
+    def __init__(self):
+        self.epoch = f"{uuid.uuid4().hex[:8]}-"
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def current(self, show_id: int, hall_id: int) -> Optional[LayoutVersion]:
+        with self._lock:
+            show_version = self._versions.get(_key("show", show_id))
+            hall_version = self._versions.get(_key("hall", hall_id))
+        if show_version is None or hall_version is None:
+            return None
+        return LayoutVersion(self.epoch, show_version, hall_version)
+
+    def bump(self, kind: str, key: int) -> Optional[int]:
+        with self._lock:
+            version = self._versions.get(_key(kind, key), 0) + 1
+            self._versions[_key(kind, key)] = version
+            return version
+
+    def start(self, show_id: int, hall_id: int) -> None:
+        with self._lock:
+            self._versions.setdefault(_key("show", show_id), 0)
+            self._versions.setdefault(_key("hall", hall_id), 0)
+
+
+class RedisLayoutVersions(LayoutVersions):
+    """Counters shared by all workers through Redis.
+
+    Reads never create counters: a show or hall without one has no version
+    (no ETag) until it is bumped or ``start`` is called for it once it is
+    known to exist, so requests for made-up ids write nothing. A counter
+    starts at a random value, so a Redis flush or an expired counter cannot
+    bring back versions that clients still hold, and expires
+    LAYOUT_VERSION_TTL_SECONDS after its last bump. Bumps that fail while
+    Redis is down are retried before this process serves another version,
+    and no versions (hence no ETags) are served while Redis is unreachable.
+    Calls made on the event loop thread run in a worker thread (run_blocking).
+    """
+
+    def __init__(self, client, ttl_seconds: int = LAYOUT_VERSION_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _flush_pending(self) -> None:
+        with self._lock:
+            pending = list(self._pending)
+        for key in pending:
+            self._incr(key)
+            with self._lock:
+                self._pending.discard(key)
+
+    def _incr(self, key: str) -> int:
+        pipe = self.client.pipeline()
+        pipe.set(key, random.randrange(1 << 40), nx=True, ex=self.ttl_seconds)
+        pipe.incr(key)
+        pipe.expire(key, self.ttl_seconds)
+        return int(pipe.execute()[1])
+
+    def _current(self, keys: Tuple[str, str]) -> Tuple[Optional[str], Optional[str]]:
+        if self._pending:
+            self._flush_pending()
+        return tuple(self.client.mget(*keys))
+
+    def current(self, show_id: int, hall_id: int) -> Optional[LayoutVersion]:
+        try:
+            show_version, hall_version = run_blocking(self._current, (_key("show", show_id), _key("hall", hall_id)))
+        except Exception:
+            return None
+        if show_version is None or hall_version is None:
+            return None
+        return LayoutVersion(self.epoch, int(show_version), int(hall_version))
+
+    def bump(self, kind: str, key: int) -> Optional[int]:
+        try:
+            return run_blocking(self._incr, _key(kind, key))
+        except Exception:
+            with self._lock:
+                self._pending.add(_key(kind, key))
+            return None
+
+    def _start(self, keys: Tuple[str, str]) -> None:
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.set(key, random.randrange(1 << 40), nx=True, ex=self.ttl_seconds)
+        pipe.execute()
+
+    def start(self, show_id: int, hall_id: int) -> None:
+        try:
+            run_blocking(self._start, (_key("show", show_id), _key("hall", hall_id)))
+        except Exception:
+            # Still unversioned; a later layout request starts them
+            return
+
+
+def create_layout_versions(redis_client) -> LayoutVersions:
+    """Pick the version store from LAYOUT_VERSION_BACKEND (redis or local)"""
+    if os.getenv("LAYOUT_VERSION_BACKEND", "redis") == "local":
+        return LocalLayoutVersions()
+    return RedisLayoutVersions(redis_client)
+
+
+class LayoutPayloadCache:
+    """Serialized layout responses by (hall, show, ETag); a new version simply misses"""
+
+    def __init__(self, max_entries: int = LAYOUT_PAYLOAD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._payloads: "OrderedDict[Tuple[int, int, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, hall_id: int, show_id: int, etag: str) -> Optional[bytes]:
+        with self._lock:
+            payload = self._payloads.get((hall_id, show_id, etag))
+            if payload is not None:
+                self._payloads.move_to_end((hall_id, show_id, etag))
+            return payload
+
+    def put(self, hall_id: int, show_id: int, etag: str, payload: bytes) -> None:
+        with self._lock:
+            self._payloads[(hall_id, show_id, etag)] = payload
+            self._payloads.move_to_end((hall_id, show_id, etag))
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payloads.clear()
+
+
+layout_payloads = LayoutPayloadCache()
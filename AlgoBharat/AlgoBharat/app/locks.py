@@ -0,0 +1,244 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+# How long a seat stays locked if its holder dies, and how long a request waits
+# for seats held by someone else before giving up
+LOCK_TTL_MS = int(os.getenv("SEAT_LOCK_TTL_MS", 30000))
+LOCK_WAIT_MS = int(os.getenv("SEAT_LOCK_WAIT_MS", 250))
+LOCK_RETRY_MS = 10
+
+# Lock every key or none of them, all with the caller's owner token
+ACQUIRE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        return 0
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+end
+return 1
+"""
+
+# Delete only the keys still owned by the token; an expired lock that someone
+# else has since acquired is left alone
+RELEASE_SCRIPT = """
+local released = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+        released = released + 1
+    end
+end
+return released
+"""
+
+
+def seat_lock_keys(show_id: int, seat_ids: Iterable[int]) -> List[str]:
+    """One key per seat. The {show_id} hash tag keeps a show's keys in one cluster slot."""
+    return [f"seat_lock:{{{show_id}}}:{seat_id}" for seat_id in sorted(set(seat_ids))]
+
+
+class SeatLocks(ABC):
+    """Per-seat locks acquired all-or-nothing and released with an owner token"""
+
+    @abstractmethod
+    def try_acquire_keys(self, keys: List[str], token: str, ttl_ms: int) -> bool:
+        """Lock every key with ``token`` if none is held; True if they were locked"""
+
+    @abstractmethod
+    def release_keys(self, keys: List[str], token: str) -> int:
+        """Unlock the keys still held with ``token``; returns how many were"""
+
+    def acquire(self, show_id: int, seat_ids: Iterable[int],
+                ttl_ms: int = None, wait_ms: int = None) -> Optional[str]:
+        """Lock the seats and return the owner token, or None if any seat stays held"""
+        return self.acquire_keys(seat_lock_keys(show_id, seat_ids), ttl_ms, wait_ms)
+
+    def acquire_keys(self, keys: List[str], ttl_ms: int = None, wait_ms: int = None,
+                     token: str = None) -> Optional[str]:
+        ttl_ms = LOCK_TTL_MS if ttl_ms is None else ttl_ms
+        wait_ms = LOCK_WAIT_MS if wait_ms is None else wait_ms
+        token = token or uuid.uuid4().hex
+        deadline = time.monotonic() + wait_ms / 1000
+        while True:
+            if self.try_acquire_keys(keys, token, ttl_ms):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(LOCK_RETRY_MS / 1000)
+
+    def release(self, show_id: int, seat_ids: Iterable[int], token: str) -> int:
+        return self.release_keys(seat_lock_keys(show_id, seat_ids), token)
+
+    def acquire_shows(self, seats_by_show: Dict[int, Iterable[int]],
+                      ttl_ms: int = None, wait_ms: int = None) -> Optional[str]:
+        """Lock the seats of several shows under one token, all or nothing.
+
+        Shows are locked one at a time in ascending id order (a show's keys share
+        a cluster slot, several shows' keys may not), so two requests for
+        overlapping shows queue on the lowest one instead of each holding a show
+        the other waits for.
+        """
+        wait_ms = LOCK_WAIT_MS if wait_ms is None else wait_ms
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait_ms / 1000
+        held: Dict[int, Iterable[int]] = {}
+        for show_id in sorted(seats_by_show):
+            keys = seat_lock_keys(show_id, seats_by_show[show_id])
+            remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+            if self.acquire_keys(keys, ttl_ms, remaining_ms, token) is None:
+                self.release_shows(held, token)
+                return None
+            held[show_id] = seats_by_show[show_id]
+        return token
+
+    def release_shows(self, seats_by_show: Dict[int, Iterable[int]], token: str) -> int:
+        return sum(self.release(show_id, seats_by_show[show_id], token) for show_id in sorted(seats_by_show))
+
+
+class RedisSeatLocks(SeatLocks):
+    """Seat locks in Redis; each acquire/release is a single script round trip"""
+
+    def __init__(self, client):
+        self.client = client
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+
+    def try_acquire_keys(self, keys: List[str], token: str, ttl_ms: int) -> bool:
+        return bool(self._acquire(keys=keys, args=[token, ttl_ms]))
+
+    def release_keys(self, keys: List[str], token: str) -> int:
+        return int(self._release(keys=keys, args=[token]))
+
+
+class LocalSeatLocks(SeatLocks):
+    """In-process stand-in for RedisSeatLocks (single worker development and tests)"""
+
+    def __init__(self):
+        self._held: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire_keys(self, keys: List[str], token: str, ttl_ms: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                held = self._held.get(key)
+                if held is not None and held[1] > now:
+                    return False
+            expires_at = now + ttl_ms / 1000
+            for key in keys:
+                self._held[key] = (token, expires_at)
+            return True
+
+    def release_keys(self, keys: List[str], token: str) -> int:
+        released = 0
+        with self._lock:
+            for key in keys:
+                held = self._held.get(key)
+                if held is not None and held[0] == token:
+                    del self._held[key]
+                    released += 1
+        return released
+
+
+def create_seat_locks(redis_client) -> SeatLocks:
+    """Pick the lock backend from SEAT_LOCK_BACKEND (redis or local)"""
+    if os.getenv("SEAT_LOCK_BACKEND", "redis") == "local":
+        return LocalSeatLocks()
+    return RedisSeatLocks(redis_client)
+
+
+class AsyncSeatLocks(ABC):
+    """SeatLocks for the async request path; waiting yields to the event loop"""
+
+    @abstractmethod
+    async def try_acquire_keys(self, keys: List[str], token: str, ttl_ms: int) -> bool:
+        """SeatLocks.try_acquire_keys"""
+
+    @abstractmethod
+    async def release_keys(self, keys: List[str], token: str) -> int:
+        """SeatLocks.release_keys"""
+
+    async def acquire(self, show_id: int, seat_ids: Iterable[int],
+                      ttl_ms: int = None, wait_ms: int = None) -> Optional[str]:
+        """Lock the seats and return the owner token, or None if any seat stays held"""
+        return await self.acquire_keys(seat_lock_keys(show_id, seat_ids), ttl_ms, wait_ms)
+
+    async def acquire_keys(self, keys: List[str], ttl_ms: int = None, wait_ms: int = None,
+                           token: str = None) -> Optional[str]:
+        ttl_ms = LOCK_TTL_MS if ttl_ms is None else ttl_ms
+        wait_ms = LOCK_WAIT_MS if wait_ms is None else wait_ms
+        token = token or uuid.uuid4().hex
+        deadline = time.monotonic() + wait_ms / 1000
+        while True:
+            if await self.try_acquire_keys(keys, token, ttl_ms):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(LOCK_RETRY_MS / 1000)
+
+    async def release(self, show_id: int, seat_ids: Iterable[int], token: str) -> int:
+        return await self.release_keys(seat_lock_keys(show_id, seat_ids), token)
+
+    async def acquire_shows(self, seats_by_show: Dict[int, Iterable[int]],
+                            ttl_ms: int = None, wait_ms: int = None) -> Optional[str]:
+        """SeatLocks.acquire_shows: one token, shows locked in ascending id order"""
+        wait_ms = LOCK_WAIT_MS if wait_ms is None else wait_ms
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait_ms / 1000
+        held: Dict[int, Iterable[int]] = {}
+        for show_id in sorted(seats_by_show):
+            keys = seat_lock_keys(show_id, seats_by_show[show_id])
+            remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+            if await self.acquire_keys(keys, ttl_ms, remaining_ms, token) is None:
+                await self.release_shows(held, token)
+                return None
+            held[show_id] = seats_by_show[show_id]
+        return token
+
+    async def release_shows(self, seats_by_show: Dict[int, Iterable[int]], token: str) -> int:
+        released = 0
+        for show_id in sorted(seats_by_show):
+            released += await self.release(show_id, seats_by_show[show_id], token)
+        return released
+
+
+class AsyncRedisSeatLocks(AsyncSeatLocks):
+    """RedisSeatLocks on a redis.asyncio client; same keys and scripts"""
+
+    def __init__(self, client):
+        self.client = client
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+
+    async def try_acquire_keys(self, keys: List[str], token: str, ttl_ms: int) -> bool:
+        return bool(await self._acquire(keys=keys, args=[token, ttl_ms]))
+
+    async def release_keys(self, keys: List[str], token: str) -> int:
+        return int(await self._release(keys=keys, args=[token]))
+
+
+class AsyncLocalSeatLocks(AsyncSeatLocks):
+    """Async view of a LocalSeatLocks, so sync and async callers share one lock table"""
+
+    def __init__(self, local: LocalSeatLocks = None):
+        self.local = local or LocalSeatLocks()
+
+    async def try_acquire_keys(self, keys: List[str], token: str, ttl_ms: int) -> bool:
+        return self.local.try_acquire_keys(keys, token, ttl_ms)
+
+    async def release_keys(self, keys: List[str], token: str) -> int:
+        return self.local.release_keys(keys, token)
+
+
+def create_async_seat_locks(async_redis_client, seat_locks: SeatLocks) -> AsyncSeatLocks:
+    """Async counterpart of ``seat_locks`` (the backend chosen by create_seat_locks)"""
+    if isinstance(seat_locks, LocalSeatLocks):
+        return AsyncLocalSeatLocks(seat_locks)
+    return AsyncRedisSeatLocks(async_redis_client)
@@ -1,11 +1,18 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from .database import engine
+from .database import engine, ASYNC_MODE
 from .models import Base
-from .routers import movies, theaters, shows, bookings, analytics
 from .exceptions import AlgoBharatException
 
+# ASYNC_MODE=1 swaps in the async routers (AsyncSession, redis.asyncio);
+# both are built from the same handlers (see routers/backend.py)
+if ASYNC_MODE:
+    from .routers.aio import movies, theaters, shows, bookings, analytics
+else:
+    from .routers import movies, theaters, shows, bookings, analytics
+from .routers import internal
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
@@ -25,6 +32,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by browser clients: layout ETags and the next-page cursor
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include routers
@@ -33,6 +42,7 @@ app.include_router(theaters.router, prefix="/api/v1")
 app.include_router(shows.router, prefix="/api/v1")
 app.include_router(bookings.router, prefix="/api/v1")
 app.include_router(analytics.router, prefix="/api/v1")
+app.include_router(internal.router)
 
 # Exception handler for custom exceptions
 @app.exception_handler(AlgoBharatException)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 from datetime import datetime
 
+# Seat storage modes for a show
+SEAT_MODE_MATERIALIZED = "materialized"  # one Seat row per physical seat, created with the show
+SEAT_MODE_VIRTUAL = "virtual"  # seats derived from seat_layout, only booked seats are stored
+
 class Movie(Base):
     __tablename__ = "movies"
     
@@ -41,7 +45,7 @@ class Hall(Base):
     __tablename__ = "halls"
     
     id = Column(Integer, primary_key=True, index=True)
-    theater_id = Column(Integer, ForeignKey("theaters.id"), nullable=False)
+    theater_id = Column(Integer, ForeignKey("theaters.id"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     total_rows = Column(Integer, nullable=False)
     seats_per_row = Column(JSON, nullable=False)  # Store as JSON: {"row1": 7, "row2": 8, ...}
@@ -55,6 +59,13 @@ class Hall(Base):
 
 class Show(Base):
     __tablename__ = "shows"
+    __table_args__ = (
+        # Show listings per movie / theater, paged in (show_time, id) order
+        Index("ix_shows_movie_time", "movie_id", "show_time", "id"),
+        Index("ix_shows_theater_time", "theater_id", "show_time", "id"),
+        # Hall schedule index loads: every show of a hall, or those added after a known id
+        Index("ix_shows_hall_id", "hall_id", "id", postgresql_include=["show_time", "movie_id"]),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
@@ -62,6 +73,9 @@ class Show(Base):
     hall_id = Column(Integer, ForeignKey("halls.id"), nullable=False)
     show_time = Column(DateTime, nullable=False, index=True)
     price = Column(Float, nullable=False)
+    seat_mode = Column(String(20), nullable=False, default=SEAT_MODE_MATERIALIZED,
+                       server_default=SEAT_MODE_MATERIALIZED)
+    seat_layout = Column(JSON, nullable=True)  # Hall layout snapshot for virtual seat mode
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -73,15 +87,26 @@ class Show(Base):
 
 class Seat(Base):
     __tablename__ = "seats"
+    __table_args__ = (
+        # A physical seat exists at most once per show; in virtual mode this is what
+        # stops two bookings from inserting the same seat
+        Index("uq_seats_show_position", "show_id", "row_number", "seat_number", unique=True),
+        # Free/booked seat scans and counts per show; covers the inventory load
+        Index("ix_seats_show_booked", "show_id", "is_booked", "row_number", "seat_number",
+              postgresql_include=["id"]),
+        Index("ix_seats_hall_show", "hall_id", "show_id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # No separate index on id: the primary key already is one, and every seat
+    # row written (thousands per show) would have to update it
+    id = Column(Integer, primary_key=True)
     show_id = Column(Integer, ForeignKey("shows.id"), nullable=False)
     hall_id = Column(Integer, ForeignKey("halls.id"), nullable=False)
     row_number = Column(Integer, nullable=False)
     seat_number = Column(Integer, nullable=False)
     is_aisle = Column(Boolean, default=False)  # True if it's an aisle seat (columns 1, 2, 3)
     is_booked = Column(Boolean, default=False)
-    booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -92,6 +117,10 @@ class Seat(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Analytics: confirmed bookings of a set of shows within a time window
+        Index("ix_bookings_show_time_status", "show_id", "booking_time", "booking_status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False, index=True)  # In a real app, this would be ForeignKey to User table
@@ -117,3 +146,91 @@ class User(Base):
     phone = Column(String(20))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Daily analytics rollups: confirmed bookings, tickets and GMV per entity and
+# booking day, incremented in the booking's own transaction (app/rollups.py)
+class RollupCounters:
+    bookings = Column(Integer, nullable=False, default=0)
+    tickets = Column(Integer, nullable=False, default=0)
+    gmv = Column(Float, nullable=False, default=0.0)
+
+class DailyMovieStats(RollupCounters, Base):
+    __tablename__ = "daily_movie_stats"
+    __table_args__ = (
+        # Dashboard: every movie's counters over a range of days
+        Index("ix_daily_movie_stats_day", "day", "movie_id",
+              postgresql_include=["bookings", "tickets", "gmv"]),
+    )
+    
+    movie_id = Column(Integer, ForeignKey("movies.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+class DailyTheaterStats(RollupCounters, Base):
+    __tablename__ = "daily_theater_stats"
+    __table_args__ = (
+        # Dashboard: every theater's counters over a range of days
+        Index("ix_daily_theater_stats_day", "day", "theater_id",
+              postgresql_include=["bookings", "tickets", "gmv"]),
+    )
+    
+    theater_id = Column(Integer, ForeignKey("theaters.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+class DailyHallStats(RollupCounters, Base):
+    __tablename__ = "daily_hall_stats"
+    __table_args__ = (
+        # Per-hall breakdown of a theater's window
+        Index("ix_daily_hall_stats_theater_day", "theater_id", "day"),
+    )
+    
+    hall_id = Column(Integer, ForeignKey("halls.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    theater_id = Column(Integer, ForeignKey("theaters.id"), nullable=False)
+
+class DailyShowStats(RollupCounters, Base):
+    __tablename__ = "daily_show_stats"
+    
+    show_id = Column(Integer, ForeignKey("shows.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+# Monthly rollups for the dashboard: the same counters per movie and theater and
+# calendar month (``month`` is its first day), kept alongside the daily ones so
+# a whole month is one row per entity
+class MonthlyMovieStats(RollupCounters, Base):
+    __tablename__ = "monthly_movie_stats"
+    __table_args__ = (
+        # Dashboard: every movie's counters in one month
+        Index("ix_monthly_movie_stats_month", "month", "movie_id",
+              postgresql_include=["bookings", "tickets", "gmv"]),
+    )
+    
+    movie_id = Column(Integer, ForeignKey("movies.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+
+class MonthlyTheaterStats(RollupCounters, Base):
+    __tablename__ = "monthly_theater_stats"
+    __table_args__ = (
+        # Dashboard: every theater's counters in one month
+        Index("ix_monthly_theater_stats_month", "month", "theater_id",
+              postgresql_include=["bookings", "tickets", "gmv"]),
+    )
+    
+    theater_id = Column(Integer, ForeignKey("theaters.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+
+# Transactional outbox: events written in the transaction that caused them and
+# published afterwards by the relay (app/outbox.py), so consumers never run on
+# the request path
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Relay: unpublished events (published_at IS NULL) in id order
+        Index("ix_outbox_events_published_id", "published_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True))
@@ -0,0 +1,238 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import json
+import os
+import threading
+
+import redis
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from .models import Booking, OutboxEvent, Show
+
+# Booking events leave the request through the outbox table: the booking's
+# transaction writes an outbox row, the relay (app/worker.py) later publishes
+# unpublished rows to the event stream, and consumers registered with
+# @consumer run in the worker. Delivery is at least once; consumers get the
+# outbox id as event["id"] to drop duplicates.
+BOOKING_CONFIRMED = "BookingConfirmed"
+
+# Event stream backend: redis (a Redis stream read by a consumer group) or
+# local (in-process queue; relay and consumers must share the process)
+OUTBOX_BACKEND = os.getenv("OUTBOX_BACKEND", "redis")
+OUTBOX_STREAM = os.getenv("OUTBOX_STREAM", "booking-events")
+OUTBOX_CONSUMER_GROUP = os.getenv("OUTBOX_CONSUMER_GROUP", "booking-consumers")
+# Approximate number of events the Redis stream keeps
+OUTBOX_STREAM_MAXLEN = int(os.getenv("OUTBOX_STREAM_MAXLEN", 100000))
+# Events relayed (and read from the stream) per round trip
+OUTBOX_RELAY_BATCH = int(os.getenv("OUTBOX_RELAY_BATCH", 500))
+# A stream message read but not acknowledged for this long is taken over by
+# another worker (its reader died before handing it to the consumers)
+OUTBOX_CLAIM_IDLE_MS = int(os.getenv("OUTBOX_CLAIM_IDLE_MS", 60000))
+# Published outbox rows are deleted after this many hours
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", 24))
+
+Event = Dict[str, Any]
+
+_consumers: Dict[str, Callable[[Event], None]] = {}
+_subscriptions: Dict[str, List[str]] = {}
+
+
+def consumer(event_type: str, name: str = None):
+    """Register the decorated function to receive every ``event_type`` event"""
+    def register(func: Callable[[Event], None]) -> Callable[[Event], None]:
+        consumer_name = name or f"{func.__module__}.{func.__qualname__}"
+        _consumers[consumer_name] = func
+        subscribers = _subscriptions.setdefault(event_type, [])
+        if consumer_name not in subscribers:
+            subscribers.append(consumer_name)
+        return func
+    return register
+
+
+def consumers_for(event_type: str) -> List[str]:
+    return list(_subscriptions.get(event_type, ()))
+
+
+def get_consumer(name: str) -> Callable[[Event], None]:
+    return _consumers[name]
+
+
+def record_booking_confirmed(db: Session, show: Show, booking: Booking, seat_ids: Iterable[int]) -> None:
+    """Queue a BookingConfirmed event, in the booking's transaction"""
+    seat_ids = sorted(seat_ids)
+    db.add(OutboxEvent(event_type=BOOKING_CONFIRMED, aggregate_id=booking.id, payload={
+        "booking_id": booking.id,
+        "booking_reference": booking.booking_reference,
+        "user_id": booking.user_id,
+        "show_id": show.id,
+        "movie_id": show.movie_id,
+        "theater_id": show.theater_id,
+        "hall_id": show.hall_id,
+        "seat_ids": seat_ids,
+        "tickets": len(seat_ids),
+        "total_amount": booking.total_amount,
+        "booking_time": booking.booking_time.isoformat(),
+    }))
+
+
+def event_message(row: OutboxEvent) -> Event:
+    return {
+        "id": row.id,
+        "type": row.event_type,
+        "aggregate_id": row.aggregate_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "payload": row.payload,
+    }
+
+
+class EventStream(ABC):
+    """Where the relay publishes outbox events and the worker reads them back"""
+
+    @abstractmethod
+    def publish(self, events: List[Event]) -> None:
+        """Append ``events`` to the stream, in order"""
+
+    @abstractmethod
+    def read(self, reader: str, count: int) -> List[Tuple[str, Event]]:
+        """Up to ``count`` (message id, event) pairs not yet handed to ``reader``'s group"""
+
+    @abstractmethod
+    def ack(self, message_ids: List[str]) -> None:
+        """Mark messages as handled so they are not delivered again"""
+
+
+class RedisEventStream(EventStream):
+    """Events in a Redis stream, shared by every worker through one consumer group"""
+
+    def __init__(self, client, stream: str = OUTBOX_STREAM, group: str = OUTBOX_CONSUMER_GROUP,
+                 maxlen: int = OUTBOX_STREAM_MAXLEN):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.maxlen = maxlen
+        self._group_created = False
+
+    def publish(self, events: List[Event]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(self.stream, {"event": json.dumps(event)}, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    def _ensure_group(self) -> None:
+        if self._group_created:
+            return
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_created = True
+
+    def read(self, reader: str, count: int) -> List[Tuple[str, Event]]:
+        self._ensure_group()
+        # Messages of a reader that died before acknowledging them come first
+        messages = list(self.client.xautoclaim(self.stream, self.group, reader, OUTBOX_CLAIM_IDLE_MS,
+                                               count=count)[1])
+        if len(messages) < count:
+            for _, entries in self.client.xreadgroup(self.group, reader, {self.stream: ">"},
+                                                     count=count - len(messages)) or []:
+                messages.extend(entries)
+        trimmed = [message_id for message_id, fields in messages if not fields]
+        if trimmed:
+            self.ack(trimmed)
+        return [(message_id, json.loads(fields["event"])) for message_id, fields in messages if fields]
+
+    def ack(self, message_ids: List[str]) -> None:
+        if message_ids:
+            self.client.xack(self.stream, self.group, *message_ids)
+
+
+class LocalEventStream(EventStream):
+    """In-process stand-in for RedisEventStream (single worker development and tests)"""
+
+    def __init__(self):
+        self._events: "deque[Event]" = deque()
+        self._lock = threading.Lock()
+
+    def publish(self, events: List[Event]) -> None:
+        with self._lock:
+            self._events.extend(events)
+
+    def read(self, reader: str, count: int) -> List[Tuple[str, Event]]:
+        with self._lock:
+            events = [self._events.popleft() for _ in range(min(count, len(self._events)))]
+        return [(str(event["id"]), event) for event in events]
+
+    def ack(self, message_ids: List[str]) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+def create_event_stream(redis_client) -> EventStream:
+    """Pick the event stream backend from OUTBOX_BACKEND (redis or local)"""
+    if OUTBOX_BACKEND == "local":
+        return LocalEventStream()
+    return RedisEventStream(redis_client)
+
+
+def relay_once(db: Session, stream: EventStream, batch: int = OUTBOX_RELAY_BATCH) -> int:
+    """Publish up to ``batch`` of the oldest unpublished events and mark them published.
+
+    Concurrent relays skip each other's rows on PostgreSQL. If publishing
+    fails nothing is marked, and the events go out with the next run.
+    """
+    rows = db.execute(
+        select(OutboxEvent).where(OutboxEvent.published_at.is_(None))
+        .order_by(OutboxEvent.id).limit(batch).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not rows:
+        db.rollback()
+        return 0
+    try:
+        stream.publish([event_message(row) for row in rows])
+    except Exception:
+        db.rollback()
+        raise
+    db.execute(
+        update(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows]))
+        .values(published_at=datetime.now())
+    )
+    db.commit()
+    return len(rows)
+
+
+def relay_outbox(db: Session, stream: EventStream, batch: int = OUTBOX_RELAY_BATCH) -> int:
+    """Relay until the outbox is drained; returns events published"""
+    published = 0
+    while True:
+        relayed = relay_once(db, stream, batch)
+        published += relayed
+        if relayed < batch:
+            return published
+
+
+def dispatch_events(stream: EventStream, deliver: Callable[[str, Event], Any], reader: str,
+                    count: int = OUTBOX_RELAY_BATCH) -> int:
+    """Hand each event read from the stream to every consumer registered for its
+    type through ``deliver(consumer name, event)``; returns events read.
+
+    Messages are acknowledged once all of them were delivered.
+    """
+    messages = stream.read(reader, count)
+    for _, event in messages:
+        for name in consumers_for(event["type"]):
+            deliver(name, event)
+    stream.ack([message_id for message_id, _ in messages])
+    return len(messages)
+
+
+def prune_outbox(db: Session, retention: timedelta = timedelta(hours=OUTBOX_RETENTION_HOURS)) -> int:
+    """Delete events published longer than ``retention`` ago; the caller commits"""
+    return db.execute(
+        delete(OutboxEvent).where(OutboxEvent.published_at < datetime.now() - retention)
+    ).rowcount
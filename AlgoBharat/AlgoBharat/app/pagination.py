@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import base64
+import json
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from .exceptions import InvalidCursorException
+
+# Keyset pagination: a page is "the next ``limit`` rows after the last row the
+# client saw" in a fixed sort order, so fetching page N costs the same as page 1
+# (an index range scan instead of skipping N * limit rows) and rows inserted
+# meanwhile never shift later pages.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort-key ``values`` of the last row of a page"""
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values],
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[Callable[[Any], Any]]) -> Tuple[Any, ...]:
+    """Sort-key values of a cursor, converted with ``types``; raises InvalidCursorException"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorException(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_page(query: Query, columns: Sequence, types: Sequence[Callable[[Any], Any]],
+                cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    """One page of ``query`` ordered by ``columns`` (unique together, ascending).
+
+    Returns the rows and the cursor of the next page, or None on the last page.
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, types)
+        if len(columns) == 1:
+            query = query.filter(columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    # One extra row tells whether another page follows
+    rows = query.order_by(*columns).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
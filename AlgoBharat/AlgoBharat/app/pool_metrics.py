@@ -0,0 +1,174 @@
+from typing import Any, Dict, Optional
+import bisect
+import threading
+import time
+
+import redis
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (ms) of the checkout-wait histogram buckets; the last bucket is open
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Checkout-wait histogram and saturation counters for one connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.saturated = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_checkout(self, waited: float, saturated: bool) -> None:
+        bucket = bisect.bisect_left(WAIT_BUCKETS_MS, waited * 1000)
+        with self._lock:
+            self.checkouts += 1
+            self.saturated += saturated
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.buckets[bucket] += 1
+
+    def record_timeout(self, waited: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.saturated += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def wait_percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the given fraction of checkouts"""
+        with self._lock:
+            buckets, total = list(self.buckets), self.checkouts
+        if not total:
+            return None
+        target = fraction * total
+        seen = 0
+        for index, count in enumerate(buckets):
+            seen += count
+            if seen >= target:
+                return WAIT_BUCKETS_MS[index] if index < len(WAIT_BUCKETS_MS) else self.max_wait * 1000
+        return self.max_wait * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            histogram = {
+                (f"le_{bound}ms" if index < len(WAIT_BUCKETS_MS) else f"gt_{WAIT_BUCKETS_MS[-1]}ms"): count
+                for index, (bound, count) in enumerate(zip(WAIT_BUCKETS_MS + (None,), self.buckets))
+            }
+            stats = {
+                "checkouts": self.checkouts,
+                "saturated": self.saturated,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / max(self.checkouts + self.timeouts, 1) * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "wait_histogram": histogram,
+            }
+        stats["p50_wait_ms"] = self.wait_percentile(0.5)
+        stats["p99_wait_ms"] = self.wait_percentile(0.99)
+        return stats
+
+
+# Every instrumented pool registers its metrics here under a stable name
+pool_metrics: Dict[str, PoolMetrics] = {}
+_live_pools: Dict[str, Any] = {}
+
+
+def register_pool(name: str, pool) -> PoolMetrics:
+    """Attach (or re-attach after a pool recreate) the metrics called ``name``"""
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+    pool.metrics = metrics
+    _live_pools[name] = pool
+    return metrics
+
+
+class _InstrumentedQueuePoolMixin:
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        # No idle connection and no overflow left: this checkout has to queue
+        saturated = self._pool.empty() and -1 < self._max_overflow <= self._overflow
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started, saturated)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        if self.metrics is not None:
+            register_pool(self.metrics.name, pool)
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedQueuePoolMixin, QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedQueuePoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited"""
+
+
+class InstrumentedRedisPool(redis.BlockingConnectionPool):
+    """Bounded Redis pool: callers queue for up to ``timeout`` seconds when it is exhausted"""
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(**kwargs)
+        register_pool(name, self)
+
+    def get_connection(self, command_name, *keys, **options):
+        saturated = self.pool.empty()
+        started = time.perf_counter()
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except redis.ConnectionError as e:
+            # Pool exhaustion; failures to reach Redis itself are not pool waits
+            if str(e) == "No connection available.":
+                self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started, saturated)
+        return connection
+
+
+def pool_status(pool) -> Dict[str, Any]:
+    """Current occupancy of a live pool"""
+    if isinstance(pool, QueuePool):
+        return {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        }
+    if isinstance(pool, redis.BlockingConnectionPool):
+        # The queue holds idle connections plus None placeholders for unopened ones
+        idle = len([connection for connection in pool.pool.queue if connection is not None])
+        return {
+            "size": pool.max_connections,
+            "timeout": pool.timeout,
+            "checked_out": len(pool._connections) - idle,
+            "idle": idle,
+        }
+    return {}
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Occupancy and checkout metrics of every instrumented pool"""
+    return {
+        name: {**pool_status(_live_pools[name]), **metrics.snapshot()}
+        for name, metrics in pool_metrics.items()
+    }
@@ -0,0 +1,144 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, and_, cast, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import (
+    Booking, Seat, Show, DailyMovieStats, DailyTheaterStats, DailyHallStats, DailyShowStats,
+    MonthlyMovieStats, MonthlyTheaterStats
+)
+
+# Rollup periods, each the name of the date column holding the period's first day
+DAY = "day"
+MONTH = "month"
+
+# Rollup tables, the show columns filling each one's key, and their period.
+# Bookings touch the rows in this order, so concurrent bookings lock them in
+# the same order.
+ROLLUPS = (
+    (DailyMovieStats, {"movie_id": Show.movie_id}, DAY),
+    (DailyTheaterStats, {"theater_id": Show.theater_id}, DAY),
+    (DailyHallStats, {"hall_id": Show.hall_id, "theater_id": Show.theater_id}, DAY),
+    (DailyShowStats, {"show_id": Show.id}, DAY),
+    (MonthlyMovieStats, {"movie_id": Show.movie_id}, MONTH),
+    (MonthlyTheaterStats, {"theater_id": Show.theater_id}, MONTH),
+)
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+COUNTERS = ("bookings", "tickets", "gmv")
+
+
+def _increment(db: Session, model, rows: List[dict]) -> None:
+    """Add each row's counters to the rollup row with its key and day, creating missing rows"""
+    upsert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        # One statement for all rows; their keys are distinct
+        statement = upsert(model).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[column.name for column in model.__table__.primary_key],
+            set_={name: getattr(model, name) + statement.excluded[name] for name in COUNTERS}
+        ))
+        return
+    # Other databases: update the day's row, or create it
+    for row in rows:
+        key_filter = and_(*(getattr(model, name) == value for name, value in row.items() if name not in COUNTERS))
+        updated = db.execute(
+            update(model).where(key_filter)
+            .values({name: getattr(model, name) + row[name] for name in COUNTERS})
+        )
+        if not updated.rowcount:
+            db.execute(insert(model).values(**row))
+
+
+def period_start(day: date, period: str) -> date:
+    """First day of the ``period`` that ``day`` falls in"""
+    return day.replace(day=1) if period == MONTH else day
+
+
+def _period_expression(db: Session, period: str):
+    """SQL for the first day of the ``period`` each booking was made in.
+
+    The one place a booking's day is derived, for the live rollups and
+    rebuild_rollups alike: booking_time is a timestamptz on PostgreSQL, so
+    its day is the one in the session's time zone, not this process's.
+    """
+    if period == DAY:
+        return func.date(Booking.booking_time, type_=Date)
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc("month", Booking.booking_time), Date)
+    return func.date(Booking.booking_time, "start of month", type_=Date)
+
+
+def _period_starts(db: Session, bookings: Sequence[Booking]) -> Dict[int, Dict[str, date]]:
+    """Booking id -> period -> first day, read back from the (flushed) bookings"""
+    periods = (DAY, MONTH)
+    rows = db.execute(
+        select(Booking.id, *(_period_expression(db, period) for period in periods))
+        .where(Booking.id.in_([booking.id for booking in bookings]))
+    )
+    return {booking_id: dict(zip(periods, starts)) for booking_id, *starts in rows}
+
+
+def record_booking(db: Session, show: Show, booking: Booking, tickets: int) -> None:
+    """Add a new confirmed booking to the rollups, in the booking's transaction"""
+    record_bookings(db, [(show, booking, tickets)])
+
+
+def record_bookings(db: Session, bookings: Sequence[Tuple[Show, Booking, int]]) -> None:
+    """Add new confirmed (show, booking, tickets) to the rollups: one statement per rollup
+    table, after one read of the bookings' periods.
+
+    The bookings must be flushed. Rows are touched in key order, so concurrent
+    bulk bookings lock them in the same order.
+    """
+    starts = _period_starts(db, [booking for _, booking, _ in bookings])
+    for model, columns, period in ROLLUPS:
+        totals: Dict[tuple, List] = {}
+        for show, booking, tickets in bookings:
+            key = tuple(getattr(show, column.key) for column in columns.values()) + (starts[booking.id][period],)
+            counters = totals.setdefault(key, [0, 0, 0.0])
+            counters[0] += 1
+            counters[1] += tickets
+            counters[2] += booking.total_amount
+        names = list(columns) + [period]
+        _increment(db, model, [
+            {**dict(zip(names, key)), **dict(zip(COUNTERS, totals[key]))} for key in sorted(totals)
+        ])
+
+
+def rebuild_rollups(db: Session, since: Optional[date] = None) -> None:
+    """Recompute the rollups from bookings (all days, or days from ``since`` on).
+
+    Monthly rollups are recomputed from the first day of ``since``'s month.
+    Runs as one transaction; the caller commits.
+    """
+    tickets = select(Seat.booking_id, func.count(Seat.id).label("tickets")) \
+        .group_by(Seat.booking_id).subquery()
+
+    for model, columns, period in ROLLUPS:
+        confirmed = [Booking.booking_status == "confirmed"]
+        delete = model.__table__.delete()
+        if since is not None:
+            first = period_start(since, period)
+            confirmed.append(Booking.booking_time >= datetime.combine(first, datetime.min.time()))
+            delete = delete.where(getattr(model, period) >= first)
+        db.execute(delete)
+
+        key_columns = list(columns.values())
+        booked_in = _period_expression(db, period)
+        db.execute(insert(model).from_select(
+            list(columns) + [period, "bookings", "tickets", "gmv"],
+            select(
+                *key_columns,
+                booked_in,
+                func.count(Booking.id),
+                func.coalesce(func.sum(tickets.c.tickets), 0),
+                func.coalesce(func.sum(Booking.total_amount), 0.0)
+            ).select_from(Booking)
+             .join(Show, Booking.show_id == Show.id)
+             .outerjoin(tickets, tickets.c.booking_id == Booking.id)
+             .where(and_(*confirmed))
+             .group_by(*key_columns, booked_in)
+        ))
@@ -0,0 +1 @@
+# Async API Routers Package (ASYNC_MODE=1)
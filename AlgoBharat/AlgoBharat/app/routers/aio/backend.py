@@ -0,0 +1,31 @@
+from ...database import get_async_db, get_async_session_factory
+from ...export import async_export_chunks
+from ...async_services import (
+    AsyncMovieService,
+    AsyncTheaterService,
+    AsyncHallService,
+    AsyncShowService,
+    AsyncSeatService,
+    AsyncBookingService,
+    AsyncAnalyticsService
+)
+
+# The routers/backend.py interface for the async request path (ASYNC_MODE=1)
+
+class AsyncBackend:
+    """AsyncSession from get_async_db; the Async* services await the database and seat locks"""
+    get_db = staticmethod(get_async_db)
+    get_session_factory = staticmethod(get_async_session_factory)
+    # AsyncSession is its own async context manager
+    session = staticmethod(lambda session_factory: session_factory())
+    movies = AsyncMovieService
+    theaters = AsyncTheaterService
+    halls = AsyncHallService
+    shows = AsyncShowService
+    seats = AsyncSeatService
+    bookings = AsyncBookingService
+    analytics = AsyncAnalyticsService
+    export_rows = staticmethod(AsyncBookingService.stream_export_rows)
+    export_chunks = staticmethod(async_export_chunks)
+
+ASYNC_BACKEND = AsyncBackend()
@@ -0,0 +1,4 @@
+from ..movies import create_router
+from .backend import ASYNC_BACKEND
+
+router = create_router(ASYNC_BACKEND)
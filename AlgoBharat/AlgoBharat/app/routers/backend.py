@@ -0,0 +1,71 @@
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from ..database import get_db, get_session_factory
+from ..export import export_chunks
+from ..services import (
+    MovieService,
+    TheaterService,
+    HallService,
+    ShowService,
+    SeatService,
+    BookingService,
+    AnalyticsService
+)
+
+# Each router module writes its handlers once, as coroutines that await the
+# services through a backend, and builds one APIRouter per backend: SYNC_BACKEND
+# here, ASYNC_BACKEND in routers/aio. A backend supplies the session dependencies
+# and service objects whose methods take the session first and are awaited.
+
+class ThreadedService:
+    """A sync service class whose methods are awaited in the threadpool"""
+    def __init__(self, service):
+        self._service = service
+
+    def __getattr__(self, name):
+        method = getattr(self._service, name)
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(method, *args, **kwargs)
+        return call
+
+class ThreadedBookingService(ThreadedService):
+    """BookingService with bookings returned as rows, like AsyncBookingService"""
+    def __init__(self):
+        super().__init__(BookingService)
+
+    async def create_booking(self, db, booking_data):
+        # Read back as a row so seats carry the ids the request named, in either seat mode
+        return await run_in_threadpool(
+            lambda: BookingService.get_booking_row(db, BookingService.create_booking(db, booking_data).id)
+        )
+
+    async def get_booking(self, db, booking_id):
+        return await run_in_threadpool(BookingService.get_booking_row, db, booking_id)
+
+@asynccontextmanager
+async def _threaded_session(session_factory):
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+class SyncBackend:
+    """Session from get_db; service calls run in the threadpool"""
+    get_db = staticmethod(get_db)
+    get_session_factory = staticmethod(get_session_factory)
+    # A session of the handler's own, as an async context manager
+    session = staticmethod(_threaded_session)
+    movies = ThreadedService(MovieService)
+    theaters = ThreadedService(TheaterService)
+    halls = ThreadedService(HallService)
+    shows = ThreadedService(ShowService)
+    seats = ThreadedService(SeatService)
+    bookings = ThreadedBookingService()
+    analytics = ThreadedService(AnalyticsService)
+    # Export rows and their encoder: StreamingResponse iterates sync chunks in the threadpool
+    export_rows = staticmethod(BookingService.iter_export_rows)
+    export_chunks = staticmethod(export_chunks)
+
+SYNC_BACKEND = SyncBackend()
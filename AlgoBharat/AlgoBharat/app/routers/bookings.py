@@ -1,121 +1,205 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from datetime import datetime
-from ..database import get_db
-from ..schemas import BookingCreate, BookingResponse, HallLayout, SeatSuggestion
-from ..services import BookingService, SeatService
+from ..schemas import (
+    BookingCreate, BookingResponse, BulkBookingCreate, BulkBookingResponse, HallLayout, SeatSuggestion
+)
+from ..layout_cache import COMPACT_LAYOUT_MEDIA_TYPE, LAYOUT_MEDIA_TYPES, etag_matches, negotiate_layout_format
+from ..fast_json import FastJSONResponse, pick_fields
+from ..export import EXPORT_MEDIA_TYPES
+from ..seat_stream import SSE_HEADERS, SSE_MEDIA_TYPE, seat_streams
 from ..exceptions import (
     SeatAlreadyBookedException,
     InsufficientSeatsException,
     ShowNotFoundException,
     HallNotFoundException
 )
+from .backend import SYNC_BACKEND
 
-router = APIRouter(prefix="/bookings", tags=["bookings"])
-
-@router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
-def create_booking(booking: BookingCreate, db: Session = Depends(get_db)):
-    """Create a new booking for seats"""
-    try:
-        return BookingService.create_booking(db, booking)
-    except (SeatAlreadyBookedException, InsufficientSeatsException) as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except ShowNotFoundException as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-@router.get("/{booking_id}", response_model=BookingResponse)
-def get_booking(booking_id: int, db: Session = Depends(get_db)):
-    """Get a specific booking by ID"""
-    booking = BookingService.get_booking(db, booking_id)
-    if booking is None:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    return booking
-
-@router.get("/user/{user_id}", response_model=List[BookingResponse])
-def get_user_bookings(user_id: int, db: Session = Depends(get_db)):
-    """Get all bookings for a specific user"""
-    bookings = BookingService.get_user_bookings(db, user_id)
-    return bookings
-
-@router.get("/halls/{hall_id}/layout", response_model=HallLayout)
-def get_hall_layout(
-    hall_id: int, 
-    show_id: int = Query(..., description="Show ID to get layout for"),
-    db: Session = Depends(get_db)
-):
-    """Get hall layout with booked and available seats"""
-    try:
-        return SeatService.get_hall_layout(db, hall_id, show_id)
-    except HallNotFoundException as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-@router.get("/shows/{show_id}/consecutive-seats")
-def find_consecutive_seats(
-    show_id: int,
-    num_seats: int = Query(..., ge=1, le=20, description="Number of consecutive seats needed"),
-    db: Session = Depends(get_db)
-):
-    """Find consecutive available seats for a show"""
-    consecutive_seats = SeatService.find_consecutive_seats(db, show_id, num_seats)
-    return {
-        "show_id": show_id,
-        "num_seats_requested": num_seats,
-        "consecutive_seats_found": consecutive_seats,
-        "total_available": len(consecutive_seats)
-    }
-
-@router.get("/movies/{movie_id}/suggestions", response_model=List[SeatSuggestion])
-def get_seat_suggestions(
-    movie_id: int,
-    num_seats: int = Query(..., ge=1, le=20, description="Number of consecutive seats needed"),
-    preferred_time: datetime = Query(None, description="Preferred show time"),
-    db: Session = Depends(get_db)
-):
-    """Get alternative show suggestions with consecutive seats available"""
-    suggestions = SeatService.suggest_alternative_shows(
-        db, movie_id, num_seats, preferred_time
-    )
-    return suggestions
-
-@router.post("/group-booking")
-def create_group_booking(
-    show_id: int = Query(..., description="Show ID"),
-    user_id: int = Query(..., description="User ID"),
-    num_seats: int = Query(..., ge=1, le=20, description="Number of seats needed"),
-    db: Session = Depends(get_db)
-):
-    """Create a group booking with automatic consecutive seat selection"""
-    try:
-        # Find consecutive seats
-        consecutive_seats = SeatService.find_consecutive_seats(db, show_id, num_seats)
-        
-        if not consecutive_seats:
-            # If no consecutive seats, get suggestions
-            suggestions = SeatService.suggest_alternative_shows(db, show_id, num_seats)
-            return {
-                "success": False,
-                "message": "No consecutive seats available for this show",
-                "suggestions": suggestions
-            }
-        
-        # Create booking with the found seats
-        seat_ids = [seat["id"] for seat in consecutive_seats]
-        booking_data = BookingCreate(
-            user_id=user_id,
-            show_id=show_id,
-            seat_ids=seat_ids
-        )
-        
-        booking = BookingService.create_booking(db, booking_data)
-        
+def create_router(backend) -> APIRouter:
+    """The booking and seat endpoints, served through ``backend`` (see routers/backend.py)"""
+    router = APIRouter(prefix="/bookings", tags=["bookings"])
+
+    @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+    async def create_booking(booking: BookingCreate, db=Depends(backend.get_db)):
+        """Create a new booking for seats"""
+        try:
+            created = await backend.bookings.create_booking(db, booking)
+        except (SeatAlreadyBookedException, InsufficientSeatsException) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ShowNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return FastJSONResponse(created, status_code=status.HTTP_201_CREATED)
+
+    @router.post("/bulk", response_model=BulkBookingResponse, status_code=status.HTTP_201_CREATED)
+    async def create_bulk_booking(bulk: BulkBookingCreate, db=Depends(backend.get_db)):
+        """Book seats in several shows at once: one booking per item, all or none"""
+        try:
+            bookings = await backend.bookings.create_bulk_booking(db, bulk)
+        except (SeatAlreadyBookedException, InsufficientSeatsException) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ShowNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return FastJSONResponse({
+            "bookings": bookings,
+            "total_amount": sum(booking["total_amount"] for booking in bookings)
+        }, status_code=status.HTTP_201_CREATED)
+
+    # Declared before /{booking_id} so "export" is not taken for a booking id
+    @router.get("/export")
+    async def export_bookings(
+        format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson (one JSON object per line) or csv"),
+        start_date: Optional[datetime] = Query(None, description="Only bookings made at or after this time"),
+        end_date: Optional[datetime] = Query(None, description="Only bookings made at or before this time"),
+        theater_id: Optional[int] = Query(None, description="Only bookings for this theater"),
+        movie_id: Optional[int] = Query(None, description="Only bookings for this movie"),
+        db=Depends(backend.get_db)
+    ):
+        """Stream bookings with their show, movie and theater, in booking id order"""
+        rows = backend.export_rows(db, start_date, end_date, theater_id, movie_id)
+        return StreamingResponse(backend.export_chunks(rows, format), media_type=EXPORT_MEDIA_TYPES[format],
+                                 headers={"Content-Disposition": f'attachment; filename="bookings.{format}"'})
+
+    @router.get("/{booking_id}", response_model=BookingResponse)
+    async def get_booking(booking_id: int, db=Depends(backend.get_db)):
+        """Get a specific booking by ID"""
+        booking = await backend.bookings.get_booking(db, booking_id)
+        if booking is None:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        return FastJSONResponse(booking)
+
+    @router.get("/user/{user_id}", response_model=List[BookingResponse])
+    async def get_user_bookings(user_id: int, db=Depends(backend.get_db)):
+        """Get all bookings for a specific user"""
+        return FastJSONResponse(await backend.bookings.get_user_booking_rows(db, user_id))
+
+    @router.get("/halls/{hall_id}/layout", response_model=HallLayout)
+    async def get_hall_layout(
+        request: Request,
+        hall_id: int,
+        show_id: int = Query(..., description="Show ID to get layout for"),
+        format: Optional[Literal["full", "compact"]] = Query(
+            None, description="full (one object per seat) or compact (run-length encoded rows); "
+                              f"without it, compact if Accept lists {COMPACT_LAYOUT_MEDIA_TYPE}"
+        ),
+        db=Depends(backend.get_db)
+    ):
+        """Get hall layout with booked and available seats (conditional on If-None-Match)"""
+        layout_format = negotiate_layout_format(format, request.headers.get("accept"))
+        version = await backend.seats.get_layout_version(hall_id, show_id)
+        etag = version.etag_for(layout_format) if version else None
+        headers = {"Vary": "Accept"}
+        if etag:
+            headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+        # Unchanged since the client's copy: answer before the session touches the database
+        if etag and etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        try:
+            payload = await backend.seats.get_hall_layout_payload(db, hall_id, show_id, version, layout_format)
+        except HallNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return Response(payload, media_type=LAYOUT_MEDIA_TYPES[layout_format], headers=headers)
+
+    @router.get("/halls/{hall_id}/layout/stream")
+    async def stream_hall_layout(
+        hall_id: int,
+        show_id: int = Query(..., description="Show ID to watch"),
+        session_factory=Depends(backend.get_session_factory)
+    ):
+        """Server-sent events: the hall layout once, then the seats booked or released since"""
+        # The show's feed outlives this request, so it reads through sessions of its own
+        async def load(version):
+            async with backend.session(session_factory) as db:
+                return await backend.seats.get_hall_layout(db, hall_id, show_id, version)
+
+        try:
+            subscription = await seat_streams.subscribe(
+                show_id, hall_id, load=load,
+                current_version=lambda: backend.seats.get_layout_version(hall_id, show_id),
+                start_version=lambda: backend.seats.start_layout_version(hall_id, show_id)
+            )
+        except HallNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return StreamingResponse(subscription.events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+    @router.get("/shows/{show_id}/consecutive-seats")
+    async def find_consecutive_seats(
+        show_id: int,
+        num_seats: int = Query(..., ge=1, le=20, description="Number of consecutive seats needed"),
+        db=Depends(backend.get_db)
+    ):
+        """Find consecutive available seats for a show"""
+        consecutive_seats = await backend.seats.find_consecutive_seats(db, show_id, num_seats)
         return {
-            "success": True,
-            "booking": booking,
-            "seats_booked": consecutive_seats
+            "show_id": show_id,
+            "num_seats_requested": num_seats,
+            "consecutive_seats_found": consecutive_seats,
+            "total_available": len(consecutive_seats)
         }
-        
-    except (SeatAlreadyBookedException, InsufficientSeatsException) as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except ShowNotFoundException as e:
-        raise HTTPException(status_code=404, detail=str(e))
+
+    @router.get("/movies/{movie_id}/suggestions", response_model=List[SeatSuggestion])
+    async def get_seat_suggestions(
+        movie_id: int,
+        num_seats: int = Query(..., ge=1, le=20, description="Number of consecutive seats needed"),
+        preferred_time: datetime = Query(None, description="Preferred show time"),
+        db=Depends(backend.get_db)
+    ):
+        """Get alternative show suggestions with consecutive seats available"""
+        suggestions = await backend.seats.suggest_alternative_shows(
+            db, movie_id, num_seats, preferred_time
+        )
+        return FastJSONResponse(pick_fields(suggestions, SeatSuggestion))
+
+    @router.post("/group-booking")
+    async def create_group_booking(
+        show_id: int = Query(..., description="Show ID"),
+        user_id: int = Query(..., description="User ID"),
+        num_seats: int = Query(..., ge=1, le=20, description="Number of seats needed"),
+        db=Depends(backend.get_db)
+    ):
+        """Create a group booking with automatic consecutive seat selection"""
+        try:
+            # Find consecutive seats
+            consecutive_seats = await backend.seats.find_consecutive_seats(db, show_id, num_seats)
+
+            if not consecutive_seats:
+                # If no consecutive seats, get suggestions for other shows of the same movie
+                show = await backend.shows.get_show(db, show_id)
+                if show is None:
+                    raise ShowNotFoundException(f"Show with id {show_id} not found")
+                suggestions = [
+                    suggestion
+                    for suggestion in await backend.seats.suggest_alternative_shows(db, show.movie_id, num_seats)
+                    if suggestion["show_id"] != show_id
+                ]
+                return {
+                    "success": False,
+                    "message": "No consecutive seats available for this show",
+                    "suggestions": suggestions
+                }
+
+            # Create booking with the found seats
+            seat_ids = [seat["id"] for seat in consecutive_seats]
+            booking_data = BookingCreate(
+                user_id=user_id,
+                show_id=show_id,
+                seat_ids=seat_ids
+            )
+
+            booking = await backend.bookings.create_booking(db, booking_data)
+
+            return {
+                "success": True,
+                "booking": booking,
+                "seats_booked": consecutive_seats
+            }
+
+        except (SeatAlreadyBookedException, InsufficientSeatsException) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ShowNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    return router
+
+router = create_router(SYNC_BACKEND)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Any, Dict, Optional
+import os
+import secrets
+from ..pool_metrics import pool_stats
+from ..services import catalog_cache
+
+# Operational endpoints are only served when INTERNAL_API_TOKEN is set, and
+# only to requests that send it in the X-Internal-Token header
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+# Operational endpoints; not part of the public API docs
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False,
+                   dependencies=[Depends(require_internal_token)])
+
+@router.get("/pool-stats")
+async def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Database and Redis pool occupancy, checkout-wait histograms and saturation counters"""
+    return pool_stats()
+
+@router.get("/cache-stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Catalog cache hit/miss counters per entity and tier"""
+    return catalog_cache.stats()
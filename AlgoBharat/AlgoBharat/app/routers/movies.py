@@ -1,44 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import List, Optional
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from ..schemas import Movie, MovieCreate, MovieUpdate
-from ..services import MovieService
-
-router = APIRouter(prefix="/movies", tags=["movies"])
-
-@router.post("/", response_model=Movie, status_code=status.HTTP_201_CREATED)
-def create_movie(movie: MovieCreate, db: Session = Depends(get_db)):
-    """Create a new movie"""
-    return MovieService.create_movie(db, movie)
-
-@router.get("/", response_model=List[Movie])
-def get_movies(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all movies"""
-    movies = MovieService.get_movies(db, skip=skip, limit=limit)
-    return movies
-
-@router.get("/{movie_id}", response_model=Movie)
-def get_movie(movie_id: int, db: Session = Depends(get_db)):
-    """Get a specific movie by ID"""
-    movie = MovieService.get_movie(db, movie_id)
-    if movie is None:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    return movie
-
-@router.put("/{movie_id}", response_model=Movie)
-def update_movie(movie_id: int, movie: MovieUpdate, db: Session = Depends(get_db)):
-    """Update a movie"""
-    movie_data = {k: v for k, v in movie.dict().items() if v is not None}
-    updated_movie = MovieService.update_movie(db, movie_id, movie_data)
-    if updated_movie is None:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    return updated_movie
-
-@router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_movie(movie_id: int, db: Session = Depends(get_db)):
-    """Delete a movie"""
-    success = MovieService.delete_movie(db, movie_id)
-    if not success:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    return None
+from ..exceptions import ShowScheduleConflictException
+from .backend import SYNC_BACKEND
+
+def create_router(backend) -> APIRouter:
+    """The movie endpoints, served through ``backend`` (see routers/backend.py)"""
+    router = APIRouter(prefix="/movies", tags=["movies"])
+
+    @router.post("/", response_model=Movie, status_code=status.HTTP_201_CREATED)
+    async def create_movie(movie: MovieCreate, db=Depends(backend.get_db)):
+        """Create a new movie"""
+        return await backend.movies.create_movie(db, movie)
+
+    @router.get("/", response_model=List[Movie])
+    async def get_movies(
+        response: Response,
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        skip: int = Query(0, ge=0, description="Deprecated offset paging; ignored when a cursor is given"),
+        db=Depends(backend.get_db)
+    ):
+        """Get all movies (pages in id order)"""
+        if skip and cursor is None:
+            return await backend.movies.get_movies(db, skip=skip, limit=limit)
+        movies, next_cursor = await backend.movies.get_movies_page(db, cursor, limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return movies
+
+    @router.get("/{movie_id}", response_model=Movie)
+    async def get_movie(movie_id: int, db=Depends(backend.get_db)):
+        """Get a specific movie by ID"""
+        movie = await backend.movies.get_movie(db, movie_id)
+        if movie is None:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        return movie
+
+    @router.put("/{movie_id}", response_model=Movie)
+    async def update_movie(movie_id: int, movie: MovieUpdate, db=Depends(backend.get_db)):
+        """Update a movie"""
+        movie_data = {k: v for k, v in movie.dict().items() if v is not None}
+        try:
+            updated_movie = await backend.movies.update_movie(db, movie_id, movie_data)
+        except ShowScheduleConflictException as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if updated_movie is None:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        return updated_movie
+
+    @router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
+    async def delete_movie(movie_id: int, db=Depends(backend.get_db)):
+        """Delete a movie"""
+        success = await backend.movies.delete_movie(db, movie_id)
+        if not success:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        return None
+
+    return router
+
+router = create_router(SYNC_BACKEND)
@@ -1,66 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..schemas import Show, ShowCreate, ShowUpdate
-from ..services import ShowService
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional
+from datetime import datetime
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..fast_json import FastJSONResponse, page_response
+from ..schemas import Show, ShowCreate, ShowUpdate, BulkShowCreate, BulkShowResponse, ScheduleSlot
 from ..exceptions import (
     MovieNotFoundException,
     TheaterNotFoundException,
-    HallNotFoundException
+    HallNotFoundException,
+    ShowScheduleConflictException
 )
+from .backend import SYNC_BACKEND
 
-router = APIRouter(prefix="/shows", tags=["shows"])
+def create_router(backend) -> APIRouter:
+    """The show endpoints, served through ``backend`` (see routers/backend.py)"""
+    router = APIRouter(prefix="/shows", tags=["shows"])
 
-@router.post("/", response_model=Show, status_code=status.HTTP_201_CREATED)
-def create_show(show: ShowCreate, db: Session = Depends(get_db)):
-    """Create a new show"""
-    try:
-        return ShowService.create_show(db, show)
-    except (MovieNotFoundException, TheaterNotFoundException, HallNotFoundException) as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    @router.post("/", response_model=Show, status_code=status.HTTP_201_CREATED)
+    async def create_show(show: ShowCreate, db=Depends(backend.get_db)):
+        """Create a new show"""
+        try:
+            return await backend.shows.create_show(db, show)
+        except (MovieNotFoundException, TheaterNotFoundException, HallNotFoundException) as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ShowScheduleConflictException as e:
+            raise HTTPException(status_code=409, detail=str(e))
 
-@router.get("/", response_model=List[Show])
-def get_shows(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all shows"""
-    shows = ShowService.get_shows(db, skip=skip, limit=limit)
-    return shows
+    @router.post("/bulk", response_model=BulkShowResponse, status_code=status.HTTP_201_CREATED)
+    async def create_shows(batch: BulkShowCreate, db=Depends(backend.get_db)):
+        """Create a batch of shows; items with an unknown movie, theater or hall, or an overlapping slot, are reported in errors"""
+        shows, errors = await backend.shows.create_shows(db, batch.shows)
+        return FastJSONResponse({"shows": shows, "errors": errors}, status_code=status.HTTP_201_CREATED)
 
-@router.get("/{show_id}", response_model=Show)
-def get_show(show_id: int, db: Session = Depends(get_db)):
-    """Get a specific show by ID"""
-    show = ShowService.get_show(db, show_id)
-    if show is None:
-        raise HTTPException(status_code=404, detail="Show not found")
-    return show
+    @router.get("/", response_model=List[Show])
+    async def get_shows(
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        skip: int = Query(0, ge=0, description="Deprecated offset paging; ignored when a cursor is given"),
+        db=Depends(backend.get_db)
+    ):
+        """Get all shows (pages in show time order)"""
+        if skip and cursor is None:
+            return await backend.shows.get_shows(db, skip=skip, limit=limit)
+        shows, next_cursor = await backend.shows.get_shows_page(db, cursor, limit, projected=True)
+        return page_response(shows, next_cursor)
 
-@router.get("/movie/{movie_id}", response_model=List[Show])
-def get_shows_by_movie(movie_id: int, db: Session = Depends(get_db)):
-    """Get all shows for a specific movie"""
-    shows = ShowService.get_shows_by_movie(db, movie_id)
-    return shows
+    @router.get("/{show_id}", response_model=Show)
+    async def get_show(show_id: int, db=Depends(backend.get_db)):
+        """Get a specific show by ID"""
+        show = await backend.shows.get_show(db, show_id)
+        if show is None:
+            raise HTTPException(status_code=404, detail="Show not found")
+        return show
 
-@router.get("/theater/{theater_id}", response_model=List[Show])
-def get_shows_by_theater(theater_id: int, db: Session = Depends(get_db)):
-    """Get all shows for a specific theater"""
-    shows = ShowService.get_shows_by_theater(db, theater_id)
-    return shows
+    @router.get("/movie/{movie_id}", response_model=List[Show])
+    async def get_shows_by_movie(
+        movie_id: int,
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        db=Depends(backend.get_db)
+    ):
+        """Get shows for a specific movie (pages in show time order)"""
+        shows, next_cursor = await backend.shows.get_shows_by_movie(db, movie_id, cursor, limit, projected=True)
+        return page_response(shows, next_cursor)
 
-@router.put("/{show_id}", response_model=Show)
-def update_show(show_id: int, show: ShowUpdate, db: Session = Depends(get_db)):
-    """Update a show"""
-    show_data = {k: v for k, v in show.dict().items() if v is not None}
-    # Note: In a real application, you'd want to add validation here
-    # to ensure the show can be updated safely
-    updated_show = ShowService.update_show(db, show_id, show_data)
-    if updated_show is None:
-        raise HTTPException(status_code=404, detail="Show not found")
-    return updated_show
+    @router.get("/theater/{theater_id}", response_model=List[Show])
+    async def get_shows_by_theater(
+        theater_id: int,
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        db=Depends(backend.get_db)
+    ):
+        """Get shows for a specific theater (pages in show time order)"""
+        shows, next_cursor = await backend.shows.get_shows_by_theater(db, theater_id, cursor, limit, projected=True)
+        return page_response(shows, next_cursor)
 
-@router.delete("/{show_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_show(show_id: int, db: Session = Depends(get_db)):
-    """Delete a show"""
-    success = ShowService.delete_show(db, show_id)
-    if not success:
-        raise HTTPException(status_code=404, detail="Show not found")
-    return None
+    @router.get("/hall/{hall_id}/next-free-slot", response_model=ScheduleSlot)
+    async def next_free_slot(
+        hall_id: int,
+        duration_minutes: int = Query(..., gt=0, description="Length of the movie to fit; cleanup time is added"),
+        after: Optional[datetime] = Query(None, description="Earliest acceptable show time (default: now)"),
+        db=Depends(backend.get_db)
+    ):
+        """Earliest time at or after ``after`` that a show of this length fits in the hall"""
+        try:
+            return await backend.shows.next_free_slot(db, hall_id, after or datetime.now(), duration_minutes)
+        except HallNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    @router.put("/{show_id}", response_model=Show)
+    async def update_show(show_id: int, show: ShowUpdate, db=Depends(backend.get_db)):
+        """Update a show"""
+        show_data = {k: v for k, v in show.dict().items() if v is not None}
+        try:
+            updated_show = await backend.shows.update_show(db, show_id, show_data)
+        except MovieNotFoundException as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ShowScheduleConflictException as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if updated_show is None:
+            raise HTTPException(status_code=404, detail="Show not found")
+        return updated_show
+
+    @router.delete("/{show_id}", status_code=status.HTTP_204_NO_CONTENT)
+    async def delete_show(show_id: int, db=Depends(backend.get_db)):
+        """Delete a show"""
+        success = await backend.shows.delete_show(db, show_id)
+        if not success:
+            raise HTTPException(status_code=404, detail="Show not found")
+        return None
+
+    return router
+
+router = create_router(SYNC_BACKEND)
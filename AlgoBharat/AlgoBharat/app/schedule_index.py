@@ -0,0 +1,273 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import random
+import threading
+import time
+
+# Minutes a hall is kept free after each show (cleaning, letting the audience
+# out); a show occupies its hall from show_time to show_time + duration + this
+SHOW_CLEANUP_MINUTES = int(os.getenv("SHOW_CLEANUP_MINUTES", 15))
+
+# Number of hall schedules kept in memory and how long one is trusted before it
+# is rebuilt. Free slot lookups see shows moved or deleted by other worker
+# processes after at most this many seconds; show writes re-read the stretch
+# they check from the database, under the hall's row lock, so they never miss one
+SCHEDULE_MAX_HALLS = int(os.getenv("SCHEDULE_INDEX_MAX_HALLS", 1024))
+SCHEDULE_TTL_SECONDS = float(os.getenv("SCHEDULE_INDEX_TTL_SECONDS", 60))
+
+NO_GAP = timedelta(0)
+
+
+def wall_time(show_time: datetime) -> datetime:
+    """``show_time`` as the naive shows.show_time column stores it"""
+    return show_time.replace(tzinfo=None) if show_time.tzinfo is not None else show_time
+
+
+def occupied_until(show_time: datetime, duration_minutes: int) -> datetime:
+    """End of the time a show holds its hall, cleanup included"""
+    return wall_time(show_time) + timedelta(minutes=duration_minutes + SHOW_CLEANUP_MINUTES)
+
+
+class _Node:
+    __slots__ = ("key", "end", "priority", "left", "right", "low", "high", "gap")
+
+    def __init__(self, start: datetime, show_id: int, end: datetime, priority: float):
+        self.key = (start, show_id)
+        self.end = end
+        self.priority = priority
+        self.left = self.right = None
+        self.low, self.high, self.gap = start, end, NO_GAP
+
+    def pull(self) -> None:
+        # low: earliest start in the subtree; high: latest end; gap: longest free
+        # stretch between consecutive shows of the subtree (in start order)
+        start = self.key[0]
+        left, right = self.left, self.right
+        low, high, gap = start, self.end, NO_GAP
+        if left is not None:
+            low = left.low
+            gap = max(left.gap, start - left.high)
+            high = max(high, left.high)
+        if right is not None:
+            gap = max(gap, right.gap, right.low - high)
+            high = max(high, right.high)
+        self.low, self.high, self.gap = low, high, gap
+
+
+def _split(node: Optional[_Node], key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """(nodes with key < ``key``, the rest)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.pull()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.pull()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Join two treaps where every key of ``left`` is below every key of ``right``"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.pull()
+        return left
+    right.left = _merge(left, right.left)
+    right.pull()
+    return right
+
+
+class ScheduleIndex:
+    """Interval index of the shows of one hall.
+
+    A treap keyed by (start, show_id) whose nodes also keep the latest end and
+    the longest gap between shows in their subtree, so whether a slot overlaps
+    a show, and the first free slot of a given length, are found in
+    O(log shows) expected, however many years of shows the hall has had.
+    Intervals are half open: a show may start the moment the previous one's
+    cleanup ends. Existing overlapping shows are indexed as they are.
+
+    ``lock`` only keeps worker threads from seeing the treap mid-change. It
+    does not keep async requests apart: those share the event loop thread, and
+    the lock is reentrant. Two show writes cannot take the same slot because
+    each first takes the hall's row lock in the database and, under it,
+    re-reads the stretch it checks (ShowService._lock_hall, _sync_window).
+    """
+
+    def __init__(self, hall_id: int, shows: Iterable[Tuple[int, datetime, datetime]] = ()):
+        self.hall_id = hall_id
+        self.loaded_at = time.monotonic()
+        self.last_show_id = 0  # Highest show id seen; later ones are loaded as a delta
+        self.lock = threading.RLock()
+        self._intervals: Dict[int, Tuple[datetime, datetime]] = {}
+        self._root = self._build(sorted((start, show_id, end) for show_id, start, end in shows))
+
+    def _build(self, shows: List[Tuple[datetime, int, datetime]]) -> Optional[_Node]:
+        # Cartesian tree over shows already in key order: O(n) instead of n inserts
+        spine: List[_Node] = []
+        for start, show_id, end in shows:
+            node = _Node(start, show_id, end, random.random())
+            self._intervals[show_id] = (start, end)
+            self.last_show_id = max(self.last_show_id, show_id)
+            last = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+                last.pull()
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        root = None
+        while spine:
+            root = spine.pop()
+            root.pull()
+        return root
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, show_id: int) -> bool:
+        return show_id in self._intervals
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.monotonic() - self.loaded_at > ttl
+
+    def add(self, show_id: int, start: datetime, end: datetime) -> None:
+        """Index a show (replacing its previous interval, if any)"""
+        self.remove(show_id)
+        self._intervals[show_id] = (start, end)
+        self.last_show_id = max(self.last_show_id, show_id)
+        left, right = _split(self._root, (start, show_id))
+        self._root = _merge(_merge(left, _Node(start, show_id, end, random.random())), right)
+
+    def remove(self, show_id: int) -> None:
+        interval = self._intervals.pop(show_id, None)
+        if interval is not None:
+            key = (interval[0], show_id)
+            left, rest = _split(self._root, key)
+            _, right = _split(rest, (key[0], show_id + 1))
+            self._root = _merge(left, right)
+
+    def replace_window(self, low: datetime, high: datetime, shows: Iterable[Tuple[int, datetime, datetime]]) -> None:
+        """Replace the indexed shows starting in [low, high) with ``shows``, as the database has them"""
+        left, rest = _split(self._root, (low, -math.inf))
+        window, right = _split(rest, (high, -math.inf))
+        self._root = _merge(left, right)
+        stack = [window] if window is not None else []
+        while stack:
+            node = stack.pop()
+            del self._intervals[node.key[1]]
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+        for show_id, start, end in shows:
+            self.add(show_id, start, end)
+
+    def find_overlap(self, start: datetime, end: datetime, exclude: Optional[int] = None) -> Optional[int]:
+        """Id of a show overlapping [start, end), or None; ``exclude`` (a show being moved) is ignored"""
+        interval = self._intervals.get(exclude) if exclude is not None else None
+        if interval is not None:
+            self.remove(exclude)
+            try:
+                return self.find_overlap(start, end)
+            finally:
+                self.add(exclude, *interval)
+        node = self._root
+        while node is not None:
+            if node.key[0] < end and start < node.end:
+                return node.key[1]
+            # If the left subtree reaches past ``start`` but holds no overlap, its
+            # latest-ending show starts at or after ``end``, and so does all of the right
+            node = node.left if node.left is not None and node.left.high > start else node.right
+        return None
+
+    def next_free_slot(self, after: datetime, length: timedelta) -> datetime:
+        """Earliest start at or after ``after`` with ``length`` free in the hall"""
+        slot, cover = self._first_gap_after(self._root, after, after, length)
+        return cover if slot is None else slot
+
+    def _first_gap_after(self, node: Optional[_Node], after: datetime, cover: datetime,
+                         length: timedelta) -> Tuple[Optional[datetime], datetime]:
+        # ``cover``: the hall is busy until then as far as the shows before this subtree go
+        if node is None:
+            return None, cover
+        if node.key[0] < after:
+            # This show and its left subtree start before ``after``: they only push the cover out
+            cover = max(cover, node.end, node.left.high) if node.left is not None else max(cover, node.end)
+            return self._first_gap_after(node.right, after, cover, length)
+        slot, cover = self._first_gap_after(node.left, after, cover, length)
+        if slot is not None:
+            return slot, cover
+        if node.key[0] - cover >= length:
+            return cover, cover
+        return self._first_gap(node.right, max(cover, node.end), length)
+
+    def _first_gap(self, node: Optional[_Node], cover: datetime,
+                   length: timedelta) -> Tuple[Optional[datetime], datetime]:
+        if node is None:
+            return None, cover
+        if node.low - cover < length and node.gap < length:
+            # No gap long enough anywhere in this subtree: skip it whole
+            return None, max(cover, node.high)
+        slot, cover = self._first_gap(node.left, cover, length)
+        if slot is not None:
+            return slot, cover
+        if node.key[0] - cover >= length:
+            return cover, cover
+        return self._first_gap(node.right, max(cover, node.end), length)
+
+
+class ScheduleIndexRegistry:
+    """Process-wide LRU of hall schedule indexes"""
+
+    def __init__(self, max_halls: int = SCHEDULE_MAX_HALLS, ttl: float = SCHEDULE_TTL_SECONDS):
+        self.max_halls = max_halls
+        self.ttl = ttl
+        self._indexes: "OrderedDict[int, ScheduleIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, hall_id: int) -> Optional[ScheduleIndex]:
+        with self._lock:
+            index = self._indexes.get(hall_id)
+            if index is None:
+                return None
+            if index.is_expired(self.ttl):
+                del self._indexes[hall_id]
+                return None
+            self._indexes.move_to_end(hall_id)
+            return index
+
+    def get_or_load(self, hall_id: int, loader: Callable[[int], ScheduleIndex]) -> ScheduleIndex:
+        index = self.get(hall_id)
+        if index is None:
+            index = loader(hall_id)
+            with self._lock:
+                # Another thread may have loaded it meanwhile; keep one index per hall
+                index = self._indexes.setdefault(hall_id, index)
+                self._indexes.move_to_end(hall_id)
+                while len(self._indexes) > self.max_halls:
+                    self._indexes.popitem(last=False)
+        return index
+
+    def remove_show(self, hall_id: int, show_id: int) -> None:
+        index = self.get(hall_id)
+        if index is not None:
+            with index.lock:
+                index.remove(show_id)
+
+    def invalidate(self, hall_id: int) -> None:
+        with self._lock:
+            self._indexes.pop(hall_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+hall_schedules = ScheduleIndexRegistry()
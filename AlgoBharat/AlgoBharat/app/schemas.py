@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 # Movie Schemas
@@ -92,7 +92,9 @@ class ShowBase(BaseModel):
     price: float = Field(..., gt=0)
 
 class ShowCreate(ShowBase):
-    pass
+    seat_mode: Optional[Literal["materialized", "virtual"]] = Field(
+        None, description="Seat storage mode; defaults to the SEAT_STORAGE_MODE setting"
+    )
 
 class ShowUpdate(BaseModel):
     movie_id: Optional[int] = None
@@ -103,12 +105,30 @@ class ShowUpdate(BaseModel):
 
 class Show(ShowBase):
     id: int
+    seat_mode: str = "materialized"
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class ScheduleSlot(BaseModel):
+    hall_id: int
+    show_time: datetime  # earliest free start at or after the requested time
+    ends_at: datetime  # show_time + the movie's duration (cleanup follows)
+
+class BulkShowCreate(BaseModel):
+    shows: List[ShowCreate] = Field(..., min_length=1, max_length=5000,
+                                    description="Shows to create; invalid items are reported, not created")
+
+class BulkShowError(BaseModel):
+    index: int  # position of the item in the request's shows
+    detail: str
+
+class BulkShowResponse(BaseModel):
+    shows: List[Show]  # created shows, in request order
+    errors: List[BulkShowError]
+
 # Seat Schemas
 class SeatBase(BaseModel):
     row_number: int = Field(..., gt=0)
@@ -151,6 +171,26 @@ class BookingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BulkBookingItem(BaseModel):
+    show_id: int
+    seat_ids: List[int] = Field(..., min_length=1, description="List of seat IDs to book")
+
+class BulkBookingCreate(BaseModel):
+    user_id: int
+    items: List[BulkBookingItem] = Field(..., min_length=1, max_length=100,
+                                         description="One booking per item; each show at most once")
+
+    @field_validator("items")
+    @classmethod
+    def one_item_per_show(cls, items: List[BulkBookingItem]) -> List[BulkBookingItem]:
+        if len({item.show_id for item in items}) != len(items):
+            raise ValueError("each show may appear in only one item")
+        return items
+
+class BulkBookingResponse(BaseModel):
+    bookings: List[BookingResponse]
+    total_amount: float
+
 # Hall Layout Schemas
 class HallLayout(BaseModel):
     hall_id: int
@@ -159,6 +199,19 @@ class HallLayout(BaseModel):
     booked_seats: List[Dict[str, Any]]
     available_seats: List[Dict[str, Any]]
 
+class CompactLayoutRow(BaseModel):
+    row_number: int
+    first_seat_id: Optional[int] = None  # id of seat 1; seat n is first_seat_id + n - 1
+    seats: str  # run-length encoded states per seat: a available, b booked, x no seat ("3ab2x")
+    seat_ids: Optional[List[Optional[int]]] = None  # only when the row's ids are not consecutive
+
+class CompactHallLayout(BaseModel):
+    hall_id: int
+    total_rows: int
+    seats_per_row: Dict[str, int]
+    aisle_seats: int  # seats 1..aisle_seats of every row are aisle seats
+    rows: List[CompactLayoutRow]
+
 # Seat Suggestion Schemas
 class SeatSuggestion(BaseModel):
     show_id: int
@@ -190,6 +243,12 @@ class TheaterAnalytics(BaseModel):
     period_end: datetime
     hall_stats: List[Dict[str, Any]]
 
+class DashboardAnalytics(BaseModel):
+    period: Dict[str, datetime]
+    summary: Dict[str, Any]
+    top_movies: List[Dict[str, Any]]
+    top_theaters: List[Dict[str, Any]]
+
 # Error Response Schema
 class ErrorResponse(BaseModel):
     detail: str
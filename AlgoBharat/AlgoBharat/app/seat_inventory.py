@@ -0,0 +1,431 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
+import os
+import re
+import threading
+import time
+
+# Number of shows kept in memory and how long an inventory is trusted before it
+# is reloaded (bookings made by other worker processes show up after at most
+# this many seconds; the booking itself is always validated in the database)
+INVENTORY_MAX_SHOWS = int(os.getenv("SEAT_INVENTORY_MAX_SHOWS", 2048))
+INVENTORY_TTL_SECONDS = float(os.getenv("SEAT_INVENTORY_TTL_SECONDS", 5))
+
+AISLE_SEATS = 3  # First 3 seats of every row are aisle seats
+
+# Seat states in the compact layout format, one letter per seat position
+COMPACT_AVAILABLE = "a"
+COMPACT_BOOKED = "b"
+COMPACT_NO_SEAT = "x"
+_BOOKED_BIT_STATES = str.maketrans({"0": COMPACT_AVAILABLE, "1": COMPACT_BOOKED})
+_STATE_RUNS = re.compile(f"{COMPACT_AVAILABLE}+|{COMPACT_BOOKED}+|{COMPACT_NO_SEAT}+")
+
+
+def parse_row_number(row_name: str) -> int:
+    """Convert a hall layout key such as "row7" into its row number"""
+    return int(row_name.replace("row", ""))
+
+
+@lru_cache(maxsize=256)
+def _compile_seat_template(layout: Tuple[Tuple[str, int], ...]) -> Tuple[Tuple[int, int, bool], ...]:
+    seats = []
+    for row_number, seat_count in sorted((parse_row_number(name), count) for name, count in layout):
+        for seat_number in range(1, seat_count + 1):
+            seats.append((row_number, seat_number, seat_number <= AISLE_SEATS))
+    return tuple(seats)
+
+
+def run_length(states: str) -> str:
+    """Run-length encode seat states: "aaabxaa" -> "3abx2a" (a count of 1 is left out)"""
+    return "".join(run if len(run) == 1 else f"{len(run)}{run[0]}" for run in _STATE_RUNS.findall(states))
+
+
+def seat_template(seats_per_row: Dict[str, int]) -> Tuple[Tuple[int, int, bool], ...]:
+    """(row_number, seat_number, is_aisle) for every seat of a hall layout, in row order.
+
+    Compiled once per distinct layout, so creating many shows in the same hall
+    does not re-parse the row keys.
+    """
+    return _compile_seat_template(tuple(seats_per_row.items()))
+
+
+@lru_cache(maxsize=256)
+def _compile_seat_positions(layout: Tuple[Tuple[str, int], ...]) -> Dict[Tuple[int, int], int]:
+    return {(row_number, seat_number): position
+            for position, (row_number, seat_number, _) in enumerate(_compile_seat_template(layout), 1)}
+
+
+def seat_positions(seats_per_row: Dict[str, int]) -> Dict[Tuple[int, int], int]:
+    """Position (1-based, in seat_template order) of every (row_number, seat_number).
+
+    Positions are the seat ids of virtual shows; the returned dict is shared,
+    do not modify it.
+    """
+    return _compile_seat_positions(tuple(seats_per_row.items()))
+
+
+class FreeRunTree:
+    """Segment tree over seat positions tracking runs of free seats.
+
+    Each node keeps the free run touching its left edge (prefix), its right
+    edge (suffix) and the longest run inside it, so the first block of ``n``
+    adjacent free seats is found and kept up to date in O(log seats).
+    """
+
+    __slots__ = ("size", "prefix", "suffix", "best")
+
+    def __init__(self, free: List[bool]):
+        size = 1
+        while size < len(free):
+            size *= 2
+        self.size = size
+        self.prefix = [0] * (2 * size)
+        self.suffix = [0] * (2 * size)
+        self.best = [0] * (2 * size)
+        for position, is_free in enumerate(free):
+            if is_free:
+                leaf = size + position
+                self.prefix[leaf] = self.suffix[leaf] = self.best[leaf] = 1
+        for node in range(size - 1, 0, -1):
+            self._pull(node)
+
+    def _pull(self, node: int) -> None:
+        half = self.size >> node.bit_length()
+        left, right = 2 * node, 2 * node + 1
+        prefix, suffix = self.prefix, self.suffix
+        prefix[node] = prefix[left] if prefix[left] < half else half + prefix[right]
+        suffix[node] = suffix[right] if suffix[right] < half else half + suffix[left]
+        self.best[node] = max(self.best[left], self.best[right], suffix[left] + prefix[right])
+
+    def set_free(self, position: int, is_free: bool) -> None:
+        node = self.size + position
+        value = 1 if is_free else 0
+        self.prefix[node] = self.suffix[node] = self.best[node] = value
+        node //= 2
+        while node:
+            self._pull(node)
+            node //= 2
+
+    def longest_run(self) -> int:
+        return self.best[1]
+
+    def find_first(self, length: int) -> int:
+        """Start position of the leftmost run of ``length`` free seats, or -1"""
+        if length <= 0 or self.best[1] < length:
+            return -1
+        node, low, width = 1, 0, self.size
+        while width > 1:
+            half = width // 2
+            left = 2 * node
+            if self.best[left] >= length:
+                node = left
+            elif self.suffix[left] + self.prefix[left + 1] >= length:
+                return low + half - self.suffix[left]
+            else:
+                node = left + 1
+                low += half
+            width = half
+        return low
+
+
+class RowMaxTree:
+    """Max segment tree over the longest free run of each row, in row order"""
+
+    __slots__ = ("size", "values")
+
+    def __init__(self, values: List[int]):
+        size = 1
+        while size < len(values):
+            size *= 2
+        self.size = size
+        self.values = [0] * (2 * size)
+        self.values[size:size + len(values)] = values
+        for node in range(size - 1, 0, -1):
+            self.values[node] = max(self.values[2 * node], self.values[2 * node + 1])
+
+    def update(self, index: int, value: int) -> None:
+        node = self.size + index
+        self.values[node] = value
+        node //= 2
+        while node:
+            self.values[node] = max(self.values[2 * node], self.values[2 * node + 1])
+            node //= 2
+
+    def first_at_least(self, value: int) -> int:
+        """Index of the first row whose longest free run is >= ``value``, or -1"""
+        if self.values[1] < value:
+            return -1
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.values[2 * node] >= value else 2 * node + 1
+        return node - self.size
+
+
+class SeatInventory:
+    """Booked/free state of one show's seats, kept as one bitset per row.
+
+    Bit ``n - 1`` of ``booked[row]`` is set when seat ``n`` of that row is booked,
+    so availability checks are integer operations instead of ORM row scans.
+    """
+
+    def __init__(self, show_id: int, hall_id: int, seats_per_row: Dict[str, int]):
+        self.show_id = show_id
+        self.hall_id = hall_id
+        self.row_sizes: Dict[int, int] = {}
+        for row_name, seat_count in seats_per_row.items():
+            self.row_sizes[parse_row_number(row_name)] = seat_count
+        self.booked: Dict[int, int] = {row: 0 for row in self.row_sizes}
+        # Seats that actually exist for the show (bit set once a seat id is known)
+        self.present: Dict[int, int] = {row: 0 for row in self.row_sizes}
+        self.seat_ids: Dict[int, List[Optional[int]]] = {
+            row: [None] * size for row, size in self.row_sizes.items()
+        }
+        self.positions: Dict[int, Tuple[int, int]] = {}
+        # Free-run index, built on first search and then maintained per booking.
+        # Short-lived inventories can switch it off and use a bitmask scan instead.
+        self.indexed = True
+        self._row_order: List[int] = []
+        self._row_position: Dict[int, int] = {}
+        self._row_trees: Dict[int, FreeRunTree] = {}
+        self._row_index: Optional[RowMaxTree] = None
+        # Seat id part of each compact row (ids never change once loaded), and
+        # each row's encoded states with the booked bits they were encoded from
+        self._compact_ids: Optional[Dict[int, Dict[str, Any]]] = None
+        self._compact_states: Dict[int, Tuple[int, str]] = {}
+        self.loaded_at = time.monotonic()
+        # Layout version the bitsets reflect (a LayoutVersion), when known
+        self.version = None
+        self._lock = threading.Lock()
+
+    def add_seat(self, seat_id: int, row_number: int, seat_number: int, is_booked: bool) -> None:
+        """Register a seat row of the show"""
+        size = self.row_sizes.get(row_number, 0)
+        if seat_number > size:
+            # Layout was edited after the show was created; trust the seats
+            self.row_sizes[row_number] = seat_number
+            self.booked.setdefault(row_number, 0)
+            self.present.setdefault(row_number, 0)
+            ids = self.seat_ids.setdefault(row_number, [])
+            ids.extend([None] * (seat_number - len(ids)))
+        bit = 1 << (seat_number - 1)
+        self.seat_ids[row_number][seat_number - 1] = seat_id
+        self.present[row_number] |= bit
+        if is_booked:
+            self.booked[row_number] |= bit
+        self.positions[seat_id] = (row_number, seat_number)
+        self._row_index = None
+        self._compact_ids = None
+        self._compact_states.clear()
+
+    def _build_index(self) -> RowMaxTree:
+        self._row_order = sorted(self.row_sizes)
+        self._row_position = {row: index for index, row in enumerate(self._row_order)}
+        self._row_trees = {}
+        for row_number in self._row_order:
+            free = self.free_mask(row_number)
+            self._row_trees[row_number] = FreeRunTree(
+                [bool(free >> position & 1) for position in range(self.row_sizes[row_number])]
+            )
+        self._row_index = RowMaxTree(
+            [self._row_trees[row].longest_run() for row in self._row_order]
+        )
+        return self._row_index
+
+    def mark_booked(self, seat_ids: Iterable[int]) -> None:
+        with self._lock:
+            touched_rows = set()
+            for seat_id in seat_ids:
+                position = self.positions.get(seat_id)
+                if position is None:
+                    continue
+                row_number, seat_number = position
+                self.booked[row_number] |= 1 << (seat_number - 1)
+                if self._row_index is not None:
+                    self._row_trees[row_number].set_free(seat_number - 1, False)
+                    touched_rows.add(row_number)
+            for row_number in touched_rows:
+                self._row_index.update(
+                    self._row_position[row_number],
+                    self._row_trees[row_number].longest_run()
+                )
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.monotonic() - self.loaded_at > ttl
+
+    def free_mask(self, row_number: int) -> int:
+        return self.present[row_number] & ~self.booked[row_number]
+
+    def available_count(self) -> int:
+        return sum(bin(self.free_mask(row)).count("1") for row in self.row_sizes)
+
+    def _seat_data(self, row_number: int, seat_number: int) -> Dict[str, Any]:
+        return {
+            "id": self.seat_ids[row_number][seat_number - 1],
+            "row_number": row_number,
+            "seat_number": seat_number,
+            "is_aisle": seat_number <= AISLE_SEATS
+        }
+
+    def layout(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Return (booked_seats, available_seats) in row/seat order"""
+        booked_seats = []
+        available_seats = []
+        for row_number in sorted(self.row_sizes):
+            present = self.present[row_number]
+            booked = self.booked[row_number]
+            for seat_number in range(1, self.row_sizes[row_number] + 1):
+                bit = 1 << (seat_number - 1)
+                if not present & bit:
+                    continue
+                if booked & bit:
+                    booked_seats.append(self._seat_data(row_number, seat_number))
+                else:
+                    available_seats.append(self._seat_data(row_number, seat_number))
+        return booked_seats, available_seats
+
+    def compact_rows(self) -> List[Dict[str, Any]]:
+        """Rows in the compact layout format, in row order.
+
+        ``seats`` run-length encodes one state letter per seat position. Seat n
+        has id ``first_seat_id + n - 1``, unless the row lists ``seat_ids``
+        explicitly because its ids are not consecutive.
+        """
+        compact_ids = self._compact_ids or self._build_compact_ids()
+        rows = []
+        for row_number in sorted(self.row_sizes):
+            booked = self.booked[row_number]
+            cached = self._compact_states.get(row_number)
+            if cached is not None and cached[0] == booked:
+                seats = cached[1]
+            else:
+                # Only rows booked into since the last call are encoded again
+                seats = self._encode_row(row_number, booked)
+                self._compact_states[row_number] = (booked, seats)
+            rows.append({"row_number": row_number, **compact_ids[row_number], "seats": seats})
+        return rows
+
+    def _encode_row(self, row_number: int, booked: int) -> str:
+        size = self.row_sizes[row_number]
+        present = self.present[row_number]
+        # Bit strings are most significant first; seat 1 is the lowest bit
+        states = format(booked, f"0{size}b")[::-1].translate(_BOOKED_BIT_STATES)
+        if present != (1 << size) - 1:
+            states = "".join(state if bit == "1" else COMPACT_NO_SEAT
+                             for state, bit in zip(states, format(present, f"0{size}b")[::-1]))
+        return run_length(states)
+
+    def _build_compact_ids(self) -> Dict[int, Dict[str, Any]]:
+        compact_ids = {}
+        for row_number, ids in self.seat_ids.items():
+            row = {"first_seat_id": None}
+            if self.present[row_number]:
+                first = next(n for n, seat_id in enumerate(ids) if seat_id is not None)
+                base = ids[first] - first
+                row["first_seat_id"] = base
+                if any(seat_id is not None and seat_id != base + n for n, seat_id in enumerate(ids)):
+                    row["seat_ids"] = list(ids)
+            compact_ids[row_number] = row
+        self._compact_ids = compact_ids
+        return compact_ids
+
+    def longest_run(self) -> int:
+        """Largest number of adjacent free seats anywhere in the hall"""
+        with self._lock:
+            row_index = self._row_index or self._build_index()
+            return row_index.values[1]
+
+    def _scan_consecutive(self, num_seats: int) -> Tuple[Optional[int], int]:
+        for row_number in sorted(self.row_sizes):
+            free = self.free_mask(row_number)
+            # Bit i survives only if seats i .. i + num_seats - 1 are all free
+            window = free
+            for shift in range(1, num_seats):
+                window &= free >> shift
+                if not window:
+                    break
+            if window:
+                return row_number, (window & -window).bit_length()
+        return None, 0
+
+    def find_consecutive(self, num_seats: int) -> List[Dict[str, Any]]:
+        """First block of ``num_seats`` adjacent free seats, scanning rows in order"""
+        if not self.indexed:
+            row_number, start = self._scan_consecutive(num_seats)
+            if row_number is None:
+                return []
+            return [
+                self._seat_data(row_number, seat_number)
+                for seat_number in range(start, start + num_seats)
+            ]
+        with self._lock:
+            row_index = self._row_index or self._build_index()
+            row_position = row_index.first_at_least(num_seats)
+            if row_position < 0:
+                return []
+            row_number = self._row_order[row_position]
+            start = self._row_trees[row_number].find_first(num_seats) + 1
+        return [
+            self._seat_data(row_number, seat_number)
+            for seat_number in range(start, start + num_seats)
+        ]
+
+
+class SeatInventoryRegistry:
+    """Process-wide LRU of show inventories"""
+
+    def __init__(self, max_shows: int = INVENTORY_MAX_SHOWS, ttl: float = INVENTORY_TTL_SECONDS):
+        self.max_shows = max_shows
+        self.ttl = ttl
+        self._inventories: "OrderedDict[int, SeatInventory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, show_id: int) -> Optional[SeatInventory]:
+        with self._lock:
+            inventory = self._inventories.get(show_id)
+            if inventory is None:
+                return None
+            if inventory.is_expired(self.ttl):
+                del self._inventories[show_id]
+                return None
+            self._inventories.move_to_end(show_id)
+            return inventory
+
+    def get_or_load(self, show_id: int,
+                    loader: Callable[[int], Optional[SeatInventory]]) -> Optional[SeatInventory]:
+        inventory = self.get(show_id)
+        if inventory is None:
+            inventory = loader(show_id)
+            if inventory is not None:
+                self.put(inventory)
+        return inventory
+
+    def put(self, inventory: SeatInventory) -> None:
+        with self._lock:
+            self._inventories[inventory.show_id] = inventory
+            self._inventories.move_to_end(inventory.show_id)
+            while len(self._inventories) > self.max_shows:
+                self._inventories.popitem(last=False)
+
+    def mark_booked(self, show_id: int, seat_ids: Iterable[int], show_version: Optional[int] = None) -> None:
+        """Apply a committed booking; ``show_version`` is the show version it produced"""
+        inventory = self.get(show_id)
+        if inventory is not None:
+            inventory.mark_booked(seat_ids)
+            version = inventory.version
+            if version is not None:
+                # Only a direct successor is known to be reflected in the bitsets;
+                # otherwise the next versioned read reloads the show
+                in_step = show_version is not None and show_version == version.show + 1
+                inventory.version = version._replace(show=show_version) if in_step else None
+
+    def invalidate(self, show_id: int) -> None:
+        with self._lock:
+            self._inventories.pop(show_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._inventories.clear()
+
+
+seat_inventory = SeatInventoryRegistry()
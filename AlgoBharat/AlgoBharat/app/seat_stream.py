@@ -0,0 +1,220 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import json
+import os
+import threading
+
+from .layout_cache import LayoutVersion
+
+# Live seat maps over server-sent events. Each process keeps one feed per
+# (show, hall) however many clients watch it: the feed reads the layout once,
+# then re-reads it only when the show's layout version moves, and pushes the
+# difference to every subscriber as one pre-encoded message.
+#
+#   event: layout   the full hall layout (first message, and after the seat
+#                   set itself changes: hall edits, seat mode conversions)
+#   event: seats    {"booked": [...], "released": [...], "version": ...}
+#
+# Bookings committed by this process wake their feeds at once; changes made by
+# other processes are noticed by polling the version every
+# SEAT_STREAM_POLL_SECONDS (a Redis GET per show, not a database read).
+SEAT_STREAM_POLL_SECONDS = float(os.getenv("SEAT_STREAM_POLL_SECONDS", 1))
+# Messages a subscriber may fall behind by before it is disconnected (its
+# EventSource reconnects and starts again from a fresh layout)
+SEAT_STREAM_QUEUE_SIZE = int(os.getenv("SEAT_STREAM_QUEUE_SIZE", 64))
+# Idle feeds send their subscribers a comment about this often (checked once
+# per poll) so proxies keep the streams open
+SEAT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("SEAT_STREAM_HEARTBEAT_SECONDS", 15))
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+HEARTBEAT = b": keep-alive\n\n"
+
+LayoutLoader = Callable[[Optional[LayoutVersion]], Awaitable[Dict[str, Any]]]
+VersionSource = Callable[[], Awaitable[Optional[LayoutVersion]]]
+VersionStarter = Callable[[], Awaitable[None]]
+
+
+def encode_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def _seat_ids(seats: List[Dict[str, Any]]) -> Set[int]:
+    return {seat["id"] for seat in seats}
+
+
+class Subscription:
+    """One client's queue of encoded events; iterate ``events()`` to stream them"""
+
+    def __init__(self, feed: "ShowFeed"):
+        self.feed = feed
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(SEAT_STREAM_QUEUE_SIZE)
+
+    def send(self, message: bytes) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream rather than buffer for it
+            self.close()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def close(self) -> None:
+        self.feed.remove(self)
+
+    async def events(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.close()
+
+
+class ShowFeed:
+    """The single reader of one show's layout in this process"""
+
+    def __init__(self, hub: "SeatStreamHub", show_id: int, hall_id: int,
+                 load: LayoutLoader, current_version: VersionSource, start_version: VersionStarter):
+        self.hub = hub
+        self.show_id = show_id
+        self.hall_id = hall_id
+        self.load = load
+        self.current_version = current_version
+        self.start_version = start_version
+        self.loop = asyncio.get_running_loop()
+        self.subscribers: Set[Subscription] = set()
+        self.loaded: "asyncio.Future[None]" = self.loop.create_future()
+        self.changed = asyncio.Event()
+        self.version: Optional[LayoutVersion] = None
+        self.booked: Set[int] = set()
+        self.seats: Set[int] = set()
+        self.layout: Optional[Dict[str, Any]] = None
+        self._snapshot: Optional[bytes] = None
+        self.reads = 0
+        self.last_sent = self.loop.time()
+        self.task = self.loop.create_task(self.run())
+
+    def add(self, subscription: Subscription) -> None:
+        self.subscribers.add(subscription)
+        if self.layout is not None:
+            subscription.send(self.snapshot())
+
+    def remove(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+        if not self.subscribers and not self.task.done():
+            self.task.cancel()
+            self.hub.discard(self)
+
+    def snapshot(self) -> bytes:
+        # Encoded when a client joins, not on every change
+        if self._snapshot is None:
+            self._snapshot = encode_event("layout", self.layout)
+        return self._snapshot
+
+    def broadcast(self, message: bytes) -> None:
+        self.last_sent = self.loop.time()
+        for subscription in list(self.subscribers):
+            subscription.send(message)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                if not self.loaded.done():
+                    self.hub.discard(self)
+                    self.loaded.set_exception(e)
+                    return
+                # Keep streaming the last known state; the next poll tries again
+            try:
+                await asyncio.wait_for(self.changed.wait(), SEAT_STREAM_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                # Heartbeats come from the feed so subscribers need no timer of their own
+                if self.loop.time() - self.last_sent >= SEAT_STREAM_HEARTBEAT_SECONDS:
+                    self.broadcast(HEARTBEAT)
+            self.changed.clear()
+
+    async def refresh(self) -> None:
+        version = await self.current_version()
+        if self.loaded.done() and version is not None and version == self.version:
+            return
+        layout = await self.load(version)
+        self.reads += 1
+        self.version = version
+        booked = _seat_ids(layout["booked_seats"])
+        seats = booked | _seat_ids(layout["available_seats"])
+        if version is None and seats:
+            # The show exists in this hall: start its versions so polls compare
+            # them instead of reloading (the next poll reloads once, at a version)
+            await self.start_version()
+        previous, self.booked = self.booked, booked
+        self.layout, self._snapshot = layout, None
+        if not self.loaded.done() or seats != self.seats:
+            self.seats = seats
+            self.broadcast(self.snapshot())
+            if not self.loaded.done():
+                self.loaded.set_result(None)
+            return
+        added, released = sorted(booked - previous), sorted(previous - booked)
+        if not added and not released:
+            return
+        self.broadcast(encode_event("seats", {
+            "booked": added, "released": released, "version": version.etag if version else None
+        }))
+
+
+class SeatStreamHub:
+    """Per-process registry of show feeds"""
+
+    def __init__(self):
+        # show id -> hall id -> feed (a hall id other than the show's gets an empty layout)
+        self._feeds: Dict[int, Dict[int, ShowFeed]] = {}
+        self._lock = threading.Lock()
+
+    async def subscribe(self, show_id: int, hall_id: int, load: LayoutLoader,
+                        current_version: VersionSource, start_version: VersionStarter) -> Subscription:
+        """Join (or start) the show's feed; raises what the first layout read raised"""
+        with self._lock:
+            feeds = self._feeds.setdefault(show_id, {})
+            feed = feeds.get(hall_id)
+            if feed is None or feed.loop is not asyncio.get_running_loop():
+                feed = ShowFeed(self, show_id, hall_id, load, current_version, start_version)
+                feeds[hall_id] = feed
+        subscription = Subscription(feed)
+        feed.add(subscription)
+        try:
+            await asyncio.shield(feed.loaded)
+        except BaseException:
+            subscription.close()
+            raise
+        return subscription
+
+    def discard(self, feed: ShowFeed) -> None:
+        with self._lock:
+            feeds = self._feeds.get(feed.show_id, {})
+            if feeds.get(feed.hall_id) is feed:
+                del feeds[feed.hall_id]
+                if not feeds:
+                    del self._feeds[feed.show_id]
+
+    def notify(self, show_id: int) -> None:
+        """A booking for the show committed; callable from any thread"""
+        with self._lock:
+            feeds = list(self._feeds.get(show_id, {}).values())
+        for feed in feeds:
+            try:
+                feed.loop.call_soon_threadsafe(feed.changed.set)
+            except RuntimeError:
+                # Its event loop has shut down
+                self.discard(feed)
+
+    def feeds(self) -> List[ShowFeed]:
+        with self._lock:
+            return [feed for feeds in self._feeds.values() for feed in feeds.values()]
+
+
+seat_streams = SeatStreamHub()
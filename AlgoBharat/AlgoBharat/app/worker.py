@@ -0,0 +1,76 @@
+from datetime import timedelta
+import os
+import socket
+
+from celery import Celery
+
+from . import consumers  # noqa: F401  (registers the consumers)
+from .database import SessionLocal
+from .outbox import (
+    OUTBOX_RELAY_BATCH, Event, create_event_stream, dispatch_events, get_consumer, prune_outbox, relay_outbox
+)
+from .services import redis_client
+
+# Celery worker running the outbox relay and the booking event consumers:
+#
+#   celery -A app.worker worker --beat --loglevel=info
+#
+# Beat schedules the relay every OUTBOX_RELAY_INTERVAL_SECONDS; with several
+# worker processes run beat once (celery -A app.worker beat) instead.
+CELERY_BROKER_URL = os.getenv(
+    "CELERY_BROKER_URL", f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}/1"
+)
+OUTBOX_RELAY_INTERVAL_SECONDS = float(os.getenv("OUTBOX_RELAY_INTERVAL_SECONDS", 1))
+# Attempts at a failing consumer (with exponential backoff) before its event is dropped
+CONSUMER_MAX_RETRIES = int(os.getenv("CONSUMER_MAX_RETRIES", 5))
+
+celery_app = Celery("algobharat", broker=CELERY_BROKER_URL)
+celery_app.conf.update(
+    task_ignore_result=True,
+    beat_schedule={
+        "relay-outbox": {"task": "outbox.pump", "schedule": OUTBOX_RELAY_INTERVAL_SECONDS},
+        "prune-outbox": {"task": "outbox.prune", "schedule": timedelta(hours=1)},
+    },
+)
+
+# Where the relay publishes events (OUTBOX_BACKEND)
+event_stream = create_event_stream(redis_client)
+
+
+def reader_name() -> str:
+    # Per process: prefork children each read for themselves
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@celery_app.task(name="outbox.pump")
+def pump_outbox() -> int:
+    """Relay the outbox to the event stream, then queue one consumer task per
+    event and consumer; returns events read from the stream"""
+    db = SessionLocal()
+    try:
+        relay_outbox(db, event_stream)
+    finally:
+        db.close()
+    read = 0
+    while True:
+        batch = dispatch_events(event_stream, lambda name, event: run_consumer.delay(name, event), reader_name())
+        read += batch
+        if batch < OUTBOX_RELAY_BATCH:
+            return read
+
+
+@celery_app.task(name="outbox.consume", autoretry_for=(Exception,), retry_backoff=True,
+                 max_retries=CONSUMER_MAX_RETRIES)
+def run_consumer(name: str, event: Event) -> None:
+    get_consumer(name)(event)
+
+
+@celery_app.task(name="outbox.prune")
+def prune_published_events() -> int:
+    db = SessionLocal()
+    try:
+        deleted = prune_outbox(db)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
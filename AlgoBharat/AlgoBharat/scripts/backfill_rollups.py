@@ -0,0 +1,59 @@
+"""
+Analytics Rollup Backfill Script for AlgoBharat Movie Ticket Booking System
+Rebuilds the daily movie/theater/hall/show rollups that the analytics
+endpoints read, from the bookings and seats tables.
+
+Run `alembic upgrade head` first so the rollup tables exist.
+
+Usage:
+    python scripts/backfill_rollups.py                    # rebuild every day
+    python scripts/backfill_rollups.py --since 2026-10-01 # rebuild from this day on
+
+New bookings update the rollups as they are made, so this is only needed
+once after upgrading, or to repair days after editing bookings by hand.
+Run it while bookings are paused: a booking committed while its day is being
+rebuilt can be miscounted.
+"""
+
+import argparse
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.models import DailyMovieStats
+from app.rollups import rebuild_rollups
+from app.services import dashboard_buckets
+
+
+def backfill(since=None):
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, since)
+        db.commit()
+        days = db.query(DailyMovieStats.day).distinct().count()
+        print(f"Rebuilt rollups {'from ' + since.isoformat() if since else 'for all days'} "
+              f"({days} days with bookings)")
+    except Exception as e:
+        print(f"Error rebuilding rollups: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # Running API processes re-read the rebuilt months instead of serving cached sums
+    try:
+        dashboard_buckets.invalidate()
+    except Exception as e:
+        print(f"Could not invalidate cached dashboard months ({e}); "
+              f"they expire after DASHBOARD_BUCKET_TTL_SECONDS")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily analytics rollups from bookings")
+    parser.add_argument("--since", type=date.fromisoformat,
+                        help="Only rebuild days from this date (YYYY-MM-DD) on")
+    args = parser.parse_args()
+    backfill(args.since)
@@ -0,0 +1,152 @@
+"""
+Benchmark: statements issued and latency of the movie and theater analytics
+over a synthetic month of bookings.
+
+Compares three ways of answering the same request:
+  per-booking  load the period's bookings and count ``len(booking.seats)`` for
+               each one (one lazy seat query per booking; how analytics used to
+               be computed)
+  live         AnalyticsService with source=live: one set-based aggregate over
+               bookings joined to seats
+  rollup       AnalyticsService with source=rollup: sums over the daily rollups
+
+Usage: python scripts/benchmarks/analytics.py [bookings]
+Defaults to 20,000 bookings over 30 days in in-memory SQLite; set
+BENCHMARK_DATABASE_URL to use a scratch PostgreSQL database instead.
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from common import make_session_factory, create_catalog, report
+
+from app import services
+from app.cache import CatalogCache
+from app.models import Booking, Hall, Seat, Show
+from app.rollups import rebuild_rollups
+from app.services import AnalyticsService, ANALYTICS_SOURCE_LIVE, ANALYTICS_SOURCE_ROLLUP
+
+DAYS = 30
+HALLS = 3
+SHOWS_PER_HALL_PER_DAY = 4
+REPEATS = 5
+START = datetime(2024, 1, 1)
+
+
+def fill_month(db, count, movie, theater, hall):
+    rng = random.Random(42)
+    halls = [hall] + [Hall(theater_id=theater.id, name=f"Hall {n}", total_rows=hall.total_rows,
+                           seats_per_row=hall.seats_per_row) for n in range(2, HALLS + 1)]
+    db.add_all(halls[1:])
+    db.flush()
+    shows = [
+        Show(movie_id=movie.id, theater_id=theater.id, hall_id=h.id, price=10.0, seat_mode="virtual",
+             show_time=START + timedelta(days=day, hours=10 + 3 * slot))
+        for day in range(DAYS) for h in halls for slot in range(SHOWS_PER_HALL_PER_DAY)
+    ]
+    db.add_all(shows)
+    db.commit()
+
+    row_width = hall.seats_per_row["row1"]
+    next_seat = {show.id: 0 for show in shows}
+    bookings, seats = [], []
+    for booking_id in range(1, count + 1):
+        show = rng.choice(shows)
+        tickets = rng.randint(1, 4)
+        bookings.append({
+            "id": booking_id, "user_id": rng.randint(1, 5000), "show_id": show.id,
+            "booking_reference": f"BM{booking_id:08d}", "total_amount": 10.0 * tickets,
+            "booking_status": "confirmed",
+            "booking_time": max(START, show.show_time - timedelta(minutes=rng.randint(0, 2 * 24 * 60)))
+        })
+        for _ in range(tickets):
+            position = next_seat[show.id]
+            next_seat[show.id] += 1
+            seats.append({"show_id": show.id, "hall_id": show.hall_id, "row_number": position // row_width + 1,
+                          "seat_number": position % row_width + 1, "is_booked": True,
+                          "booking_id": booking_id})
+    db.execute(insert(Booking), bookings)
+    db.execute(insert(Seat), seats)
+    rebuild_rollups(db)
+    db.commit()
+    return len(seats)
+
+
+def per_booking_movie_analytics(db, movie_id, start_date, end_date):
+    bookings = db.query(Booking).join(Show).filter(
+        Show.movie_id == movie_id, Booking.booking_time >= start_date, Booking.booking_time <= end_date
+    ).all()
+    return len(bookings), sum(len(booking.seats) for booking in bookings)
+
+
+def per_booking_theater_analytics(db, theater_id, start_date, end_date):
+    bookings = db.query(Booking).join(Show).filter(
+        Show.theater_id == theater_id, Booking.booking_time >= start_date, Booking.booking_time <= end_date
+    ).all()
+    halls = {}
+    for booking in bookings:
+        halls.setdefault(booking.show.hall_id, []).append(len(booking.seats))
+    return len(bookings), sum(map(sum, halls.values()))
+
+
+def measure(engine, db, func, repeats):
+    """Statements issued by one cold call, and the best latency of ``repeats`` cold calls"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    timings = []
+    for attempt in range(repeats):
+        db.expire_all()
+        if attempt == 0:
+            event.listen(engine, "before_cursor_execute", listener)
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        if attempt == 0:
+            event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements), min(timings)
+
+
+def main(count: int = 20_000):
+    # Lookups hit the database every time, like a cold cache
+    services.catalog_cache = CatalogCache(enabled=False)
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        movie, theater, hall = create_catalog(db)
+        started = time.perf_counter()
+        tickets = fill_month(db, count, movie, theater, hall)
+        print(f"Inserted {count} bookings ({tickets} tickets) over {DAYS} days "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        movie_id, theater_id = movie.id, theater.id
+        period = (START, START + timedelta(days=DAYS) - timedelta(microseconds=1))
+        cases = [
+            ("movie   per-booking", lambda: per_booking_movie_analytics(db, movie_id, *period)),
+            ("movie   live", lambda: AnalyticsService.get_movie_analytics(
+                db, movie_id, *period, ANALYTICS_SOURCE_LIVE)),
+            ("movie   rollup", lambda: AnalyticsService.get_movie_analytics(
+                db, movie_id, *period, ANALYTICS_SOURCE_ROLLUP)),
+            ("theater per-booking", lambda: per_booking_theater_analytics(db, theater_id, *period)),
+            ("theater live", lambda: AnalyticsService.get_theater_analytics(
+                db, theater_id, *period, ANALYTICS_SOURCE_LIVE)),
+            ("theater rollup", lambda: AnalyticsService.get_theater_analytics(
+                db, theater_id, *period, ANALYTICS_SOURCE_ROLLUP)),
+        ]
+        for label, func in cases:
+            # The per-booking baseline takes seconds per call; once is enough
+            repeats = 1 if "per-booking" in label else REPEATS
+            result, statements, seconds = measure(engine, db, func, repeats)
+            totals = result if isinstance(result, tuple) else (result["total_bookings"], result["total_tickets"])
+            assert totals == (count, tickets), (label, totals)
+            report(f"{label:<20} {statements:>6} statements", seconds)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
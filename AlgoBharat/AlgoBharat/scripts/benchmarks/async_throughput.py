@@ -0,0 +1,139 @@
+"""
+Benchmark: requests/second and latency of the sync routers (threadpool) versus
+the async routers (ASYNC_MODE=1) under many concurrent connections.
+
+Each mode starts its own uvicorn server on a scratch database, seeds one show,
+and then keeps ``connections`` clients busy with a read-heavy mix (show
+details, hall layout, movie list, one booking in ten) for ``seconds``.
+Errors are 5xx responses and client timeouts. With more connections than the
+sync threadpool has workers, the sync routers can starve the database pool
+(workers waiting for a connection hold the threads that would release one).
+
+Usage: python scripts/benchmarks/async_throughput.py [connections] [seconds]
+Uses a temporary SQLite file by default; set BENCHMARK_DATABASE_URL to a
+scratch PostgreSQL database to compare there. Seat locks are in-process.
+"""
+
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PORT = 8765
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def start_server(async_mode, database_url):
+    env = dict(os.environ, ASYNC_MODE="1" if async_mode else "0", DATABASE_URL=database_url,
+               SEAT_LOCK_BACKEND="local")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def seed(client):
+    movie_id = client.post("/api/v1/movies/", json={
+        "title": "Benchmark Movie", "duration_minutes": 120, "price": 10.0
+    }).json()["id"]
+    theater_id = client.post("/api/v1/theaters/", json={
+        "name": "Benchmark Theater", "address": "1 Bench Street", "city": "Bench City"
+    }).json()["id"]
+    hall_id = client.post(f"/api/v1/theaters/{theater_id}/halls", json={
+        "name": "Hall", "total_rows": 40, "seats_per_row": {f"row{row}": 25 for row in range(1, 41)}
+    }).json()["id"]
+    show_id = client.post("/api/v1/shows/", json={
+        "movie_id": movie_id, "theater_id": theater_id, "hall_id": hall_id,
+        "show_time": "2030-01-01T18:00:00", "price": 10.0
+    }).json()["id"]
+    layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show_id}").json()
+    return show_id, hall_id, [seat["id"] for seat in layout["available_seats"]]
+
+
+async def load(connections, seconds, show_id, hall_id, seat_ids):
+    latencies, errors = [], 0
+    free_seats = list(seat_ids)
+    random.Random(5).shuffle(free_seats)
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=connections)
+
+    async def client_loop(client, seed_value):
+        nonlocal errors
+        rng = random.Random(seed_value)
+        while time.monotonic() < deadline:
+            pick = rng.random()
+            started = time.perf_counter()
+            try:
+                if pick < 0.1 and free_seats:
+                    response = await client.post("/api/v1/bookings/", json={
+                        "user_id": seed_value, "show_id": show_id, "seat_ids": [free_seats.pop()]
+                    })
+                elif pick < 0.5:
+                    response = await client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show_id}")
+                elif pick < 0.8:
+                    response = await client.get(f"/api/v1/shows/{show_id}")
+                else:
+                    response = await client.get("/api/v1/movies/")
+                failed = response.status_code >= 500
+            except httpx.TimeoutException:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        await asyncio.gather(*[client_loop(client, index) for index in range(connections)])
+    return latencies, errors
+
+
+def run(label, async_mode, connections, seconds):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    server = start_server(async_mode, database_url)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}") as client:
+            show_id, hall_id, seat_ids = seed(client)
+        latencies, errors = asyncio.run(load(connections, seconds, show_id, hall_id, seat_ids))
+    finally:
+        server.terminate()
+        server.wait()
+        if path:
+            os.remove(path)
+    print(f"{label:<8}{len(latencies) / seconds:>10.1f}{percentile(latencies, 0.5):>10.2f}ms"
+          f"{percentile(latencies, 0.99):>10.2f}ms{errors:>8}")
+
+
+def main(connections: int = 200, seconds: float = 10):
+    print(f"{connections} concurrent connections for {seconds:g}s, read-heavy mix")
+    print(f"{'mode':<8}{'req/s':>10}{'p50':>12}{'p99':>12}{'errors':>8}")
+    run("sync", False, connections, seconds)
+    run("async", True, connections, seconds)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 10)
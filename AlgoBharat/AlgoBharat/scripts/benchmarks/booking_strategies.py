@@ -0,0 +1,128 @@
+"""
+Benchmark: the locked booking strategy (per-seat locks, SELECT, ORM updates)
+versus the optimistic one (a single conditional UPDATE ... RETURNING, no lock).
+
+Worker threads keep booking random pairs of adjacent seats on one hot show
+until it sells out. Reports bookings/second, p50/p99 latency of successful
+bookings, rejected requests and oversold seats for each strategy.
+
+Usage: python scripts/benchmarks/booking_strategies.py [threads]
+Runs on a temporary SQLite file by default; point BENCHMARK_DATABASE_URL at a
+scratch PostgreSQL database to compare there. Locks use the in-process
+stand-in; set BENCHMARK_REDIS=1 to use the Redis server configured by
+REDIS_HOST/REDIS_PORT instead.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+
+from common import make_session_factory, create_catalog, show_times
+
+from app import services
+from app.exceptions import SeatAlreadyBookedException, InsufficientSeatsException
+from app.locks import LocalSeatLocks, RedisSeatLocks
+from app.models import Show, Seat, Booking
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_inventory
+from app.services import BookingService, SeatService, BOOKING_STRATEGY_LOCKED, BOOKING_STRATEGY_OPTIMISTIC
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def run(strategy, threads):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    engine, SessionLocal = make_session_factory(database_url)
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)
+    show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                show_time=show_times(1)[0], price=10.0)
+    db.add(show)
+    db.flush()
+    SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+    seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+    show_id = show.id
+    db.close()
+
+    seat_inventory.clear()
+    outcomes = {"booked": 0, "lock_rejected": 0, "unavailable": 0}
+    latencies = []
+    outcome_lock = threading.Lock()
+    sold_out = threading.Event()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        session = SessionLocal()
+        misses = 0
+        while not sold_out.is_set():
+            start = rng.randrange(len(seat_ids) - 1)
+            request = BookingCreate(user_id=seed, show_id=show_id, seat_ids=seat_ids[start:start + 2])
+            started = time.perf_counter()
+            try:
+                BookingService.create_booking(session, request, strategy=strategy)
+                result, misses = "booked", 0
+            except SeatAlreadyBookedException:
+                result = "lock_rejected"
+            except InsufficientSeatsException:
+                session.rollback()
+                result = "unavailable"
+                misses += 1
+                if misses > 200:
+                    sold_out.set()
+            elapsed = time.perf_counter() - started
+            with outcome_lock:
+                outcomes[result] += 1
+                if result == "booked":
+                    latencies.append(elapsed)
+        session.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    tickets_sold = int(db.query(func.sum(Booking.total_amount)).scalar() or 0) // 10
+    seats_booked = db.query(Seat).filter(Seat.show_id == show_id, Seat.is_booked == True).count()
+    db.close()
+    engine.dispose()
+    if path:
+        os.remove(path)
+
+    print(f"{strategy:<12}{outcomes['booked'] / elapsed:>10.1f}{percentile(latencies, 0.5):>9.2f}ms"
+          f"{percentile(latencies, 0.99):>9.2f}ms{outcomes['lock_rejected']:>10}"
+          f"{outcomes['unavailable']:>12}{tickets_sold - seats_booked:>10}")
+
+
+def main(threads: int = 16):
+    if os.getenv("BENCHMARK_REDIS") == "1":
+        services.seat_locks = RedisSeatLocks(services.redis_client)
+    else:
+        services.seat_locks = LocalSeatLocks()
+    print(f"400-seat hot show, {threads} threads booking adjacent pairs")
+    print(f"{'strategy':<12}{'booked/s':>10}{'p50':>11}{'p99':>11}{'lock-rej':>10}{'unavailable':>12}{'oversold':>10}")
+    run(BOOKING_STRATEGY_LOCKED, threads)
+    run(BOOKING_STRATEGY_OPTIMISTIC, threads)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
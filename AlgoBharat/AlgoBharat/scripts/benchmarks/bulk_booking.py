@@ -0,0 +1,106 @@
+"""
+Benchmark: booking seats in several shows at once, as one bulk booking
+(POST /bookings/bulk) versus one single booking per show in sequence.
+
+  sequential  BookingService.create_booking once per show: a lock round trip,
+              an insert, a seat update and a commit each
+  bulk        BookingService.create_bulk_booking: every show locked in id
+              order, one insert of all bookings, one seat update and one
+              commit for the whole request
+
+Each request books 2 seats in each of N shows (materialized seats) from a
+fresh session, as the API does, with the catalog cache warm. Throughput is
+requests per second; statements and commits are counted per request. On
+SQLite the ORM inserts the bookings and outbox events one row at a time
+(it cannot keep RETURNING in parameter order there); on PostgreSQL each is
+one batched statement.
+
+Usage: python scripts/benchmarks/bulk_booking.py [requests]
+"""
+
+import sys
+
+from sqlalchemy import event
+
+from common import make_session_factory, create_catalog, show_times, timed, report
+
+from app import services
+from app.cache import CatalogCache
+from app.locks import LocalSeatLocks
+from app.models import Seat, Show
+from app.schemas import BookingCreate, BulkBookingCreate
+from app.services import BookingService, SeatService
+
+SHOW_COUNTS = (2, 5, 10)
+SEATS_PER_SHOW = 2
+
+
+def counted(engine, func):
+    counts = {"statements": 0, "commits": 0}
+    on_statement = lambda *args: counts.__setitem__("statements", counts["statements"] + 1)
+    on_commit = lambda *args: counts.__setitem__("commits", counts["commits"] + 1)
+    event.listen(engine, "before_cursor_execute", on_statement)
+    event.listen(engine, "commit", on_commit)
+    func()
+    event.remove(engine, "before_cursor_execute", on_statement)
+    event.remove(engine, "commit", on_commit)
+    return counts
+
+
+def main(requests: int = 200):
+    engine, SessionLocal = make_session_factory()
+    services.catalog_cache = CatalogCache()
+    services.seat_locks = LocalSeatLocks()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=40, seats=25)
+    shows = [Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id, show_time=show_time, price=10.0)
+             for show_time in show_times(2 * max(SHOW_COUNTS))]
+    db.add_all(shows)
+    db.flush()
+    for show in shows:
+        SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+    free = {show.id: [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+            for show in shows}
+    show_ids = list(free)
+    db.close()
+
+    def take(show_id):
+        seat_ids, free[show_id] = free[show_id][:SEATS_PER_SHOW], free[show_id][SEATS_PER_SHOW:]
+        return seat_ids
+
+    print(f"{requests} requests of {SEATS_PER_SHOW} seats per show")
+    for count in SHOW_COUNTS:
+        sequential_shows, bulk_shows = show_ids[:count], show_ids[count:2 * count]
+
+        def sequential():
+            with SessionLocal() as db:
+                for show_id in sequential_shows:
+                    BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show_id,
+                                                                    seat_ids=take(show_id)))
+
+        def bulk():
+            with SessionLocal() as db:
+                BookingService.create_bulk_booking(db, BulkBookingCreate(user_id=1, items=[
+                    {"show_id": show_id, "seat_ids": take(show_id)} for show_id in bulk_shows
+                ]))
+
+        for label, func in (("sequential", sequential), ("bulk", bulk)):
+            seconds = timed(func, requests - 1)
+            counts = counted(engine, func)
+            report(f"{count:>2} shows, {label} ({counts['statements']} statements, "
+                   f"{counts['commits']} commits)", seconds)
+            print(f"{'':<45} {1 / seconds:10.0f} req/s")
+        # Free every seat again for the next show count
+        with SessionLocal() as db:
+            db.query(Seat).update({Seat.is_booked: False, Seat.booking_id: None})
+            db.commit()
+            free.update({show_id: [seat_id for (seat_id,) in
+                                   db.query(Seat.id).filter(Seat.show_id == show_id).order_by(Seat.id)]
+                         for show_id in show_ids})
+        services.seat_inventory.clear()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,79 @@
+"""
+Benchmark: database queries per request with and without the catalog cache
+for the booking, hall layout, group-booking fallback and suggestion paths.
+
+Each path runs ``iterations`` times in a fresh session (as a request would),
+with the seat inventory cache warm so only catalog lookups differ.
+
+Usage: python scripts/benchmarks/catalog_cache.py [iterations]
+The cache runs L1-only here; L2 (Redis) hits cost a Redis round trip instead
+of a database query.
+"""
+
+import sys
+import time
+
+from sqlalchemy import event
+
+from common import make_session_factory, create_catalog, show_times, report
+
+from app import services
+from app.cache import CatalogCache
+from app.locks import LocalSeatLocks
+from app.models import Show, Seat
+from app.schemas import BookingCreate
+from app.services import BookingService, SeatService, ShowService
+
+
+def main(iterations: int = 200):
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)
+    show_ids = []
+    for show_time in show_times(20):
+        show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                    show_time=show_time, price=12.0)
+        db.add(show)
+        db.flush()
+        SeatService.create_seats_for_show(db, show.id, hall)
+        show_ids.append(show.id)
+    db.commit()
+    free_seats = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show_ids[0]).order_by(Seat.id)]
+    hall_id, movie_id = hall.id, movie.id
+    db.close()
+    services.seat_locks = LocalSeatLocks()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    def request(func):
+        session = SessionLocal()
+        try:
+            func(session)
+        finally:
+            session.close()
+
+    paths = [
+        ("booking", lambda session: BookingService.create_booking(
+            session, BookingCreate(user_id=1, show_id=show_ids[0], seat_ids=[free_seats.pop()]))),
+        ("hall layout", lambda session: SeatService.get_hall_layout(session, hall_id, show_ids[1])),
+        ("group fallback", lambda session: SeatService.suggest_alternative_shows(
+            session, ShowService.get_show(session, show_ids[2]).movie_id, 4)),
+        ("suggestions", lambda session: SeatService.suggest_alternative_shows(session, movie_id, 4)),
+    ]
+
+    print(f"{iterations} requests per path, warm seat inventories")
+    for label, cache in (("no cache", CatalogCache(enabled=False)), ("L1 cache", CatalogCache())):
+        services.catalog_cache = cache
+        for name, func in paths:
+            request(func)  # warm inventories and (when enabled) the catalog cache
+            statements.clear()
+            started = time.perf_counter()
+            for _ in range(iterations):
+                request(func)
+            elapsed = (time.perf_counter() - started) / iterations
+            report(f"{label}: {name} ({len(statements) / iterations:.1f} queries)", elapsed)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
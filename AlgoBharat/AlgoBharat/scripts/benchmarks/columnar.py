@@ -0,0 +1,127 @@
+"""
+Benchmark: ad-hoc analytics over a quarter, SQL on the OLTP tables vs
+vectorized aggregation over the columnar snapshot (app/columnar.py).
+
+A year of bookings is generated (no seat rows, so tickets are all zero; the
+SQL side therefore only aggregates bookings and GMV). Each query groups one
+quarter of them by hour of day, by movie genre and by theater city.
+
+  sql       GROUP BY on bookings joined to shows/movies/theaters
+  columnar  ColumnarSnapshot.aggregate over memory-mapped day partitions
+
+Usage: python scripts/benchmarks/columnar.py [bookings]
+Defaults to ten million bookings in a temporary SQLite file (generating them
+and writing the snapshot takes about ten minutes); set
+BENCHMARK_DATABASE_URL to use a scratch PostgreSQL database instead.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, extract, func, insert, select
+
+from common import make_session_factory, report
+
+from app.columnar import ColumnarSnapshot, write_snapshot
+from app.models import Booking, Hall, Movie, Show, Theater
+
+BATCH = 100_000
+MOVIES = 200
+THEATERS = 100
+SHOWS = 5000
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi", "Thriller", "Animation"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Pune", "Ahmedabad"]
+YEAR_START = datetime(2024, 1, 1)
+QUARTER = (date(2024, 7, 1), date(2024, 9, 30))
+
+
+def fill(db, count):
+    rng = random.Random(42)
+    db.execute(insert(Movie), [{"id": i, "title": f"Movie {i}", "genre": GENRES[i % len(GENRES)],
+                                "duration_minutes": 120, "price": 10.0} for i in range(1, MOVIES + 1)])
+    db.execute(insert(Theater), [{"id": i, "name": f"Theater {i}", "address": "1 Bench Street",
+                                  "city": CITIES[i % len(CITIES)]} for i in range(1, THEATERS + 1)])
+    db.execute(insert(Hall), [{"id": i, "theater_id": i, "name": "Hall 1", "total_rows": 10,
+                               "seats_per_row": {"row1": 10}} for i in range(1, THEATERS + 1)])
+    shows = []
+    for show_id in range(1, SHOWS + 1):
+        theater_id = rng.randint(1, THEATERS)
+        shows.append({"id": show_id, "movie_id": rng.randint(1, MOVIES), "theater_id": theater_id,
+                      "hall_id": theater_id, "price": 10.0, "seat_mode": "virtual",
+                      "show_time": YEAR_START + timedelta(minutes=rng.randrange(365 * 24 * 60))})
+    db.execute(insert(Show), shows)
+    db.commit()
+
+    seconds_in_year = 365 * 24 * 3600
+    for first in range(1, count + 1, BATCH):
+        db.execute(insert(Booking), [
+            {"id": booking_id, "user_id": booking_id % 100_000, "show_id": rng.randint(1, SHOWS),
+             "booking_reference": f"BM{booking_id:09d}", "total_amount": 10.0 * rng.randint(1, 4),
+             "booking_status": "confirmed",
+             "booking_time": YEAR_START + timedelta(seconds=rng.randrange(seconds_in_year))}
+            for booking_id in range(first, min(first + BATCH, count + 1))
+        ])
+        db.commit()
+
+
+def sql_aggregate(db, by):
+    start = datetime.combine(QUARTER[0], datetime.min.time())
+    end = datetime.combine(QUARTER[1] + timedelta(days=1), datetime.min.time())
+    key = {"hour": extract("hour", Booking.booking_time), "genre": Movie.genre, "city": Theater.city}[by]
+    statement = select(key, func.count(Booking.id), func.sum(Booking.total_amount)) \
+        .select_from(Booking).join(Show, Booking.show_id == Show.id)
+    if by == "genre":
+        statement = statement.join(Movie, Show.movie_id == Movie.id)
+    if by == "city":
+        statement = statement.join(Theater, Show.theater_id == Theater.id)
+    statement = statement.where(and_(
+        Booking.booking_status == "confirmed", Booking.booking_time >= start, Booking.booking_time < end
+    )).group_by(key)
+    return {int(k) if by == "hour" else k: (bookings, gmv) for k, bookings, gmv in db.execute(statement)}
+
+
+def main(count: int = 10_000_000):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    snapshot_dir = tempfile.mkdtemp(prefix="snapshot-")
+    engine, SessionLocal = make_session_factory(database_url)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        fill(db, count)
+        print(f"Inserted {count:,} bookings in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        write_snapshot(db, snapshot_dir)
+        print(f"Wrote the snapshot in {time.perf_counter() - started:.1f}s")
+        snapshot = ColumnarSnapshot(snapshot_dir)
+
+        for by in ("hour", "genre", "city"):
+            started = time.perf_counter()
+            expected = sql_aggregate(db, by)
+            sql_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            result = snapshot.aggregate(by, *QUARTER)
+            columnar_seconds = time.perf_counter() - started
+            assert {row["key"]: (row["bookings"], round(row["gmv"], 2)) for row in result} == \
+                {key: (bookings, round(gmv, 2)) for key, (bookings, gmv) in expected.items()}, by
+            report(f"{by:<6} sql", sql_seconds)
+            report(f"{by:<6} columnar ({sql_seconds / columnar_seconds:,.0f}x)", columnar_seconds)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(snapshot_dir)
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,72 @@
+"""
+Shared helpers for the AlgoBharat benchmark scripts.
+Each benchmark builds its own throwaway database so it never touches real data.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Movie, Theater, Hall
+
+
+def make_session_factory(database_url: str = None):
+    """Create a fresh schema on ``database_url`` (in-memory SQLite by default)"""
+    database_url = database_url or os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    if database_url == "sqlite://":
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    elif database_url.startswith("sqlite"):
+        engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 60})
+    else:
+        engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def square_layout(rows: int, seats: int) -> dict:
+    """Hall layout with ``rows`` rows of ``seats`` seats each"""
+    return {f"row{row}": seats for row in range(1, rows + 1)}
+
+
+def create_catalog(db, rows: int = 20, seats: int = 20):
+    """Create one movie, theater and hall and return them"""
+    movie = Movie(title="Benchmark Movie", duration_minutes=120, genre="Action",
+                  language="English", price=10.0)
+    theater = Theater(name="Benchmark Theater", address="1 Bench Street", city="Bench City")
+    db.add_all([movie, theater])
+    db.flush()
+    hall = Hall(theater_id=theater.id, name="Hall 1", total_rows=rows,
+                seats_per_row=square_layout(rows, seats))
+    db.add(hall)
+    db.commit()
+    return movie, theater, hall
+
+
+def show_times(count: int, start: datetime = None, step_minutes: int = 180):
+    start = start or datetime(2024, 1, 1, 10, 0)
+    return [start + timedelta(minutes=step_minutes * i) for i in range(count)]
+
+
+def timed(func, iterations: int):
+    """Run ``func`` ``iterations`` times and return seconds per call"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def report(label: str, seconds: float):
+    print(f"{label:<45} {seconds * 1000:10.3f} ms")
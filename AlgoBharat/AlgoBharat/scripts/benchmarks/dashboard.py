@@ -0,0 +1,113 @@
+"""
+Benchmark: latency of GET /analytics/dashboard over a year of bookings.
+
+The dashboard reads only the rollups, so the year is generated straight into
+the daily and monthly ones: every movie and every theater has bookings on every
+day, which is the largest rollup a year can produce. The window is the last 365
+days up to now, so it has partial months at both ends and whole months in
+between.
+
+  cold  empty month cache: whole months are read from the monthly rollups,
+        the partial months at the window edges are summed from the daily ones
+  warm  closed months come from the in-process cache; the partial months are
+        still summed by the database
+
+Usage: python scripts/benchmarks/dashboard.py [movies] [theaters]
+Defaults to 500 movies and 100 theaters in in-memory SQLite; set
+BENCHMARK_DATABASE_URL to use a scratch PostgreSQL database instead.
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from common import make_session_factory, report
+
+from app import services
+from app.dashboard import DashboardBucketCache
+from app.models import Movie, Theater, DailyMovieStats, DailyTheaterStats, MonthlyMovieStats, MonthlyTheaterStats
+from app.services import AnalyticsService
+
+DAYS = 365
+REPEATS = 5
+
+
+def fill_year(db, movies, theaters, end):
+    rng = random.Random(42)
+    db.execute(insert(Movie), [{"id": i, "title": f"Movie {i}", "duration_minutes": 120, "price": 10.0}
+                               for i in range(1, movies + 1)])
+    db.execute(insert(Theater), [{"id": i, "name": f"Theater {i}", "address": "1 Bench Street",
+                                  "city": "Bench City"} for i in range(1, theaters + 1)])
+    first = end.date() - timedelta(days=DAYS - 1)
+    months = {MonthlyMovieStats: {}, MonthlyTheaterStats: {}}
+    for offset in range(DAYS):
+        day = first + timedelta(days=offset)
+        for model, monthly, key, count in ((DailyMovieStats, MonthlyMovieStats, "movie_id", movies),
+                                           (DailyTheaterStats, MonthlyTheaterStats, "theater_id", theaters)):
+            rows = []
+            for key_id in range(1, count + 1):
+                bookings = rng.randint(1, 50)
+                tickets = bookings + rng.randint(0, 2 * bookings)
+                rows.append({key: key_id, "day": day, "bookings": bookings, "tickets": tickets,
+                             "gmv": 10.0 * tickets})
+                totals = months[monthly].setdefault((key_id, day.replace(day=1)), [0, 0, 0.0])
+                totals[0] += bookings
+                totals[1] += tickets
+                totals[2] += 10.0 * tickets
+            db.execute(insert(model), rows)
+    # The monthly rollups bookings keep alongside the daily ones
+    for monthly, key in ((MonthlyMovieStats, "movie_id"), (MonthlyTheaterStats, "theater_id")):
+        db.execute(insert(monthly), [
+            {key: key_id, "month": month, "bookings": bookings, "tickets": tickets, "gmv": gmv}
+            for (key_id, month), (bookings, tickets, gmv) in months[monthly].items()
+        ])
+    db.commit()
+    return (movies + theaters) * DAYS + sum(len(totals) for totals in months.values())
+
+
+def measure(engine, db, func, before=lambda: None):
+    """Statements issued by the first call, and the best latency of REPEATS calls"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    timings = []
+    for attempt in range(REPEATS):
+        before()
+        if attempt == 0:
+            event.listen(engine, "before_cursor_execute", listener)
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+        if attempt == 0:
+            event.remove(engine, "before_cursor_execute", listener)
+    return len(statements), min(timings)
+
+
+def main(movies: int = 500, theaters: int = 100):
+    services.dashboard_buckets = DashboardBucketCache()
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        started = time.perf_counter()
+        rows = fill_year(db, movies, theaters, now)
+        print(f"Inserted {rows} rollup rows ({movies} movies, {theaters} theaters, {DAYS} days) "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        window = (now - timedelta(days=DAYS - 1), now)
+        dashboard = lambda: AnalyticsService.get_dashboard_analytics(db, *window)
+        statements, seconds = measure(engine, db, dashboard, before=services.dashboard_buckets.clear)
+        report(f"cold  {statements:>3} statements", seconds)
+        dashboard()
+        statements, seconds = measure(engine, db, dashboard)
+        report(f"warm  {statements:>3} statements", seconds)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100)
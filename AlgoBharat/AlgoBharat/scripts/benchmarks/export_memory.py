@@ -0,0 +1,89 @@
+"""
+Benchmark: throughput and memory of the streaming booking export
+(GET /bookings/export) as the number of bookings grows.
+
+Bookings are added in steps and the whole table is exported in NDJSON and CSV
+after each step. The process's peak RSS is reported after every export; it
+stays flat when rows are streamed instead of collected (the rise over the first
+steps comes from building the insert batches, not from exporting).
+
+Usage: python scripts/benchmarks/export_memory.py [bookings]
+Defaults to two million bookings in a temporary SQLite file; set
+BENCHMARK_DATABASE_URL to use a scratch PostgreSQL database instead
+(exports there read from a server-side cursor).
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from common import make_session_factory, create_catalog
+
+from app.export import export_chunks
+from app.models import Booking, Show
+from app.services import BookingService
+
+BATCH = 50000
+
+
+def add_bookings(db, show_id, first, count):
+    start = datetime(2024, 1, 1)
+    for batch_start in range(first, first + count, BATCH):
+        db.execute(insert(Booking), [
+            {"id": booking_id, "user_id": booking_id % 5000, "show_id": show_id,
+             "booking_reference": f"BM{booking_id:09d}", "total_amount": 20.0, "booking_status": "confirmed",
+             "booking_time": start + timedelta(seconds=booking_id)}
+            for booking_id in range(batch_start, min(batch_start + BATCH, first + count))
+        ])
+        db.commit()
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(count: int = 2_000_000):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    engine, SessionLocal = make_session_factory(database_url)
+    db = SessionLocal()
+    try:
+        movie, theater, hall = create_catalog(db)
+        show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id, show_time=datetime(2024, 1, 1),
+                    price=10.0, seat_mode="virtual")
+        db.add(show)
+        db.commit()
+        show_id = show.id
+
+        steps = [size for size in (10_000, 100_000, 500_000, 1_000_000) if size < count] + [count]
+        exported = 0
+        print(f"{'bookings':>10} {'format':>7} {'MB out':>8} {'rows/s':>9} {'peak RSS MB':>12}")
+        for size in steps:
+            add_bookings(db, show_id, exported + 1, size - exported)
+            exported = size
+            for export_format in ("ndjson", "csv"):
+                started = time.perf_counter()
+                written = sum(len(chunk) for chunk in
+                              export_chunks(BookingService.iter_export_rows(db), export_format))
+                seconds = time.perf_counter() - started
+                print(f"{size:>10,} {export_format:>7} {written / 1e6:>8.1f} {size / seconds:>9,.0f} "
+                      f"{peak_rss_mb():>12.1f}")
+    finally:
+        db.close()
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
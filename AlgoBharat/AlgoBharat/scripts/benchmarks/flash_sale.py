@@ -0,0 +1,122 @@
+"""
+Benchmark: flash sale on one hot show. Worker threads keep booking random
+pairs of adjacent seats until the hall is sold out, first with the previous
+whole-seat-set lock key and then with per-seat locks.
+
+Reports bookings/second, how requests were rejected and how many seats were
+sold twice (the previous lock let overlapping seat sets through to the
+database race).
+
+Usage: python scripts/benchmarks/flash_sale.py [threads]
+Locks use the in-process stand-in; set BENCHMARK_REDIS=1 to use the Redis
+server configured by REDIS_HOST/REDIS_PORT instead.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+
+from common import make_session_factory, create_catalog, show_times
+
+from app import services
+from app.exceptions import SeatAlreadyBookedException, InsufficientSeatsException
+from app.locks import LocalSeatLocks, RedisSeatLocks
+from app.models import Show, Seat, Booking
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_inventory
+from app.services import BookingService, SeatService
+
+
+class WholeSetLocks(LocalSeatLocks):
+    """The previous scheme: one key for the exact sorted seat list, no waiting"""
+
+    def acquire(self, show_id, seat_ids, ttl_ms=None, wait_ms=None):
+        key = f"booking_lock:{show_id}:{','.join(map(str, sorted(seat_ids)))}"
+        return self.acquire_keys([key], ttl_ms, 0)
+
+    def release(self, show_id, seat_ids, token):
+        key = f"booking_lock:{show_id}:{','.join(map(str, sorted(seat_ids)))}"
+        return self.release_keys([key], token)
+
+
+def run(label, locks, threads):
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    engine, SessionLocal = make_session_factory(f"sqlite:///{path}")
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)
+    show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                show_time=show_times(1)[0], price=10.0)
+    db.add(show)
+    db.flush()
+    SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+    seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+    show_id = show.id
+    db.close()
+
+    services.seat_locks = locks
+    seat_inventory.clear()
+    outcomes = {"booked": 0, "lock_rejected": 0, "unavailable": 0}
+    outcome_lock = threading.Lock()
+    sold_out = threading.Event()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        session = SessionLocal()
+        misses = 0
+        while not sold_out.is_set():
+            start = rng.randrange(len(seat_ids) - 1)
+            request = BookingCreate(user_id=seed, show_id=show_id, seat_ids=seat_ids[start:start + 2])
+            try:
+                BookingService.create_booking(session, request)
+                result, misses = "booked", 0
+            except SeatAlreadyBookedException:
+                result = "lock_rejected"
+            except InsufficientSeatsException:
+                session.rollback()
+                result = "unavailable"
+                misses += 1
+                if misses > 200:
+                    sold_out.set()
+            with outcome_lock:
+                outcomes[result] += 1
+        session.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    tickets_sold = int(db.query(func.sum(Booking.total_amount)).scalar() or 0) // 10
+    seats_booked = db.query(Seat).filter(Seat.show_id == show_id, Seat.is_booked == True).count()
+    db.close()
+    engine.dispose()
+    os.remove(path)
+
+    print(f"{label:<18}{outcomes['booked'] / elapsed:>10.1f}{outcomes['booked']:>9}"
+          f"{outcomes['lock_rejected']:>10}{outcomes['unavailable']:>12}{tickets_sold - seats_booked:>10}")
+
+
+def main(threads: int = 16):
+    if os.getenv("BENCHMARK_REDIS") == "1":
+        backend = lambda: RedisSeatLocks(services.redis_client)
+    else:
+        backend = LocalSeatLocks
+    print(f"400-seat hot show, {threads} threads booking adjacent pairs")
+    print(f"{'lock scheme':<18}{'booked/s':>10}{'booked':>9}{'lock-rej':>10}{'unavailable':>12}{'oversold':>10}")
+    run("whole seat set", WholeSetLocks(), threads)
+    run("per seat", backend(), threads)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,84 @@
+"""
+Benchmark: size and encode time of a hall layout in the full and compact
+formats (GET /bookings/halls/{id}/layout?format=full|compact).
+
+  full     one JSON object per seat, split into booked_seats and available_seats
+  compact  one run-length encoded string of seat states per row
+
+The hall has 500 seats (20 rows of 25) with bookings of 2-6 seats scattered
+over it until about the booked fraction given. Encoding starts from the warm
+seat inventory, as the endpoint does when the payload cache misses, so only
+building and serializing the layout is timed. The compact encoder re-encodes
+only the rows booked into since its previous call; behind the payload cache a
+miss follows a booking, which touches one or two rows. Sizes are shown raw and
+gzipped (what a proxy with compression on would send).
+
+Usage: python scripts/benchmarks/layout_format.py [iterations]
+"""
+
+import gzip
+import random
+import sys
+
+from common import make_session_factory, create_catalog, show_times, timed, report
+
+from app import services
+from app.cache import CatalogCache
+from app.layout_cache import LAYOUT_FORMAT_COMPACT, LAYOUT_FORMAT_FULL
+from app.locks import LocalSeatLocks
+from app.models import Seat, Show
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_inventory
+from app.services import BookingService, SeatService
+
+BOOKED_FRACTIONS = (0.0, 0.3, 0.7)
+
+
+def book_scattered(db, show_id, seat_ids, fraction, rng):
+    booked = set()
+    while len(booked) < fraction * len(seat_ids):
+        start = rng.randrange(len(seat_ids))
+        group = [seat_id for seat_id in seat_ids[start:start + rng.randint(2, 6)] if seat_id not in booked]
+        if group:
+            BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show_id, seat_ids=group))
+            booked.update(group)
+
+
+def main(iterations: int = 500):
+    engine, SessionLocal = make_session_factory()
+    services.catalog_cache = CatalogCache()
+    services.seat_locks = LocalSeatLocks()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=25)
+    rng = random.Random(7)
+    print(f"{'booked':>6} {'format':>8} {'bytes':>7} {'gzipped':>8} {'encode ms':>10}")
+    results = {}
+    for index, fraction in enumerate(BOOKED_FRACTIONS):
+        show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                    show_time=show_times(index + 1)[index], price=10.0)
+        db.add(show)
+        db.flush()
+        SeatService.create_seats_for_show(db, show.id, hall)
+        db.commit()
+        seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+        book_scattered(db, show.id, seat_ids, fraction, rng)
+        seat_inventory.clear()
+        for layout_format in (LAYOUT_FORMAT_FULL, LAYOUT_FORMAT_COMPACT):
+            encode = lambda: SeatService.get_hall_layout_payload(db, hall.id, show.id, layout_format=layout_format)
+            payload = encode()  # warm the inventory and catalog caches
+            seconds = timed(encode, iterations)
+            results[fraction, layout_format] = (len(payload), seconds)
+            print(f"{fraction:>6.0%} {layout_format:>8} {len(payload):>7,} {len(gzip.compress(payload)):>8,} "
+                  f"{seconds * 1000:>10.3f}")
+    print()
+    for fraction in BOOKED_FRACTIONS:
+        full_bytes, full_seconds = results[fraction, LAYOUT_FORMAT_FULL]
+        compact_bytes, compact_seconds = results[fraction, LAYOUT_FORMAT_COMPACT]
+        report(f"{fraction:.0%} booked: {full_bytes / compact_bytes:.0f}x smaller, "
+               f"{full_seconds / compact_seconds:.0f}x faster; compact", compact_seconds)
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
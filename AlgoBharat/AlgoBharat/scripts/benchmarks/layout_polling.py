@@ -0,0 +1,91 @@
+"""
+Benchmark: cost of polling an unchanged hall layout through the API.
+
+Compares three ways of answering the same poll of a 40x40 hall:
+  * no versions   - no ETag is available, so every poll rebuilds and
+                    serializes the layout (the behaviour before layout versions)
+  * ETag, 200     - the client sends no If-None-Match; the serialized payload
+                    for the current version is reused
+  * ETag, 304     - the client's If-None-Match matches; nothing is built or sent
+
+Usage: python scripts/benchmarks/layout_polling.py [iterations]
+Requests go through the ASGI app in-process (no network); versions are kept
+in-process and the seat inventory and catalog cache are warm, so the "no
+versions" row is the cheapest the old path could be.
+"""
+
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from common import make_session_factory, create_catalog, show_times, report
+
+from app import services
+from app.cache import CatalogCache
+from app.database import get_db
+from app.layout_cache import LayoutVersions, LocalLayoutVersions, layout_payloads
+from app.main import app
+from app.models import Show
+from app.services import SeatService
+
+
+class NoVersions(LayoutVersions):
+    def current(self, show_id, hall_id):
+        return None
+
+    def bump(self, kind, key):
+        return None
+
+
+def main(iterations: int = 500):
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=40, seats=40)
+    show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                show_time=show_times(1)[0], price=12.0)
+    db.add(show)
+    db.flush()
+    SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+    url = f"/api/v1/bookings/halls/{hall.id}/layout?show_id={show.id}"
+    db.close()
+
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    services.catalog_cache = CatalogCache()
+    client = TestClient(app)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    print(f"{iterations} polls of an unchanged 1600-seat layout")
+    for label, versions, conditional in (("no versions", NoVersions(), False),
+                                         ("ETag, 200 (cached payload)", LocalLayoutVersions(), False),
+                                         ("ETag, 304", LocalLayoutVersions(), True)):
+        services.layout_versions = versions
+        layout_payloads.clear()
+        first = client.get(url)  # warm inventory, catalog and payload caches
+        headers = {"If-None-Match": first.headers["etag"]} if conditional else {}
+        statements.clear()
+        sent = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            response = client.get(url, headers=headers)
+            sent += len(response.content)
+        elapsed = (time.perf_counter() - started) / iterations
+        report(f"{label}: {response.status_code}, {sent // iterations} bytes, "
+               f"{len(statements) / iterations:.1f} queries", elapsed)
+
+    app.dependency_overrides.pop(get_db, None)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,111 @@
+"""
+Benchmark: building the JSON body of large list responses, through the
+response model versus the projected fast path (app/fast_json.py).
+
+  response model  ORM objects, validated into the endpoint's response_model
+                  (from_attributes) and dumped to JSON the way FastAPI does
+  projected       column tuples from the same query, zipped into dicts and
+                  encoded with orjson (what the list endpoints now send)
+
+Cases:
+  shows           GET /shows/movie/{id} with 10,000 shows of one movie
+  user bookings   GET /bookings/user/{id} with 10,000 bookings of two seats
+
+Each timing covers the queries and the encoding, from a fresh session. The
+response model path for bookings loads each booking's seats lazily, as the
+endpoint did.
+
+Usage: python scripts/benchmarks/list_serialization.py [rows] [iterations]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+
+from common import make_session_factory, create_catalog, show_times, report
+
+from app import schemas
+from app.fast_json import FastJSONResponse, rows_to_dicts
+from app.models import Booking, Seat, Show
+from app.services import BookingService, ShowService
+
+
+def response_model_body(schema, objects):
+    # FastAPI: validate the return value against the response field, dump it in
+    # JSON mode, then JSONResponse encodes it with the stdlib json module
+    adapter = TypeAdapter(List[schema])
+    value = adapter.validate_python(objects, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def populate(db, movie, theater, hall, rows):
+    db.execute(insert(Show), [
+        {"movie_id": movie.id, "theater_id": theater.id, "hall_id": hall.id, "show_time": show_time,
+         "price": 12.0, "seat_mode": "materialized"}
+        for show_time in show_times(rows, step_minutes=15)
+    ])
+    show_id = db.query(Show.id).order_by(Show.id).first()[0]
+    booked_at = datetime(2024, 1, 1)
+    db.execute(insert(Booking), [
+        {"user_id": 1, "show_id": show_id, "booking_reference": f"BENCH{n:08d}", "total_amount": 24.0,
+         "booking_status": "confirmed", "booking_time": booked_at + timedelta(seconds=n)}
+        for n in range(rows)
+    ])
+    booking_ids = [booking_id for (booking_id,) in db.query(Booking.id).order_by(Booking.id)]
+    db.execute(insert(Seat), [
+        {"show_id": show_id, "hall_id": hall.id, "row_number": n // 50 + 1, "seat_number": n % 50 + 1,
+         "is_aisle": n % 50 < 3, "is_booked": True, "booking_id": booking_ids[n // 2]}
+        for n in range(rows * 2)
+    ])
+    db.commit()
+
+
+def timed_fresh(SessionLocal, func, iterations):
+    best = None
+    for _ in range(iterations):
+        db = SessionLocal()
+        started = time.perf_counter()
+        body = func(db)
+        elapsed = time.perf_counter() - started
+        db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def main(rows: int = 10_000, iterations: int = 5):
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db)
+    populate(db, movie, theater, hall, rows)
+    movie_id = movie.id
+    db.close()
+
+    cases = (
+        ("shows", (
+            lambda db: response_model_body(
+                schemas.Show, ShowService.get_shows_by_movie(db, movie_id, limit=rows)[0]),
+            lambda db: FastJSONResponse(rows_to_dicts(
+                ShowService.get_shows_by_movie(db, movie_id, limit=rows, projected=True)[0])).body,
+        )),
+        ("user bookings", (
+            lambda db: response_model_body(schemas.BookingResponse, BookingService.get_user_bookings(db, 1)),
+            lambda db: FastJSONResponse(BookingService.get_user_booking_rows(db, 1)).body,
+        )),
+    )
+    print(f"{rows:,} rows per response, best of {iterations}")
+    for label, (slow, fast) in cases:
+        slow_seconds, slow_bytes = timed_fresh(SessionLocal, slow, iterations)
+        fast_seconds, fast_bytes = timed_fresh(SessionLocal, fast, iterations)
+        report(f"{label}: response model ({slow_bytes:,} bytes)", slow_seconds)
+        report(f"{label}: projected ({fast_bytes:,} bytes)", fast_seconds)
+        print(f"{'':<45} {slow_seconds / fast_seconds:9.1f}x")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
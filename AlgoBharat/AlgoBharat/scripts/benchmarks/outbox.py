@@ -0,0 +1,149 @@
+"""
+Benchmark: booking latency as booking event consumers are added, with the
+consumers called inside the request versus behind the transactional outbox.
+
+Every consumer stands in for real work (a notification, a cache refresh) by
+sleeping CONSUMER_MS. Bookings are made one seat at a time on a fresh show.
+
+  inline  create_booking, then every consumer, before the request returns
+  outbox  create_booking only (it writes the outbox row); a background
+          thread relays the outbox and runs the consumers, as the Celery
+          worker does
+
+Reports p50/p99 booking latency and, for the outbox, how long after the last
+booking the consumers finished.
+
+Usage: python scripts/benchmarks/outbox.py [bookings]
+Runs on a temporary SQLite file by default; set BENCHMARK_DATABASE_URL to use
+a scratch PostgreSQL database instead.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import make_session_factory, create_catalog, show_times
+
+from app import outbox, services
+from app.locks import LocalSeatLocks
+from app.models import Hall, Show, Seat
+from app.outbox import BOOKING_CONFIRMED, LocalEventStream, consumer, dispatch_events, get_consumer, relay_outbox
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_inventory
+from app.services import BookingService, SeatService
+
+CONSUMER_MS = 2
+CONSUMER_COUNTS = (0, 1, 4, 16)
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def register_consumers(count):
+    outbox._consumers.clear()
+    outbox._subscriptions.clear()
+    for n in range(count):
+        consumer(BOOKING_CONFIRMED, name=f"bench.{n}")(lambda event: time.sleep(CONSUMER_MS / 1000))
+
+
+def run_consumers(event):
+    for name in outbox.consumers_for(event["type"]):
+        get_consumer(name)(event)
+
+
+def new_show(SessionLocal, catalog, index):
+    db = SessionLocal()
+    movie_id, theater_id, hall_id = catalog
+    hall = db.get(Hall, hall_id)
+    show = Show(movie_id=movie_id, theater_id=theater_id, hall_id=hall_id, show_time=show_times(index + 1)[index],
+                price=10.0)
+    db.add(show)
+    db.flush()
+    SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+    seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+    show_id = show.id
+    db.close()
+    return show_id, seat_ids
+
+
+def run(SessionLocal, catalog, index, mode, consumers, bookings):
+    register_consumers(consumers)
+    show_id, seat_ids = new_show(SessionLocal, catalog, index)
+    stream = LocalEventStream()
+    done = threading.Event()
+
+    def relay():
+        session = SessionLocal()
+        while True:
+            finished = done.is_set()
+            relay_outbox(session, stream)
+            while dispatch_events(stream, lambda name, event: get_consumer(name)(event), "bench"):
+                pass
+            if finished:
+                break
+            time.sleep(0.01)
+        session.close()
+
+    relay_thread = threading.Thread(target=relay)
+    if mode == "outbox":
+        relay_thread.start()
+    db = SessionLocal()
+    latencies = []
+    for seat_id in seat_ids[:bookings]:
+        started = time.perf_counter()
+        booking = BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show_id, seat_ids=[seat_id]))
+        if mode == "inline":
+            run_consumers({"type": BOOKING_CONFIRMED, "id": booking.id, "payload": {}})
+        latencies.append(time.perf_counter() - started)
+    db.close()
+
+    drained = 0.0
+    if mode == "outbox":
+        started = time.perf_counter()
+        done.set()
+        relay_thread.join()
+        drained = time.perf_counter() - started
+    else:
+        # Not relayed; drop the events so the next run starts with an empty outbox
+        session = SessionLocal()
+        relay_outbox(session, stream)
+        session.close()
+    print(f"{mode:>7} {consumers:>9} {percentile(latencies, 0.5):>9.2f} {percentile(latencies, 0.99):>9.2f} "
+          f"{drained * 1000:>12.0f}")
+
+
+def main(bookings: int = 200):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    engine, SessionLocal = make_session_factory(database_url)
+    services.seat_locks = LocalSeatLocks()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)
+    catalog = (movie.id, theater.id, hall.id)
+    db.close()
+    bookings = min(bookings, 400)
+    try:
+        print(f"{'mode':>7} {'consumers':>9} {'p50 ms':>9} {'p99 ms':>9} {'drain ms':>12}")
+        index = 0
+        for mode in ("inline", "outbox"):
+            for consumers in CONSUMER_COUNTS:
+                seat_inventory.clear()
+                run(SessionLocal, catalog, index, mode, consumers, bookings)
+                index += 1
+    finally:
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
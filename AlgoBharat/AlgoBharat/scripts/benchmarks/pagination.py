@@ -0,0 +1,95 @@
+"""
+Benchmark: latency of deep pages, offset vs keyset pagination, on a large
+shows table.
+
+For several page depths it times fetching one page of ``GET /shows`` with
+``offset(depth).limit(page)`` (ShowService.get_shows) and with a cursor
+(ShowService.get_shows_page), where the cursor is the one the client would
+hold after reading every earlier page.
+
+Usage: python scripts/benchmarks/pagination.py [shows] [page_size]
+Defaults to one million shows in a temporary SQLite file (inserting them takes
+a little while); set BENCHMARK_DATABASE_URL to use a scratch PostgreSQL
+database instead.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from common import make_session_factory, create_catalog, report
+
+from app.models import Show
+from app.pagination import encode_cursor
+from app.services import ShowService
+
+BATCH = 50000
+REPEATS = 5
+
+
+def fill_shows(db, count, movie_id, theater_id, hall_id):
+    start = datetime(2024, 1, 1, 9, 0)
+    for first in range(0, count, BATCH):
+        db.execute(insert(Show), [
+            {"movie_id": movie_id, "theater_id": theater_id, "hall_id": hall_id,
+             # Several shows share each start time, so the id tiebreak matters
+             "show_time": start + timedelta(minutes=15 * (i // 4)), "price": 10.0,
+             "seat_mode": "virtual"}
+            for i in range(first, min(first + BATCH, count))
+        ])
+        db.commit()
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(count: int = 1_000_000, page_size: int = 100):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    engine, SessionLocal = make_session_factory(database_url)
+    db = SessionLocal()
+    try:
+        movie, theater, hall = create_catalog(db)
+        started = time.perf_counter()
+        fill_shows(db, count, movie.id, theater.id, hall.id)
+        print(f"Inserted {count} shows in {time.perf_counter() - started:.1f}s; page size {page_size}")
+
+        depths = [depth for depth in (0, 1_000, 10_000, 100_000, 500_000, count - page_size) if depth < count]
+        for depth in depths:
+            cursor = None
+            if depth:
+                # The cursor a client holds after reading ``depth`` rows
+                last = db.query(Show.show_time, Show.id).order_by(Show.show_time, Show.id) \
+                    .offset(depth - 1).limit(1).one()
+                cursor = encode_cursor(last)
+            offset_page = ShowService.get_shows(db, skip=depth, limit=page_size)
+            keyset_page, _ = ShowService.get_shows_page(db, cursor, page_size)
+            assert len(keyset_page) == len(offset_page)
+            db.expunge_all()
+
+            report(f"offset  depth {depth:>9,}", best_of(lambda: ShowService.get_shows(db, skip=depth, limit=page_size)))
+            report(f"keyset  depth {depth:>9,}", best_of(lambda: ShowService.get_shows_page(db, cursor, page_size)))
+    finally:
+        db.close()
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100)
@@ -0,0 +1,127 @@
+"""
+Benchmark: booking throughput for different database pool sizes.
+
+Worker threads act like request handlers: each booking opens a session,
+books one free seat and closes the session. With more workers than pooled
+connections, part of each request's latency is spent waiting for a
+connection; the pool metrics show how much.
+
+Usage: python scripts/benchmarks/pool_sizing.py [threads] [bookings]
+Runs on a temporary SQLite file by default; point BENCHMARK_DATABASE_URL at a
+scratch PostgreSQL database for realistic numbers (SQLite serializes writers,
+so larger pools mostly add lock contention there). Seat locks are in-process.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from common import create_catalog, show_times
+
+from app import services
+from app.database import Base, create_db_engine
+from app.exceptions import SeatAlreadyBookedException, InsufficientSeatsException
+from app.locks import LocalSeatLocks
+from app.models import Show, Seat
+from app.pool_metrics import pool_stats
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_inventory
+from app.services import BookingService, SeatService
+
+POOL_SIZES = (1, 2, 4, 8, 16)
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def run(pool_size, threads, bookings):
+    path = None
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    metrics_name = f"benchmark_pool_{pool_size}"
+    engine = create_db_engine(database_url, metrics_name=metrics_name,
+                              pool_size=pool_size, max_overflow=0, pool_timeout=30)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=50, seats=40)
+    show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                show_time=show_times(1)[0], price=10.0)
+    db.add(show)
+    db.flush()
+    SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+    seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+    show_id = show.id
+    db.close()
+    # Only the benchmark's own checkouts count
+    pool_stats_before = pool_stats()[metrics_name]["checkouts"]
+
+    seat_inventory.clear()
+    services.seat_locks = LocalSeatLocks()
+    pending = seat_ids[:bookings]
+    latencies, failures = [], 0
+    result_lock = threading.Lock()
+
+    def worker():
+        nonlocal failures
+        while True:
+            with result_lock:
+                if not pending:
+                    return
+                seat_id = pending.pop()
+            started = time.perf_counter()
+            session = SessionLocal()
+            try:
+                BookingService.create_booking(session, BookingCreate(user_id=1, show_id=show_id, seat_ids=[seat_id]))
+                failed = False
+            except (SeatAlreadyBookedException, InsufficientSeatsException):
+                failed = True
+            finally:
+                session.close()
+            with result_lock:
+                latencies.append(time.perf_counter() - started)
+                failures += failed
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats = pool_stats()[metrics_name]
+    engine.dispose()
+    if path:
+        os.remove(path)
+
+    print(f"{pool_size:>5}{(len(latencies) - failures) / elapsed:>12.1f}{percentile(latencies, 0.5):>10.2f}ms"
+          f"{percentile(latencies, 0.99):>10.2f}ms{stats['avg_wait_ms']:>12.2f}ms"
+          f"{stats['saturated']:>11}{stats['timeouts']:>10}{stats['checkouts'] - pool_stats_before:>11}")
+
+
+def main(threads: int = 32, bookings: int = 1500):
+    print(f"{threads} threads, {bookings} single-seat bookings, max_overflow=0")
+    print(f"{'pool':>5}{'booked/s':>12}{'p50':>12}{'p99':>12}{'avg wait':>14}"
+          f"{'saturated':>11}{'timeouts':>10}{'checkouts':>11}")
+    for pool_size in POOL_SIZES:
+        run(pool_size, threads, bookings)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1500)
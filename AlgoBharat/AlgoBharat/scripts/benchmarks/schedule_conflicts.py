@@ -0,0 +1,119 @@
+"""
+Benchmark: checking a new show's slot against a hall with years of show
+history, by scanning the hall's shows versus the per-hall schedule index
+(app/schedule_index.py).
+
+  scan       every show of the hall with its movie's duration, then a check
+             in Python (what a check inside create_show would otherwise do)
+  index      ShowService.get_schedule (warm: one query for shows added since)
+             plus a treap lookup
+  in memory  the treap lookup alone
+
+Both the overlap check and "next free slot of 100 minutes" are timed, as is
+rebuilding the index from the database and creating a week of shows in the
+hall through ShowService.create_shows, which checks every item.
+
+Usage: python scripts/benchmarks/schedule_conflicts.py [years] [iterations]
+"""
+
+import sys
+import time
+from datetime import timedelta
+
+from sqlalchemy import insert
+
+from common import make_session_factory, create_catalog, show_times, timed, report
+
+from app import services
+from app.cache import CatalogCache
+from app.models import Movie, Show
+from app.schedule_index import ScheduleIndex, hall_schedules, occupied_until
+from app.schemas import ShowCreate
+from app.services import ShowService
+
+SHOWS_PER_DAY = 5
+SLOT_MINUTES = 24 * 60 // SHOWS_PER_DAY  # 288: a 120 minute movie leaves a 153 minute gap
+
+
+def scan_overlap(db, hall_id, start, end):
+    rows = db.query(Show.id, Show.show_time, Movie.duration_minutes) \
+        .join(Movie, Movie.id == Show.movie_id).filter(Show.hall_id == hall_id).all()
+    for show_id, show_time, duration in rows:
+        if show_time < end and start < occupied_until(show_time, duration):
+            return show_id
+    return None
+
+
+def scan_free_slot(db, hall_id, after, length):
+    rows = db.query(Show.show_time, Movie.duration_minutes) \
+        .join(Movie, Movie.id == Show.movie_id).filter(Show.hall_id == hall_id).order_by(Show.show_time).all()
+    cover = after
+    for show_time, duration in rows:
+        end = occupied_until(show_time, duration)
+        if end <= cover:
+            continue
+        if show_time - cover >= length:
+            return cover
+        cover = max(cover, end)
+    return cover
+
+
+def main(years: int = 5, iterations: int = 200):
+    engine, SessionLocal = make_session_factory()
+    services.catalog_cache = CatalogCache()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=10, seats=10)
+    history = show_times(years * 365 * SHOWS_PER_DAY, step_minutes=SLOT_MINUTES)
+    db.execute(insert(Show), [
+        {"movie_id": movie.id, "theater_id": theater.id, "hall_id": hall.id, "show_time": show_time,
+         "price": 10.0, "seat_mode": "virtual"}
+        for show_time in history
+    ])
+    db.commit()
+    hall_id, movie_id, theater_id = hall.id, movie.id, theater.id
+    print(f"{len(history):,} shows over {years} years in one hall, best of {iterations}")
+
+    # A slot in the middle of the history that overlaps, and a 100 minute show to fit
+    start = history[len(history) // 2] + timedelta(minutes=60)
+    end = occupied_until(start, 100)
+    after = history[0]
+    length = timedelta(minutes=100 + 15)
+
+    started = time.perf_counter()
+    index = ScheduleIndex(hall_id, ShowService._scheduled_shows(db, hall_id))
+    report("index rebuild from the database", time.perf_counter() - started)
+    schedule = ShowService.get_schedule(db, hall_id)
+    assert scan_overlap(db, hall_id, start, end) == schedule.find_overlap(start, end) is not None
+    assert scan_free_slot(db, hall_id, after, length) == schedule.next_free_slot(after, length)
+
+    for label, (scan, checked, in_memory) in (
+        ("overlap", (lambda: scan_overlap(db, hall_id, start, end),
+                     lambda: ShowService.get_schedule(db, hall_id).find_overlap(start, end),
+                     lambda: index.find_overlap(start, end))),
+        ("next free slot", (lambda: scan_free_slot(db, hall_id, after, length),
+                            lambda: ShowService.get_schedule(db, hall_id).next_free_slot(after, length),
+                            lambda: index.next_free_slot(after, length))),
+    ):
+        scan_seconds = timed(scan, max(iterations // 20, 1))
+        report(f"{label}: scan", scan_seconds)
+        report(f"{label}: index", timed(checked, iterations))
+        in_memory_seconds = timed(in_memory, iterations * 10)
+        report(f"{label}: in memory", in_memory_seconds)
+        print(f"{'':<45} {scan_seconds / in_memory_seconds:9.0f}x")
+
+    # A week of new shows after the history, each checked against it and the batch
+    week = show_times(7 * SHOWS_PER_DAY, start=history[-1] + timedelta(days=1), step_minutes=SLOT_MINUTES)
+    payloads = [ShowCreate(movie_id=movie_id, theater_id=theater_id, hall_id=hall_id, show_time=show_time,
+                           price=10.0, seat_mode="virtual") for show_time in week]
+    started = time.perf_counter()
+    shows, errors = ShowService.create_shows(db, payloads)
+    elapsed = time.perf_counter() - started
+    assert len(shows) == len(payloads) and not errors
+    report(f"create_shows: a week ({len(payloads)} shows)", elapsed)
+    hall_schedules.clear()
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5, int(sys.argv[2]) if len(sys.argv) > 2 else 200)
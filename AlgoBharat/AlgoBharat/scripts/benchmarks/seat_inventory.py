@@ -0,0 +1,83 @@
+"""
+Benchmark: hall layout and consecutive-seat lookups served from the bitmap
+seat inventory versus the previous ORM path that loaded every Seat row.
+
+Usage: python scripts/benchmarks/seat_inventory.py [iterations]
+"""
+
+import random
+import sys
+
+from sqlalchemy import and_
+
+from common import make_session_factory, create_catalog, show_times, timed, report
+
+from app.models import Show, Seat
+from app.seat_inventory import seat_inventory
+from app.services import SeatService
+
+
+def orm_layout(db, hall_id, show_id):
+    """Layout the way it was built before the inventory existed"""
+    seats = db.query(Seat).filter(
+        and_(Seat.hall_id == hall_id, Seat.show_id == show_id)
+    ).all()
+    booked, available = [], []
+    for seat in seats:
+        seat_data = {"id": seat.id, "row_number": seat.row_number,
+                     "seat_number": seat.seat_number, "is_aisle": seat.is_aisle}
+        (booked if seat.is_booked else available).append(seat_data)
+    return booked, available
+
+
+def orm_consecutive(db, show_id, num_seats):
+    """Consecutive-seat search the way it was done before the inventory existed"""
+    seats = db.query(Seat).filter(
+        and_(Seat.show_id == show_id, Seat.is_booked == False)
+    ).order_by(Seat.row_number, Seat.seat_number).all()
+    by_row = {}
+    for seat in seats:
+        by_row.setdefault(seat.row_number, []).append(seat)
+    for row_seats in by_row.values():
+        for i in range(len(row_seats) - num_seats + 1):
+            window = row_seats[i:i + num_seats]
+            numbers = [seat.seat_number for seat in window]
+            if numbers == list(range(numbers[0], numbers[0] + num_seats)):
+                return window
+    return []
+
+
+def main(iterations: int = 200):
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)  # 400 seats
+    show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                show_time=show_times(1)[0], price=12.0)
+    db.add(show)
+    db.commit()
+    SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+
+    # Book roughly 60% of the hall so the consecutive search has to work for it
+    rng = random.Random(7)
+    for seat in db.query(Seat).filter(Seat.show_id == show.id):
+        if rng.random() < 0.6:
+            seat.is_booked = True
+    db.commit()
+
+    print(f"400-seat hall, {iterations} iterations each")
+    report("layout (ORM rows)", timed(lambda: orm_layout(db, hall.id, show.id), iterations))
+    seat_inventory.clear()
+    report("layout (bitmap inventory, cold)",
+           timed(lambda: (seat_inventory.clear(), SeatService.get_hall_layout(db, hall.id, show.id)),
+                 max(iterations // 10, 1)))
+    report("layout (bitmap inventory, warm)",
+           timed(lambda: SeatService.get_hall_layout(db, hall.id, show.id), iterations))
+    report("consecutive x4 (ORM rows)", timed(lambda: orm_consecutive(db, show.id, 4), iterations))
+    report("consecutive x4 (bitmap inventory, warm)",
+           timed(lambda: SeatService.find_consecutive_seats(db, show.id, 4), iterations))
+    db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,161 @@
+"""
+Benchmark: fan-out of live seat map updates (GET /bookings/halls/{id}/layout/stream)
+to thousands of subscribers of one show.
+
+Subscribers are simulated in-process: each one is a task reading its
+subscription's event stream the way the SSE response does, without a socket.
+For each subscriber count, bookings are made one at a time and every
+subscriber must receive the delta before the next booking starts.
+
+Reports, per subscriber count:
+  layout reads  database reads of the layout by the show's feed (one to start,
+                then one per booking, whatever the number of subscribers)
+  KB/sub        Python heap per subscriber (queue, task, generator), traced
+                with tracemalloc while subscribing
+  p50/p99/max   fan-out latency: from the booking's notify to a subscriber
+                receiving its delta
+
+Usage: python scripts/benchmarks/seat_stream.py [subscribers] [bookings]
+Defaults to up to 10,000 subscribers and 50 bookings per count on a temporary
+SQLite file; layout versions and seat locks are kept in-process.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import make_session_factory, create_catalog, show_times
+
+from app import services
+from app.cache import CatalogCache
+from app.layout_cache import LocalLayoutVersions
+from app.locks import LocalSeatLocks
+from app.models import Hall, Seat, Show
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_inventory
+from app.seat_stream import SeatStreamHub
+from app.services import BookingService, SeatService
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def new_show(SessionLocal, catalog, index):
+    db = SessionLocal()
+    movie_id, theater_id, hall_id = catalog
+    show = Show(movie_id=movie_id, theater_id=theater_id, hall_id=hall_id, show_time=show_times(index + 1)[index],
+                price=10.0)
+    db.add(show)
+    db.flush()
+    SeatService.create_seats_for_show(db, show.id, db.get(Hall, hall_id))
+    db.commit()
+    seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+    show_id = show.id
+    db.close()
+    return show_id, seat_ids
+
+
+async def run(SessionLocal, hall_id, show_id, seat_ids, subscribers, bookings):
+    hub = services.seat_streams
+    notified = []
+    notify = hub.notify
+
+    def timed_notify(booked_show_id):
+        notified.append(time.perf_counter())
+        notify(booked_show_id)
+
+    hub.notify = timed_notify
+
+    def load(version):
+        db = SessionLocal()
+        try:
+            return SeatService.get_hall_layout(db, hall_id, show_id, version)
+        finally:
+            db.close()
+
+    latencies = []
+    received = 0
+    all_received = asyncio.Event()
+
+    async def read(subscription):
+        nonlocal received
+        async for message in subscription.events():
+            if message.startswith(b"event: seats"):
+                latencies.append(time.perf_counter() - notified[-1])
+                received += 1
+                if received == subscribers:
+                    all_received.set()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subscriptions = [
+        await hub.subscribe(show_id, hall_id, load=lambda version: asyncio.to_thread(load, version),
+                            current_version=lambda: asyncio.to_thread(SeatService.get_layout_version,
+                                                                      hall_id, show_id),
+                            start_version=lambda: asyncio.to_thread(SeatService.start_layout_version,
+                                                                    hall_id, show_id))
+        for _ in range(subscribers)
+    ]
+    readers = [asyncio.create_task(read(subscription)) for subscription in subscriptions]
+    # Let every reader take its initial layout off the queue
+    while any(not subscription.queue.empty() for subscription in subscriptions):
+        await asyncio.sleep(0.01)
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+    (feed,) = hub.feeds()
+
+    def book(seat_id):
+        db = SessionLocal()
+        try:
+            BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show_id, seat_ids=[seat_id]))
+        finally:
+            db.close()
+
+    for seat_id in seat_ids[:bookings]:
+        received = 0
+        all_received.clear()
+        await asyncio.to_thread(book, seat_id)
+        await all_received.wait()
+
+    reads = feed.reads
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+    hub.notify = notify
+    print(f"{subscribers:>11,} {reads:>12} {per_subscriber / 1024:>7.1f} {percentile(latencies, 0.5):>8.2f} "
+          f"{percentile(latencies, 0.99):>8.2f} {max(latencies) * 1000:>8.2f}")
+
+
+def main(max_subscribers: int = 10_000, bookings: int = 50):
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    engine, SessionLocal = make_session_factory(f"sqlite:///{path}")
+    services.catalog_cache = CatalogCache(enabled=False)
+    services.seat_locks = LocalSeatLocks()
+    services.layout_versions = LocalLayoutVersions()
+    services.seat_streams = SeatStreamHub()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)
+    catalog = (movie.id, theater.id, hall.id)
+    hall_id = hall.id
+    db.close()
+    bookings = min(bookings, 400)
+    counts = [count for count in (100, 1000, 5000) if count < max_subscribers] + [max_subscribers]
+    try:
+        print(f"{'subscribers':>11} {'layout reads':>12} {'KB/sub':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for index, subscribers in enumerate(counts):
+            seat_inventory.clear()
+            show_id, seat_ids = new_show(SessionLocal, catalog, index)
+            asyncio.run(run(SessionLocal, hall_id, show_id, seat_ids, subscribers, bookings))
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
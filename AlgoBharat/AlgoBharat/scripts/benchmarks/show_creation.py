@@ -0,0 +1,81 @@
+"""
+Benchmark: shows/second for ShowService.create_show (bulk seat insert in the
+show's transaction) versus the previous path that committed the show and then
+added one ORM Seat object per seat in a second transaction, and versus
+ShowService.create_shows (POST /shows/bulk), which creates every show in one
+batch and generates all their seats with one INSERT ... SELECT. The
+service paths are also timed for virtual seat mode shows, which store no seats.
+
+Usage: python scripts/benchmarks/show_creation.py [shows]
+Set BENCHMARK_DATABASE_URL to run against PostgreSQL (uses COPY for seats).
+"""
+
+import sys
+import time
+
+from common import make_session_factory, create_catalog, show_times
+
+from app.models import Show, Seat
+from app.schedule_index import hall_schedules
+from app.schemas import ShowCreate
+from app.services import ShowService
+
+
+def orm_create_show(db, show_data, hall):
+    """Show creation the way it worked before bulk seat inserts"""
+    show = Show(**show_data.dict(exclude={"seat_mode"}))
+    db.add(show)
+    db.commit()
+    db.refresh(show)
+    seats = []
+    for row_name, seat_count in hall.seats_per_row.items():
+        row_number = int(row_name.replace("row", ""))
+        for seat_num in range(1, seat_count + 1):
+            seats.append(Seat(show_id=show.id, hall_id=hall.id, row_number=row_number,
+                              seat_number=seat_num, is_aisle=seat_num <= 3, is_booked=False))
+    db.add_all(seats)
+    db.commit()
+    return show
+
+
+def one_at_a_time(create):
+    def create_all(db, payloads, hall):
+        for payload in payloads:
+            create(db, payload, hall)
+    return create_all
+
+
+def run(label, create_all, db, movie, theater, hall, count, seat_mode):
+    payloads = [
+        ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                   show_time=show_time, price=12.0, seat_mode=seat_mode)
+        for show_time in show_times(count)
+    ]
+    started = time.perf_counter()
+    create_all(db, payloads, hall)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {count / elapsed:10.1f} shows/s")
+
+
+def main(count: int = 200):
+    create_show = one_at_a_time(lambda db, payload, hall: ShowService.create_show(db, payload))
+    create_shows = lambda db, payloads, hall: ShowService.create_shows(db, payloads)
+    for label, create_all, seat_mode in (
+        ("ORM objects, two commits", one_at_a_time(orm_create_show), "materialized"),
+        ("bulk insert, one transaction", create_show, "materialized"),
+        ("create_shows, one batch", create_shows, "materialized"),
+        ("virtual: create_show", create_show, "virtual"),
+        ("virtual: create_shows, one batch", create_shows, "virtual"),
+    ):
+        # Each round starts a new database whose hall reuses the same id
+        hall_schedules.clear()
+        engine, SessionLocal = make_session_factory()
+        db = SessionLocal()
+        movie, theater, hall = create_catalog(db, rows=20, seats=20)
+        run(label, create_all, db, movie, theater, hall, count, seat_mode)
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,91 @@
+"""
+Benchmark: query count and latency of SeatService.suggest_alternative_shows
+(batched) versus the previous per-show implementation, for one movie with
+many shows.
+
+Usage: python scripts/benchmarks/suggestions.py [shows] [iterations]
+"""
+
+import random
+import sys
+import time
+
+from sqlalchemy import and_, event
+
+from common import make_session_factory, create_catalog, show_times, report
+
+from app.models import Show, Seat, Movie, Theater, Hall
+from app.seat_inventory import seat_inventory
+from app.services import SeatService
+
+
+def per_show_suggestions(db, movie_id, num_seats):
+    """Suggestions the way they were computed before batching (N+1 queries)"""
+    suggestions = []
+    for show in db.query(Show).filter(Show.movie_id == movie_id).all():
+        seats = db.query(Seat).filter(
+            and_(Seat.show_id == show.id, Seat.is_booked == False)
+        ).order_by(Seat.row_number, Seat.seat_number).all()
+        by_row = {}
+        for seat in seats:
+            by_row.setdefault(seat.row_number, []).append(seat)
+        found = []
+        for row_seats in by_row.values():
+            for i in range(len(row_seats) - num_seats + 1):
+                window = row_seats[i:i + num_seats]
+                numbers = [seat.seat_number for seat in window]
+                if numbers == list(range(numbers[0], numbers[0] + num_seats)):
+                    found = window
+                    break
+            if found:
+                break
+        if found:
+            movie = db.query(Movie).filter(Movie.id == show.movie_id).first()
+            theater = db.query(Theater).filter(Theater.id == show.theater_id).first()
+            hall = db.query(Hall).filter(Hall.id == show.hall_id).first()
+            suggestions.append((show.id, movie.title, theater.name, hall.name, found))
+    return suggestions
+
+
+def main(show_count: int = 300, iterations: int = 5):
+    engine, SessionLocal = make_session_factory()
+    db = SessionLocal()
+    movie, theater, hall = create_catalog(db, rows=20, seats=20)
+    for show_time in show_times(show_count):
+        show = Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                    show_time=show_time, price=12.0)
+        db.add(show)
+        db.flush()
+        SeatService.create_seats_for_show(db, show.id, hall)
+    db.commit()
+
+    # Fragment availability and fill half of the shows completely
+    rng = random.Random(3)
+    db.query(Seat).filter(Seat.id % 4 < 2).update({"is_booked": True}, synchronize_session=False)
+    full_shows = rng.sample(range(1, show_count + 1), show_count // 2)
+    db.query(Seat).filter(Seat.show_id.in_(full_shows)).update({"is_booked": True}, synchronize_session=False)
+    db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    def run(label, func):
+        statements.clear()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            seat_inventory.clear()
+            func()
+        elapsed = (time.perf_counter() - started) / iterations
+        report(f"{label} ({len(statements) // iterations} queries)", elapsed)
+
+    print(f"{show_count} shows of a 400-seat hall, groups of 2, cold inventory cache")
+    run("per-show queries", lambda: per_show_suggestions(db, movie.id, 2))
+    run("batched", lambda: SeatService.suggest_alternative_shows(db, movie.id, 2))
+    run("batched, parallel evaluation",
+        lambda: SeatService.suggest_alternative_shows(db, movie.id, 2, parallel=True))
+    db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
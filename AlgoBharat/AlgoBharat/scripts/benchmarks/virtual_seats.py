@@ -0,0 +1,109 @@
+"""
+Benchmark: seats table size and per-request latency for materialized versus
+virtual seat storage.
+
+Usage: python scripts/benchmarks/virtual_seats.py [shows] [booked_fraction]
+    python scripts/benchmarks/virtual_seats.py 100000 0.05
+
+Each mode gets its own temporary SQLite file; the file size is reported as the
+table-size figure. Shows are loaded with bulk inserts so setup stays fast.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import make_session_factory, create_catalog, show_times
+
+from app.models import Show, Seat, SEAT_MODE_MATERIALIZED, SEAT_MODE_VIRTUAL
+from app.schemas import BookingCreate
+from app.seat_inventory import seat_template, seat_inventory
+from app.services import BookingService, SeatService
+
+ROWS, SEATS_PER_ROW = 20, 20
+CHUNK = 50_000
+
+
+def load_shows(db, mode, movie, theater, hall, count, booked_fraction):
+    template = seat_template(hall.seats_per_row)
+    db.execute(Show.__table__.insert(), [
+        {"movie_id": movie.id, "theater_id": theater.id, "hall_id": hall.id,
+         "show_time": show_time, "price": 10.0, "seat_mode": mode,
+         "seat_layout": hall.seats_per_row if mode == SEAT_MODE_VIRTUAL else None}
+        for show_time in show_times(count, step_minutes=1)
+    ])
+    show_ids = [show_id for (show_id,) in db.query(Show.id).order_by(Show.id)]
+    booked_per_show = int(len(template) * booked_fraction)
+
+    pending = []
+    for show_id in show_ids:
+        for index, (row_number, seat_number, is_aisle) in enumerate(template):
+            is_booked = index < booked_per_show
+            if mode == SEAT_MODE_VIRTUAL and not is_booked:
+                continue
+            pending.append({"show_id": show_id, "hall_id": hall.id, "row_number": row_number,
+                            "seat_number": seat_number, "is_aisle": is_aisle, "is_booked": is_booked})
+            if len(pending) >= CHUNK:
+                db.execute(Seat.__table__.insert(), pending)
+                pending = []
+    if pending:
+        db.execute(Seat.__table__.insert(), pending)
+    db.commit()
+    return show_ids
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def measure(db, show_ids, samples=200):
+    rng = random.Random(1)
+    layout_times, booking_times = [], []
+    for _ in range(samples):
+        show_id = rng.choice(show_ids)
+        seat_inventory.clear()
+        started = time.perf_counter()
+        SeatService.get_hall_layout(db, db.get(Show, show_id).hall_id, show_id)
+        layout_times.append(time.perf_counter() - started)
+
+        free = SeatService.find_consecutive_seats(db, show_id, 2)
+        if not free:
+            continue
+        show = db.get(Show, show_id)
+        booking_data = BookingCreate(user_id=1, show_id=show_id, seat_ids=[seat["id"] for seat in free])
+        started = time.perf_counter()
+        if show.seat_mode == SEAT_MODE_VIRTUAL:
+            BookingService._book_virtual_seats(db, show, booking_data)
+        else:
+            BookingService._book_materialized_seats(db, show, booking_data)
+        db.commit()
+        booking_times.append(time.perf_counter() - started)
+    return layout_times, booking_times
+
+
+def main(count: int = 2000, booked_fraction: float = 0.05):
+    print(f"{count} shows x {ROWS * SEATS_PER_ROW} seats, {booked_fraction:.0%} of seats booked")
+    print(f"{'mode':<14}{'seat rows':>12}{'db size':>12}{'layout p50':>13}{'booking p50':>13}")
+    for mode in (SEAT_MODE_MATERIALIZED, SEAT_MODE_VIRTUAL):
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        engine, SessionLocal = make_session_factory(f"sqlite:///{path}")
+        db = SessionLocal()
+        movie, theater, hall = create_catalog(db, rows=ROWS, seats=SEATS_PER_ROW)
+        show_ids = load_shows(db, mode, movie, theater, hall, count, booked_fraction)
+        seat_rows = db.query(Seat).count()
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        layout_times, booking_times = measure(db, show_ids)
+        print(f"{mode:<14}{seat_rows:>12,}{size_mb:>10.1f}MB"
+              f"{percentile(layout_times, 0.5):>11.2f}ms{percentile(booking_times, 0.5):>11.2f}ms")
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.05)
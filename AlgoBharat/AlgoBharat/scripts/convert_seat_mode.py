@@ -0,0 +1,108 @@
+"""
+Seat Storage Migration Script for AlgoBharat Movie Ticket Booking System
+Converts existing shows between materialized seats (one Seat row per physical
+seat) and virtual seats (only booked seats are stored).
+
+Run `alembic upgrade head` first so shows have the seat_mode/seat_layout columns.
+
+Usage:
+    python scripts/convert_seat_mode.py --to virtual [--show-id 1 --show-id 2] [--batch-size 500]
+    python scripts/convert_seat_mode.py --to materialized [--show-id 1]
+
+Seat ids handed out for a show change when it is converted (virtual seat ids
+are positions in the layout), so convert shows before they go on sale.
+Running API workers may serve a converted show's old seat mode from their
+in-process catalog cache for up to CATALOG_CACHE_L1_TTL_SECONDS.
+"""
+
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models import Show, Seat, Hall, SEAT_MODE_MATERIALIZED, SEAT_MODE_VIRTUAL
+from app.seat_inventory import seat_template
+from app.services import catalog_cache, layout_versions
+
+
+def to_virtual(db, show):
+    """Keep booked seats, drop the rest and snapshot the layout the seats were built from"""
+    rows = db.query(Seat.row_number, func.max(Seat.seat_number)).filter(
+        Seat.show_id == show.id
+    ).group_by(Seat.row_number).all()
+    if rows:
+        show.seat_layout = {f"row{row_number}": seat_count for row_number, seat_count in rows}
+    else:
+        show.seat_layout = db.query(Hall.seats_per_row).filter(Hall.id == show.hall_id).scalar()
+    db.query(Seat).filter(Seat.show_id == show.id, Seat.is_booked == False).delete(
+        synchronize_session=False
+    )
+    show.seat_mode = SEAT_MODE_VIRTUAL
+
+
+def to_materialized(db, show):
+    """Insert a Seat row for every layout position that has no booked seat yet"""
+    booked = set(db.query(Seat.row_number, Seat.seat_number).filter(Seat.show_id == show.id).all())
+    seats = [
+        {
+            "show_id": show.id,
+            "hall_id": show.hall_id,
+            "row_number": row_number,
+            "seat_number": seat_number,
+            "is_aisle": is_aisle,
+            "is_booked": False
+        }
+        for row_number, seat_number, is_aisle in seat_template(show.seat_layout or {})
+        if (row_number, seat_number) not in booked
+    ]
+    if seats:
+        db.execute(Seat.__table__.insert(), seats)
+    show.seat_mode = SEAT_MODE_MATERIALIZED
+    show.seat_layout = None
+
+
+def convert(target, show_ids=None, batch_size=500):
+    db = SessionLocal()
+    source = SEAT_MODE_MATERIALIZED if target == SEAT_MODE_VIRTUAL else SEAT_MODE_VIRTUAL
+    convert_show = to_virtual if target == SEAT_MODE_VIRTUAL else to_materialized
+    converted = 0
+    try:
+        query = db.query(Show.id).filter(Show.seat_mode == source)
+        if show_ids:
+            query = query.filter(Show.id.in_(show_ids))
+        pending = [show_id for (show_id,) in query.order_by(Show.id).all()]
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            for show in db.query(Show).filter(Show.id.in_(batch)).all():
+                convert_show(db, show)
+                converted += 1
+            db.commit()
+            # Drop cached copies of the shows (the API's local tiers expire on their own)
+            # and move their layout versions on, since seat ids change
+            for show_id in batch:
+                catalog_cache.invalidate(Show, show_id)
+                layout_versions.bump_show(show_id)
+            print(f"Converted {converted}/{len(pending)} shows to {target} seats")
+    except Exception as e:
+        print(f"Error converting shows: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert shows between seat storage modes")
+    parser.add_argument("--to", dest="target", required=True,
+                        choices=[SEAT_MODE_VIRTUAL, SEAT_MODE_MATERIALIZED])
+    parser.add_argument("--show-id", dest="show_ids", type=int, action="append",
+                        help="Only convert these shows (default: every show in the other mode)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    convert(args.target, args.show_ids, args.batch_size)
@@ -0,0 +1,79 @@
+"""
+Schedule Import Script for AlgoBharat Movie Ticket Booking System
+Creates the shows listed in a CSV or JSON file in batches, the same way
+POST /api/v1/shows/bulk does.
+
+The CSV needs a header with movie_id, theater_id, hall_id, show_time and price
+columns, plus an optional seat_mode column. A JSON file holds a list of objects
+with the same keys as POST /api/v1/shows/.
+
+Usage:
+    python scripts/import_schedule.py week.csv
+    python scripts/import_schedule.py week.json --batch-size 2000
+
+Lines that do not parse, or that name a movie, theater or hall that does not
+exist, are reported with their line (CSV) or position (JSON) and skipped; the
+rest of the schedule is still created. Each batch is committed on its own.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import ValidationError
+
+from app.database import SessionLocal
+from app.schemas import ShowCreate
+from app.services import ShowService
+
+
+def read_schedule(path):
+    """(line, item) pairs from a CSV or JSON schedule file"""
+    with open(path, newline="") as f:
+        if path.endswith(".json"):
+            return list(enumerate(json.load(f), start=1))
+        # Line 1 is the header
+        return [(line, {key: value for key, value in row.items() if value not in ("", None)})
+                for line, row in enumerate(csv.DictReader(f), start=2)]
+
+
+def import_schedule(path, batch_size=1000):
+    payloads, errors = [], []
+    for line, item in read_schedule(path):
+        try:
+            payloads.append((line, ShowCreate(**item)))
+        except ValidationError as e:
+            errors.append((line, "; ".join(error["msg"] for error in e.errors())))
+
+    db = SessionLocal()
+    created = 0
+    try:
+        for start in range(0, len(payloads), batch_size):
+            batch = payloads[start:start + batch_size]
+            shows, batch_errors = ShowService.create_shows(db, [payload for _, payload in batch])
+            created += len(shows)
+            errors.extend((batch[error["index"]][0], error["detail"]) for error in batch_errors)
+            print(f"Created {created}/{len(payloads)} shows")
+    except Exception as e:
+        print(f"Error importing schedule: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    for line, detail in sorted(errors):
+        print(f"Skipped line {line}: {detail}")
+    return created, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the shows of a schedule file in batches")
+    parser.add_argument("path", help="CSV or JSON schedule file")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Shows per transaction")
+    args = parser.parse_args()
+    _, errors = import_schedule(args.path, args.batch_size)
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,62 @@
+"""
+Columnar Analytics Snapshot Script for AlgoBharat Movie Ticket Booking System
+Dumps confirmed bookings with their show, movie and theater keys into
+per-day NumPy column files (see app/columnar.py) for ad-hoc analytics that
+should not load the OLTP tables.
+
+Usage:
+    python scripts/snapshot_analytics.py                       # full snapshot
+    python scripts/snapshot_analytics.py --since 2026-10-16    # rewrite from this day on
+    python scripts/snapshot_analytics.py --query genre --start 2026-07-01 --end 2026-09-30
+
+Past days do not change once over, so after the first full snapshot a
+nightly run with --since set to yesterday keeps it current. The output
+directory defaults to ANALYTICS_SNAPSHOT_DIR.
+"""
+
+import argparse
+import sys
+import os
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.columnar import SNAPSHOT_DIR, ColumnarSnapshot, write_snapshot
+
+
+def snapshot(path, since=None):
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        written = write_snapshot(db, path, since)
+        print(f"Wrote {written} bookings {'from ' + since.isoformat() if since else 'for all days'} "
+              f"to {path} in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        print(f"Error writing analytics snapshot: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def query(path, by, start=None, end=None):
+    for row in ColumnarSnapshot(path).aggregate(by, start, end):
+        print(f"{row['key']!s:<30} {row['bookings']:>10} bookings {row['tickets']:>10} tickets "
+              f"{row['gmv']:>14.2f} GMV")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write or query the columnar analytics snapshot")
+    parser.add_argument("--path", default=SNAPSHOT_DIR, help="Snapshot directory")
+    parser.add_argument("--since", type=date.fromisoformat,
+                        help="Only rewrite days from this date (YYYY-MM-DD) on")
+    parser.add_argument("--query", choices=["day", "hour", "genre", "city", "movie", "theater", "hall", "show"],
+                        help="Print aggregates from the existing snapshot instead of writing one")
+    parser.add_argument("--start", type=date.fromisoformat, help="First booking day for --query")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last booking day for --query")
+    args = parser.parse_args()
+    if args.query:
+        query(args.path, args.query, args.start, args.end)
+    else:
+        snapshot(args.path, args.since)
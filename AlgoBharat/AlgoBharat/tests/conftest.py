@@ -0,0 +1,111 @@
+"""
+Shared fixtures: process-wide caches reset around every test, an in-memory
+database with in-process service backends for the unit test modules, and a
+show factory for the API test modules
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import services
+from app.cache import CatalogCache
+from app.dashboard import DashboardBucketCache
+from app.database import Base
+from app.layout_cache import LocalLayoutVersions, layout_payloads
+from app.locks import LocalSeatLocks
+from app.models import Movie, Theater, Hall
+from app.schedule_index import hall_schedules
+from app.seat_inventory import seat_inventory
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Ids repeat across test databases; every test starts and ends with empty process-wide caches"""
+    def clear():
+        seat_inventory.clear()
+        hall_schedules.clear()
+        services.catalog_cache.clear()
+        layout_payloads.clear()
+        services.dashboard_buckets.clear()
+
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def local_backends(monkeypatch):
+    """In-process seat locks, layout versions and dashboard cache; catalog cache off"""
+    monkeypatch.setattr(services, "catalog_cache", CatalogCache(enabled=False))
+    monkeypatch.setattr(services, "seat_locks", LocalSeatLocks())
+    monkeypatch.setattr(services, "layout_versions", LocalLayoutVersions())
+    monkeypatch.setattr(services, "dashboard_buckets", DashboardBucketCache())
+
+
+@pytest.fixture
+def session_factory(local_backends):
+    """Sessions on a new in-memory database (one connection shared by all of them)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    db.engine = db.get_bind()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def seed_halls():
+    """Add a movie, a theater and one hall per layout to ``db``; returns (movie, theater, halls)"""
+    def seed(db, *layouts, duration_minutes=100):
+        movie = Movie(title="Test Movie", duration_minutes=duration_minutes, price=10.0)
+        theater = Theater(name="Test Theater", address="1 Test Street", city="Test City")
+        db.add_all([movie, theater])
+        db.flush()
+        halls = [Hall(theater_id=theater.id, name=f"Hall {n}", total_rows=len(layout), seats_per_row=layout)
+                 for n, layout in enumerate(layouts, 1)]
+        db.add_all(halls)
+        db.commit()
+        return movie, theater, halls
+    return seed
+
+
+@pytest.fixture
+def create_show(api_client):
+    """Create a movie, a theater, a hall with ``seats_per_row`` and one show in it, five days out.
+
+    Goes through the ``api_client`` of the requesting module; returns the show
+    (as the API returned it) and the hall id.
+    """
+    def create(seats_per_row, seat_mode=None):
+        movie_id = api_client.post("/api/v1/movies/", json={
+            "title": "Seat Mode Movie", "duration_minutes": 120, "price": 10.0
+        }).json()["id"]
+        theater_id = api_client.post("/api/v1/theaters/", json={
+            "name": "Seat Mode Theater", "address": "1 Mode Street", "city": "Mode City"
+        }).json()["id"]
+        hall_id = api_client.post(f"/api/v1/theaters/{theater_id}/halls", json={
+            "name": "Seat Mode Hall", "total_rows": len(seats_per_row), "seats_per_row": seats_per_row
+        }).json()["id"]
+        show_data = {
+            "movie_id": movie_id,
+            "theater_id": theater_id,
+            "hall_id": hall_id,
+            "show_time": (datetime.now() + timedelta(days=5)).isoformat(),
+            "price": 10.0
+        }
+        if seat_mode:
+            show_data["seat_mode"] = seat_mode
+        response = api_client.post("/api/v1/shows/", json=show_data)
+        assert response.status_code == 201
+        return response.json(), hall_id
+    return create
@@ -5,14 +5,15 @@ API Tests for AlgoBharat Movie Ticket Booking System
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 import json
 
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, get_session_factory, Base
 from app.models import Movie, Theater, Hall, Show, Seat, Booking
+from app.layout_cache import COMPACT_LAYOUT_MEDIA_TYPE
 
 
 # Create test database
@@ -31,9 +32,15 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
 
 client = TestClient(app)
 
+@pytest.fixture
+def api_client():
+    """The client the shared create_show factory (conftest.py) goes through"""
+    return client
+
 class TestMoviesAPI:
     def test_create_movie(self):
         movie_data = {
@@ -214,6 +221,45 @@ class TestShowsAPI:
         assert data["theater_id"] == theater_id
         assert data["hall_id"] == hall_id
 
+    def test_create_shows_in_bulk(self, create_show):
+        show, hall_id = create_show({"row1": 4, "row2": 4})
+        shows = [{"movie_id": show["movie_id"], "theater_id": show["theater_id"], "hall_id": hall_id,
+                  "show_time": (datetime.now() + timedelta(days=7, hours=3 * n)).isoformat(), "price": 9.5,
+                  "seat_mode": mode}
+                 for n, mode in enumerate(["materialized", "virtual", "materialized"])]
+        shows[2]["movie_id"] = 999999
+        response = client.post("/api/v1/shows/bulk", json={"shows": shows})
+        assert response.status_code == 201
+        created = response.json()["shows"]
+        assert [item["seat_mode"] for item in created] == ["materialized", "virtual"]
+        assert response.json()["errors"] == [{"index": 2, "detail": "Movie with id 999999 not found"}]
+        for item in created:
+            assert client.get(f"/api/v1/shows/{item['id']}").json() == item
+            layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={item['id']}").json()
+            assert len(layout["available_seats"]) == 8
+
+    def test_overlapping_shows_are_rejected(self, create_show):
+        show, hall_id = create_show({"row1": 2})
+        show_time = datetime.fromisoformat(show["show_time"])
+        payload = {"movie_id": show["movie_id"], "theater_id": show["theater_id"], "hall_id": hall_id,
+                   "show_time": (show_time + timedelta(minutes=90)).isoformat(), "price": 10.0}
+        response = client.post("/api/v1/shows/", json=payload)
+        assert response.status_code == 409
+        assert f"overlaps show {show['id']}" in response.json()["detail"]
+
+        # The movie runs 120 minutes and the hall is cleaned for 15 more
+        response = client.get(f"/api/v1/shows/hall/{hall_id}/next-free-slot",
+                              params={"duration_minutes": 100, "after": show["show_time"]})
+        assert response.status_code == 200
+        slot = response.json()
+        assert datetime.fromisoformat(slot["show_time"]) == show_time + timedelta(minutes=135)
+        assert datetime.fromisoformat(slot["ends_at"]) == show_time + timedelta(minutes=235)
+        later = client.post("/api/v1/shows/", json={**payload, "show_time": slot["show_time"]})
+        assert later.status_code == 201
+        assert client.put(f"/api/v1/shows/{later.json()['id']}",
+                          json={"show_time": show["show_time"]}).status_code == 409
+        assert client.get("/api/v1/shows/hall/999999/next-free-slot?duration_minutes=90").status_code == 404
+
 class TestBookingsAPI:
     def test_get_hall_layout(self):
         # Create all necessary data
@@ -266,6 +312,25 @@ class TestBookingsAPI:
         assert data["hall_id"] == hall_id
         assert "available_seats" in data
         assert "booked_seats" in data
+        
+        # The live stream of an unknown hall fails before any event is sent
+        response = client.get(f"/api/v1/bookings/halls/999999/layout/stream?show_id={show_id}")
+        assert response.status_code == 404
+
+    def test_layout_stream_reads_through_the_session_factory(self):
+        opened = []
+
+        def session_factory():
+            opened.append(1)
+            return TestingSessionLocal()
+
+        app.dependency_overrides[get_session_factory] = lambda: session_factory
+        try:
+            response = client.get("/api/v1/bookings/halls/999999/layout/stream?show_id=1")
+        finally:
+            app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+        assert response.status_code == 404
+        assert opened == [1]
 
     def test_find_consecutive_seats(self):
         # Create all necessary data
@@ -319,6 +384,541 @@ class TestBookingsAPI:
         assert data["num_seats_requested"] == 3
         assert "consecutive_seats_found" in data
 
+@pytest.fixture
+def seat_locks(monkeypatch):
+    """Use in-process seat locks so bookings work without a Redis server"""
+    from app import services
+    from app.locks import LocalSeatLocks
+    locks = LocalSeatLocks()
+    monkeypatch.setattr(services, "seat_locks", locks)
+    return locks
+
+class TestVirtualSeatMode:
+    def test_virtual_show_stores_no_seats_until_booked(self, seat_locks, create_show):
+        show, hall_id = create_show({"row1": 4, "row2": 5}, seat_mode="virtual")
+        assert show["seat_mode"] == "virtual"
+        db = TestingSessionLocal()
+        try:
+            assert db.query(Seat).filter(Seat.show_id == show["id"]).count() == 0
+        finally:
+            db.close()
+
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        assert len(layout["available_seats"]) == 9
+        assert layout["available_seats"][4] == {"id": 5, "row_number": 2, "seat_number": 1, "is_aisle": True}
+
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": [5, 6]
+        })
+        assert response.status_code == 201
+        assert response.json()["total_amount"] == 20.0
+        assert [(seat["row_number"], seat["seat_number"]) for seat in response.json()["seats"]] == [(2, 1), (2, 2)]
+
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        assert [seat["id"] for seat in layout["booked_seats"]] == [5, 6]
+        consecutive = client.get(f"/api/v1/bookings/shows/{show['id']}/consecutive-seats?num_seats=4").json()
+        assert [seat["id"] for seat in consecutive["consecutive_seats_found"]] == [1, 2, 3, 4]
+        consecutive = client.get(f"/api/v1/bookings/shows/{show['id']}/consecutive-seats?num_seats=5").json()
+        assert consecutive["consecutive_seats_found"] == []
+
+    def test_virtual_seat_cannot_be_booked_twice(self, seat_locks, create_show):
+        show, _ = create_show({"row1": 4}, seat_mode="virtual")
+        booking = {"user_id": 1, "show_id": show["id"], "seat_ids": [2]}
+        assert client.post("/api/v1/bookings/", json=booking).status_code == 201
+        assert client.post("/api/v1/bookings/", json=booking).status_code == 400
+        unknown = {"user_id": 1, "show_id": show["id"], "seat_ids": [99]}
+        assert client.post("/api/v1/bookings/", json=unknown).status_code == 400
+
+    @pytest.mark.parametrize("seat_mode", ["materialized", "virtual"])
+    def test_booking_returns_the_seat_ids_from_the_layout(self, seat_locks, seat_mode, create_show):
+        show, hall_id = create_show({"row1": 4, "row2": 4}, seat_mode=seat_mode)
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        seat_ids = [seat["id"] for seat in layout["available_seats"][2:5]]
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": 6060, "show_id": show["id"], "seat_ids": seat_ids
+        })
+        assert response.status_code == 201
+        booking = response.json()
+        assert [(seat["show_id"], seat["id"]) for seat in booking["seats"]] == [(show["id"], seat_id) for seat_id in seat_ids]
+        assert [seat["id"] for seat in client.get(f"/api/v1/bookings/{booking['id']}").json()["seats"]] == seat_ids
+        user_bookings = client.get("/api/v1/bookings/user/6060").json()
+        assert [seat["id"] for seat in user_bookings[-1]["seats"]] == seat_ids
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        assert [seat["id"] for seat in layout["booked_seats"]] == seat_ids
+
+    def test_materialized_booking_still_works(self, seat_locks, create_show):
+        show, hall_id = create_show({"row1": 4})
+        assert show["seat_mode"] == "materialized"
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        seat_ids = [seat["id"] for seat in layout["available_seats"][:2]]
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": seat_ids
+        })
+        assert response.status_code == 201
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        assert [seat["id"] for seat in layout["booked_seats"]] == seat_ids
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 2, "show_id": show["id"], "seat_ids": seat_ids
+        }).status_code == 400
+
+    def test_bulk_booking_across_shows(self, seat_locks, create_show):
+        first, _ = create_show({"row1": 4})
+        second, _ = create_show({"row1": 4}, seat_mode="virtual")
+        first_seats = [seat["id"] for seat in client.get(
+            f"/api/v1/bookings/halls/{first['hall_id']}/layout?show_id={first['id']}").json()["available_seats"]]
+        items = [{"show_id": second["id"], "seat_ids": [2, 3, 4]}, {"show_id": first["id"], "seat_ids": first_seats[:1]}]
+        response = client.post("/api/v1/bookings/bulk", json={"user_id": 8080, "items": items})
+        assert response.status_code == 201
+        bookings = response.json()["bookings"]
+        assert [(booking["show_id"], [seat["id"] for seat in booking["seats"]]) for booking in bookings] == \
+            [(second["id"], [2, 3, 4]), (first["id"], first_seats[:1])]
+        assert response.json()["total_amount"] == 40.0
+        assert client.post("/api/v1/bookings/bulk", json={"user_id": 8081, "items": [
+            {"show_id": first["id"], "seat_ids": first_seats[1:2]}, {"show_id": second["id"], "seat_ids": [1, 2]}
+        ]}).status_code == 400
+        assert client.get("/api/v1/bookings/user/8081").json() == []
+        assert client.post("/api/v1/bookings/bulk", json={"user_id": 8081, "items": items[:1] * 2}).status_code == 422
+
+    def test_user_bookings_list_their_seats(self, seat_locks, create_show):
+        show, _ = create_show({"row1": 4}, seat_mode="virtual")
+        for seat_ids in ([1, 2], [4]):
+            assert client.post("/api/v1/bookings/", json={
+                "user_id": 5150, "show_id": show["id"], "seat_ids": seat_ids
+            }).status_code == 201
+        response = client.get("/api/v1/bookings/user/5150")
+        assert response.status_code == 200
+        bookings = response.json()
+        assert [[seat["seat_number"] for seat in booking["seats"]] for booking in bookings] == [[1, 2], [4]]
+        assert bookings[0]["total_amount"] == 20.0 and bookings[0]["show_id"] == show["id"]
+        assert client.get("/api/v1/bookings/user/5151").json() == []
+
+class QueryCounter:
+    """Count SQL statements sent through the test engine"""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+class TestSeatSuggestions:
+    def create_movie_shows(self, create_show, count):
+        show, hall_id = create_show({"row1": 4, "row2": 6})
+        for day in range(1, count):
+            client.post("/api/v1/shows/", json={
+                "movie_id": show["movie_id"],
+                "theater_id": show["theater_id"],
+                "hall_id": hall_id,
+                # Offset from the first show (5 days out) so no two share the hall at once
+                "show_time": (datetime.now() + timedelta(days=day, hours=6)).isoformat(),
+                "price": 10.0,
+                "seat_mode": "virtual" if day % 2 else "materialized"
+            })
+        return show["movie_id"]
+
+    def suggestion_queries(self, movie_id, num_seats):
+        from app.seat_inventory import seat_inventory
+        from app.services import SeatService
+        seat_inventory.clear()
+        db = TestingSessionLocal()
+        try:
+            with QueryCounter() as counter:
+                suggestions = SeatService.suggest_alternative_shows(db, movie_id, num_seats)
+        finally:
+            db.close()
+        return suggestions, counter.count
+
+    def test_query_count_does_not_grow_with_shows(self, create_show):
+        few_suggestions, few_queries = self.suggestion_queries(self.create_movie_shows(create_show, 3), 5)
+        many_suggestions, many_queries = self.suggestion_queries(self.create_movie_shows(create_show, 12), 5)
+        assert len(few_suggestions) == 3
+        assert len(many_suggestions) == 12
+        assert few_queries == many_queries <= 3
+        assert many_suggestions[0]["hall_name"] == "Seat Mode Hall"
+        assert [seat["row_number"] for seat in many_suggestions[0]["available_seats"]] == [2] * 5
+
+    def test_shows_without_capacity_are_pruned(self, create_show):
+        suggestions, queries = self.suggestion_queries(self.create_movie_shows(create_show, 4), 11)
+        assert suggestions == []
+        assert queries == 2  # show metadata + availability counts; no seats are loaded
+
+    def test_suggestions_endpoint(self, create_show):
+        movie_id = self.create_movie_shows(create_show, 2)
+        response = client.get(f"/api/v1/bookings/movies/{movie_id}/suggestions?num_seats=4")
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+    def test_held_seats_drop_the_cached_inventory(self, seat_locks, create_show):
+        from app.seat_inventory import seat_inventory
+        show, _ = create_show({"row1": 4})
+        suggested = client.get(f"/api/v1/bookings/shows/{show['id']}/consecutive-seats?num_seats=2").json()
+        seat_ids = [seat["id"] for seat in suggested["consecutive_seats_found"]]
+        assert seat_inventory.get(show["id"]) is not None
+        # Another request is booking the suggested seats
+        token = seat_locks.acquire(show["id"], seat_ids)
+        response = client.post(f"/api/v1/bookings/group-booking?show_id={show['id']}&user_id=1&num_seats=2")
+        seat_locks.release(show["id"], seat_ids, token)
+        assert response.status_code == 400
+        assert seat_inventory.get(show["id"]) is None
+
+class TestOptimisticBooking:
+    @pytest.fixture(autouse=True)
+    def optimistic(self, monkeypatch):
+        from app import services
+        # No lock backend is needed; fail loudly if the optimistic path touches one
+        monkeypatch.setattr(services, "BOOKING_STRATEGY", services.BOOKING_STRATEGY_OPTIMISTIC)
+        monkeypatch.setattr(services, "seat_locks", None)
+
+    def test_claims_seats_without_a_lock(self, create_show):
+        show, hall_id = create_show({"row1": 4})
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        seat_ids = [seat["id"] for seat in layout["available_seats"][:2]]
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": seat_ids
+        })
+        assert response.status_code == 201
+        assert sorted(seat["id"] for seat in response.json()["seats"]) == seat_ids
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        assert [seat["id"] for seat in layout["booked_seats"]] == seat_ids
+
+    def test_partial_claim_rolls_back(self, create_show):
+        show, hall_id = create_show({"row1": 4})
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        seat_ids = [seat["id"] for seat in layout["available_seats"]]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": seat_ids[1:2]
+        }).status_code == 201
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 2, "show_id": show["id"], "seat_ids": seat_ids[:2]
+        }).status_code == 400
+
+        # Seat 0 must not have been left claimed by the failed request
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        assert [seat["id"] for seat in layout["booked_seats"]] == seat_ids[1:2]
+        db = TestingSessionLocal()
+        try:
+            assert db.query(Booking).filter(Booking.show_id == show["id"]).count() == 1
+        finally:
+            db.close()
+
+    def test_virtual_seat_cannot_be_booked_twice(self, create_show):
+        show, _ = create_show({"row1": 4}, seat_mode="virtual")
+        booking = {"user_id": 1, "show_id": show["id"], "seat_ids": [2, 3]}
+        assert client.post("/api/v1/bookings/", json=booking).status_code == 201
+        assert client.post("/api/v1/bookings/", json=booking).status_code == 400
+
+class TestBookingExport:
+    def test_streams_ndjson_and_csv(self, seat_locks, create_show):
+        show, _ = create_show({"row1": 4}, seat_mode="virtual")
+        booking = client.post("/api/v1/bookings/", json={
+            "user_id": 3, "show_id": show["id"], "seat_ids": [1, 2]
+        }).json()
+        
+        # "export" must reach the export route, not be parsed as a booking id
+        response = client.get(f"/api/v1/bookings/export?movie_id={show['movie_id']}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [(row["booking_id"], row["tickets"], row["theater_id"]) for row in rows] == [
+            (booking["id"], 2, show["theater_id"])
+        ]
+        
+        response = client.get(f"/api/v1/bookings/export?format=csv&theater_id={show['theater_id']}")
+        assert response.headers["content-disposition"] == 'attachment; filename="bookings.csv"'
+        lines = response.text.splitlines()
+        assert lines[0].startswith("booking_id,booking_reference,")
+        assert lines[1].startswith(f"{booking['id']},{booking['booking_reference']},")
+        assert client.get("/api/v1/bookings/export?format=xml").status_code == 422
+
+class TestLayoutETag:
+    @pytest.fixture(autouse=True)
+    def layout_versions(self, monkeypatch, seat_locks):
+        """In-process layout versions so ETags are served without a Redis server"""
+        from app import services
+        from app.layout_cache import LocalLayoutVersions
+        versions = LocalLayoutVersions()
+        monkeypatch.setattr(services, "layout_versions", versions)
+        return versions
+
+    @pytest.fixture
+    def statements(self):
+        statements = []
+        listener = lambda *args: statements.append(1)
+        event.listen(engine, "before_cursor_execute", listener)
+        yield statements
+        event.remove(engine, "before_cursor_execute", listener)
+
+    def layout(self, hall_id, show_id, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show_id}", headers=headers)
+
+    def test_unchanged_layout_is_not_modified(self, statements, create_show):
+        show, hall_id = create_show({"row1": 4})
+        # The first request finds the show and starts its versions
+        assert "etag" not in self.layout(hall_id, show["id"]).headers
+        response = self.layout(hall_id, show["id"])
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert len(response.json()["available_seats"]) == 4
+
+        statements.clear()
+        response = self.layout(hall_id, show["id"], etag)
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+        assert statements == []
+        assert self.layout(hall_id, show["id"], f'"other", {etag[2:]}').status_code == 304
+
+    def test_booking_changes_the_etag(self, create_show):
+        show, hall_id = create_show({"row1": 4})
+        self.layout(hall_id, show["id"])
+        response = self.layout(hall_id, show["id"])
+        etag = response.headers["etag"]
+        seat_id = response.json()["available_seats"][0]["id"]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": [seat_id]
+        }).status_code == 201
+
+        response = self.layout(hall_id, show["id"], etag)
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert [seat["id"] for seat in response.json()["booked_seats"]] == [seat_id]
+
+    def test_hall_update_changes_the_etag(self, create_show):
+        show, hall_id = create_show({"row1": 4})
+        self.layout(hall_id, show["id"])
+        etag = self.layout(hall_id, show["id"]).headers["etag"]
+        assert client.put(f"/api/v1/theaters/halls/{hall_id}", json={
+            "seats_per_row": {"row1": 6}
+        }).status_code == 200
+        response = self.layout(hall_id, show["id"], etag)
+        assert response.status_code == 200
+        assert response.json()["seats_per_row"] == {"row1": 6}
+
+    def test_payload_is_reused_while_the_version_is_current(self, statements, create_show):
+        show, hall_id = create_show({"row1": 4})
+        self.layout(hall_id, show["id"])
+        first = self.layout(hall_id, show["id"])
+        statements.clear()
+        second = self.layout(hall_id, show["id"])
+        assert second.content == first.content
+        assert statements == []
+
+    def test_unknown_hall_is_still_not_found(self):
+        assert self.layout(999999, 1).status_code == 404
+
+    def test_unknown_hall_is_not_answered_from_a_version(self, layout_versions):
+        # Made-up ids have no version, so even "*" cannot match
+        assert layout_versions.current(999999, 999999) is None
+        assert self.layout(999999, 999999, "*").status_code == 404
+
+    def test_compact_format_is_negotiated(self, statements, create_show):
+        show, hall_id = create_show({"row1": 4, "row2": 3})
+        full = self.layout(hall_id, show["id"])
+        seat_ids = [seat["id"] for seat in full.json()["available_seats"]]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": seat_ids[1:3]
+        }).status_code == 201
+        url = f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}"
+
+        compact = client.get(f"{url}&format=compact")
+        assert compact.status_code == 200
+        assert compact.headers["content-type"] == COMPACT_LAYOUT_MEDIA_TYPE
+        assert compact.headers["vary"] == "Accept"
+        assert compact.json()["rows"] == [
+            {"row_number": 1, "first_seat_id": seat_ids[0], "seats": "a2ba"},
+            {"row_number": 2, "first_seat_id": seat_ids[4], "seats": "3a"},
+        ]
+        assert compact.json()["aisle_seats"] == 3
+        accepted = client.get(url, headers={"Accept": f"{COMPACT_LAYOUT_MEDIA_TYPE}, application/json;q=0.5"})
+        assert accepted.content == compact.content
+        declined = client.get(url, headers={"Accept": f"{COMPACT_LAYOUT_MEDIA_TYPE};q=0, application/json"})
+        assert declined.headers["content-type"] == "application/json"
+
+        # Each representation has its own ETag
+        full_etag = declined.headers["etag"]
+        assert compact.headers["etag"] != full_etag
+        statements.clear()
+        assert client.get(f"{url}&format=compact", headers={"If-None-Match": compact.headers["etag"]}).status_code == 304
+        assert self.layout(hall_id, show["id"], full_etag).status_code == 304
+        assert statements == []
+        assert self.layout(hall_id, show["id"], compact.headers["etag"]).status_code == 200
+        assert client.get(f"{url}&format=xml").status_code == 422
+
+class VersionRedis:
+    """The Redis commands the layout versions use, backed by dicts"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        self.ttls[key] = ex
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self):
+        return VersionPipeline(self)
+
+
+class VersionPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((getattr(self.client, name), args, kwargs))
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.calls]
+
+
+class TestRedisLayoutVersions:
+    @pytest.fixture
+    def versions(self, monkeypatch, seat_locks):
+        from app import services
+        from app.layout_cache import RedisLayoutVersions
+        versions = RedisLayoutVersions(VersionRedis(), ttl_seconds=60)
+        monkeypatch.setattr(services, "layout_versions", versions)
+        return versions
+
+    def test_base_class_cannot_be_created(self):
+        from app.layout_cache import LayoutVersions
+        with pytest.raises(TypeError):
+            LayoutVersions()
+
+    def test_reads_do_not_create_counters(self, versions):
+        assert versions.current(999999, 999999) is None
+        assert self.layout(999999, 1).status_code == 404
+        assert versions.client.data == {}
+
+    def test_unknown_show_gets_no_counter(self, versions, create_show):
+        show, hall_id = create_show({"row1": 4})
+        response = self.layout(hall_id, show["id"] + 1000)
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert versions.client.data == {}
+
+    def test_counters_start_once_the_show_is_found(self, versions, create_show):
+        show, hall_id = create_show({"row1": 4})
+        first = self.layout(hall_id, show["id"])
+        assert first.status_code == 200
+        assert "etag" not in first.headers
+        assert set(versions.client.ttls.values()) == {60}
+
+        etag = self.layout(hall_id, show["id"]).headers["etag"]
+        assert self.layout(hall_id, show["id"], etag).status_code == 304
+        seat_id = first.json()["available_seats"][0]["id"]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": [seat_id]
+        }).status_code == 201
+        assert self.layout(hall_id, show["id"], etag).status_code == 200
+
+    def test_bump_sets_an_expiry(self, versions):
+        from app.layout_cache import _key
+        version = versions.bump("show", 7)
+        assert version == int(versions.client.data[_key("show", 7)])
+        assert versions.client.ttls[_key("show", 7)] == 60
+
+    def test_bump_on_the_event_loop_runs_in_a_worker_thread(self, tmp_path):
+        import asyncio
+        import threading
+        from sqlalchemy.pool import NullPool
+        from app.database import create_async_session_factory
+        from app.layout_cache import RedisLayoutVersions
+
+        class ThreadRedis(VersionRedis):
+            threads = []
+
+            def pipeline(self):
+                self.threads.append(threading.get_ident())
+                return super().pipeline()
+
+        versions = RedisLayoutVersions(ThreadRedis())
+        AsyncSessionLocal = create_async_session_factory(f"sqlite:///{tmp_path}/versions.db", poolclass=NullPool)
+
+        async def scenario():
+            async with AsyncSessionLocal() as db:
+                # As the async booking path bumps: sync code under run_sync
+                return await db.run_sync(lambda session: versions.bump_show(1))
+
+        assert asyncio.run(scenario()) is not None
+        assert ThreadRedis.threads and threading.get_ident() not in ThreadRedis.threads
+
+    def layout(self, hall_id, show_id, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show_id}", headers=headers)
+
+class TestPagination:
+    def test_shows_by_movie_page_through_cursors(self, create_show):
+        show, _ = create_show({"row1": 2})
+        movie_id = show["movie_id"]
+        base = datetime.fromisoformat(show["show_time"])
+        for offset in (-2, -1, 1, 1):
+            # Shows this close together need a hall each
+            hall_id = client.post(f"/api/v1/theaters/{show['theater_id']}/halls", json={
+                "name": f"Page Hall {offset}", "total_rows": 1, "seats_per_row": {"row1": 2}
+            }).json()["id"]
+            response = client.post("/api/v1/shows/", json={
+                "movie_id": movie_id, "theater_id": show["theater_id"], "hall_id": hall_id,
+                "show_time": (base + timedelta(hours=offset)).isoformat(), "price": 10.0
+            })
+            assert response.status_code == 201
+
+        seen, cursor = [], None
+        while True:
+            url = f"/api/v1/shows/movie/{movie_id}?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.json()) <= 2
+            seen.extend(response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        assert len(seen) == 5
+        keys = [(item["show_time"], item["id"]) for item in seen]
+        assert keys == sorted(keys)
+        assert len({item["id"] for item in seen}) == 5
+
+    def test_movie_pages_are_stable_under_inserts(self):
+        for title in ("Page One", "Page Two", "Page Three"):
+            client.post("/api/v1/movies/", json={"title": title, "duration_minutes": 90, "price": 5.0})
+        first = client.get("/api/v1/movies/?limit=1")
+        cursor = first.headers["x-next-cursor"]
+        page = client.get(f"/api/v1/movies/?limit=5&cursor={cursor}").json()
+        client.post("/api/v1/movies/", json={"title": "Late Movie", "duration_minutes": 90, "price": 5.0})
+        assert client.get(f"/api/v1/movies/?limit=5&cursor={cursor}").json()[:len(page)] == page
+        assert all(movie["id"] > first.json()[0]["id"] for movie in page)
+
+    def test_offset_paging_still_works(self):
+        assert client.get("/api/v1/theaters/?skip=1&limit=1").json() == client.get("/api/v1/theaters/").json()[1:2]
+
+    def test_bad_cursor_and_limit_are_rejected(self):
+        response = client.get("/api/v1/shows/?cursor=not-a-cursor")
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "InvalidCursorException"
+        assert client.get("/api/v1/shows/?limit=0").status_code == 422
+        assert client.get("/api/v1/shows/?limit=1001").status_code == 422
+
 class TestAnalyticsAPI:
     def test_movie_analytics(self):
         # Create movie
@@ -344,6 +944,27 @@ class TestAnalyticsAPI:
         assert "total_bookings" in data
         assert "total_tickets" in data
         assert "total_gmv" in data
+        
+        live = client.get(f"/api/v1/analytics/movies/{movie_id}?start_date={start_date}&end_date={end_date}"
+                          "&source=live")
+        assert live.status_code == 200
+        assert live.json()["total_bookings"] == data["total_bookings"]
+        invalid = client.get(f"/api/v1/analytics/movies/{movie_id}?start_date={start_date}&end_date={end_date}"
+                             "&source=cache")
+        assert invalid.status_code == 422
+
+    def test_dashboard(self):
+        start_date = (datetime.now() - timedelta(days=30)).isoformat()
+        end_date = datetime.now().isoformat()
+        response = client.get(f"/api/v1/analytics/dashboard?start_date={start_date}&end_date={end_date}&top=3")
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["summary"]) == {"total_bookings", "total_revenue", "total_tickets", "average_booking_value"}
+        assert len(data["top_movies"]) <= 3
+        assert all(movie["title"] for movie in data["top_movies"])
+        
+        response = client.get(f"/api/v1/analytics/dashboard?start_date={start_date}&end_date={end_date}&top=0")
+        assert response.status_code == 422
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+API tests for the async request path (ASYNC_MODE=1 routers on an AsyncSession)
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from datetime import datetime, timedelta
+
+from app.database import Base, get_async_db, get_async_session_factory, create_async_session_factory
+from app.locks import AsyncLocalSeatLocks, LocalSeatLocks
+from app.layout_cache import COMPACT_LAYOUT_MEDIA_TYPE, LocalLayoutVersions
+from app.routers.aio import movies, theaters, shows, bookings, analytics
+
+
+# Create test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_async.db"
+Base.metadata.drop_all(bind=create_engine(SQLALCHEMY_DATABASE_URL))
+Base.metadata.create_all(bind=create_engine(SQLALCHEMY_DATABASE_URL))
+
+# NullPool: connections are not reused across the event loops of different clients
+TestingAsyncSessionLocal = create_async_session_factory(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+app = FastAPI()
+for module in (movies, theaters, shows, bookings, analytics):
+    app.include_router(module.router, prefix="/api/v1")
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_session_factory] = lambda: TestingAsyncSessionLocal
+
+client = TestClient(app)
+
+@pytest.fixture
+def api_client():
+    """The client the shared create_show factory (conftest.py) goes through"""
+    return client
+
+
+@pytest.fixture(autouse=True)
+def async_seat_locks(monkeypatch):
+    """Use in-process seat locks so bookings work without a Redis server"""
+    from app import async_services
+    locks = AsyncLocalSeatLocks(LocalSeatLocks())
+    monkeypatch.setattr(async_services, "async_seat_locks", locks)
+    return locks
+
+class TestAsyncAPI:
+    def test_catalog_crud(self):
+        response = client.post("/api/v1/movies/", json={
+            "title": "Async Crud", "duration_minutes": 90, "price": 8.0
+        })
+        assert response.status_code == 201
+        movie_id = response.json()["id"]
+        assert client.get(f"/api/v1/movies/{movie_id}").json()["title"] == "Async Crud"
+        assert client.put(f"/api/v1/movies/{movie_id}", json={"price": 9.0}).json()["price"] == 9.0
+        assert client.delete(f"/api/v1/movies/{movie_id}").status_code == 204
+        assert client.get(f"/api/v1/movies/{movie_id}").status_code == 404
+
+    def test_booking_round_trip(self, create_show):
+        show, hall_id = create_show({"row1": 4, "row2": 4})
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        seat_ids = [seat["id"] for seat in layout["available_seats"][:2]]
+
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": 7, "show_id": show["id"], "seat_ids": seat_ids
+        })
+        assert response.status_code == 201
+        booking = response.json()
+        assert booking["total_amount"] == 20.0
+        assert sorted(seat["id"] for seat in booking["seats"]) == seat_ids
+
+        assert client.get(f"/api/v1/bookings/{booking['id']}").json()["booking_reference"] == booking["booking_reference"]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 8, "show_id": show["id"], "seat_ids": seat_ids
+        }).status_code == 400
+
+    def test_export_streams_bookings(self, create_show):
+        show, _ = create_show({"row1": 4}, seat_mode="virtual")
+        booking = client.post("/api/v1/bookings/", json={
+            "user_id": 9, "show_id": show["id"], "seat_ids": [3, 4]
+        }).json()
+        assert [seat["id"] for seat in booking["seats"]] == [3, 4]
+        assert [seat["id"] for seat in client.get(f"/api/v1/bookings/{booking['id']}").json()["seats"]] == [3, 4]
+        response = client.get(f"/api/v1/bookings/export?format=ndjson&movie_id={show['movie_id']}")
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [(row["booking_id"], row["tickets"]) for row in rows] == [(booking["id"], 2)]
+        csv_lines = client.get(f"/api/v1/bookings/export?format=csv&theater_id={show['theater_id']}").text.splitlines()
+        assert len(csv_lines) == 2
+
+    def test_group_booking_and_virtual_show(self, create_show):
+        show, _ = create_show({"row1": 4}, seat_mode="virtual")
+        response = client.post(f"/api/v1/bookings/group-booking?show_id={show['id']}&user_id=1&num_seats=3")
+        assert response.json()["success"] is True
+        response = client.post(f"/api/v1/bookings/group-booking?show_id={show['id']}&user_id=1&num_seats=3")
+        assert response.json()["success"] is False
+
+    def test_concurrent_bookings_of_one_seat(self, create_show):
+        """Only one of several simultaneous requests for the same seats may win"""
+        show, hall_id = create_show({"row1": 4})
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}").json()
+        seat_ids = [seat["id"] for seat in layout["available_seats"][:2]]
+
+        async def book_concurrently():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                return await asyncio.gather(*[
+                    async_client.post("/api/v1/bookings/", json={
+                        "user_id": user_id, "show_id": show["id"], "seat_ids": seat_ids
+                    })
+                    for user_id in range(8)
+                ])
+
+        responses = asyncio.run(book_concurrently())
+        assert sorted(response.status_code for response in responses) == [201] + [400] * 7
+
+    def test_bulk_booking_is_all_or_nothing(self, create_show):
+        first, _ = create_show({"row1": 4})
+        second, _ = create_show({"row1": 4}, seat_mode="virtual")
+        first_seats = [seat["id"] for seat in client.get(
+            f"/api/v1/bookings/halls/{first['hall_id']}/layout?show_id={first['id']}").json()["available_seats"]]
+
+        async def book_concurrently():
+            # The same two shows, listed in opposite orders: one request wins outright
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                return await asyncio.gather(*[
+                    async_client.post("/api/v1/bookings/bulk", json={"user_id": user_id, "items": items})
+                    for user_id, items in enumerate([
+                        [{"show_id": first["id"], "seat_ids": first_seats[:2]}, {"show_id": second["id"], "seat_ids": [1]}],
+                        [{"show_id": second["id"], "seat_ids": [1, 2]}, {"show_id": first["id"], "seat_ids": first_seats[1:3]}],
+                    ] * 3)
+                ])
+
+        responses = asyncio.run(book_concurrently())
+        assert sorted(response.status_code for response in responses) == [201] + [400] * 5
+        (winner,) = [response.json() for response in responses if response.status_code == 201]
+        assert len(winner["bookings"]) == 2
+        assert winner["total_amount"] == sum(booking["total_amount"] for booking in winner["bookings"])
+        layout = client.get(f"/api/v1/bookings/halls/{first['hall_id']}/layout?show_id={first['id']}").json()
+        assert len(layout["booked_seats"]) == 2
+        assert client.post("/api/v1/bookings/bulk", json={
+            "user_id": 1, "items": [{"show_id": 999999, "seat_ids": [1]}]
+        }).status_code == 404
+
+    def test_layout_etag(self, monkeypatch, create_show):
+        from app import services
+        monkeypatch.setattr(services, "layout_versions", LocalLayoutVersions())
+        show, hall_id = create_show({"row1": 4})
+        url = f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}"
+        assert "etag" not in client.get(url).headers
+        response = client.get(url)
+        etag = response.headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        seat_id = response.json()["available_seats"][0]["id"]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": [seat_id]
+        }).status_code == 201
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert [seat["id"] for seat in response.json()["booked_seats"]] == [seat_id]
+        stream = client.get(f"/api/v1/bookings/halls/999999/layout/stream?show_id={show['id']}")
+        assert stream.status_code == 404
+
+    def test_compact_layout(self, monkeypatch, create_show):
+        from app import services
+        monkeypatch.setattr(services, "layout_versions", LocalLayoutVersions())
+        show, hall_id = create_show({"row1": 5})
+        url = f"/api/v1/bookings/halls/{hall_id}/layout?show_id={show['id']}"
+        seat_ids = [seat["id"] for seat in client.get(url).json()["available_seats"]]
+        assert client.post("/api/v1/bookings/", json={
+            "user_id": 1, "show_id": show["id"], "seat_ids": seat_ids[-2:]
+        }).status_code == 201
+
+        response = client.get(url, headers={"Accept": COMPACT_LAYOUT_MEDIA_TYPE})
+        assert response.headers["content-type"] == COMPACT_LAYOUT_MEDIA_TYPE
+        assert response.json()["rows"] == [{"row_number": 1, "first_seat_id": seat_ids[0], "seats": "3a2b"}]
+        etag = response.headers["etag"]
+        assert client.get(f"{url}&format=compact", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_shows_by_theater_pages(self, create_show):
+        show, hall_id = create_show({"row1": 2})
+        client.post("/api/v1/shows/", json={
+            "movie_id": show["movie_id"], "theater_id": show["theater_id"], "hall_id": hall_id,
+            "show_time": (datetime.fromisoformat(show["show_time"]) + timedelta(days=1)).isoformat(), "price": 10.0
+        })
+        response = client.get(f"/api/v1/shows/theater/{show['theater_id']}?limit=1")
+        assert [item["id"] for item in response.json()] == [show["id"]]
+        cursor = response.headers["x-next-cursor"]
+        response = client.get(f"/api/v1/shows/theater/{show['theater_id']}?limit=1&cursor={cursor}")
+        assert len(response.json()) == 1
+        assert "x-next-cursor" not in response.headers
+
+    def test_bulk_show_creation(self, create_show):
+        show, hall_id = create_show({"row1": 3})
+        shows = [{"movie_id": show["movie_id"], "theater_id": show["theater_id"], "hall_id": hall,
+                  "show_time": (datetime.now() + timedelta(days=3, hours=3 * n)).isoformat(), "price": 10.0}
+                 for n, hall in enumerate([hall_id, 999999, hall_id])]
+        response = client.post("/api/v1/shows/bulk", json={"shows": shows})
+        assert response.status_code == 201
+        assert len(response.json()["shows"]) == 2
+        assert response.json()["errors"] == [{"index": 1, "detail": "Hall with id 999999 not found"}]
+        created = response.json()["shows"][1]
+        layout = client.get(f"/api/v1/bookings/halls/{hall_id}/layout?show_id={created['id']}").json()
+        assert len(layout["available_seats"]) == 3
+        assert client.post("/api/v1/shows/bulk", json={"shows": []}).status_code == 422
+        # Both the batch and single creation check the hall's schedule
+        assert client.post("/api/v1/shows/", json=shows[0]).status_code == 409
+        response = client.post("/api/v1/shows/bulk", json={"shows": shows[:1]})
+        assert response.json()["errors"][0]["detail"].startswith("Show at")
+        slot = client.get(f"/api/v1/shows/hall/{hall_id}/next-free-slot",
+                          params={"duration_minutes": 60, "after": shows[0]["show_time"]}).json()
+        assert datetime.fromisoformat(slot["show_time"]) > datetime.fromisoformat(shows[0]["show_time"])
+
+    def test_concurrent_shows_in_one_slot(self, create_show):
+        """Requests interleaved on the event loop's thread all pass its schedule lock; the hall row decides"""
+        show, hall_id = create_show({"row1": 3})
+
+        def slot(days, n):
+            return {"movie_id": show["movie_id"], "theater_id": show["theater_id"], "hall_id": hall_id,
+                    "show_time": (datetime.now() + timedelta(days=days, minutes=10 * n)).isoformat(), "price": 10.0}
+
+        async def post_concurrently(requests):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                return await asyncio.gather(*[async_client.post(path, json=body) for path, body in requests])
+
+        responses = asyncio.run(post_concurrently([("/api/v1/shows/", slot(2, n)) for n in range(5)]))
+        assert sorted(response.status_code for response in responses) == [201] + [409] * 4
+
+        # A batch racing single creations: one show takes the slot, whichever wins
+        responses = asyncio.run(post_concurrently(
+            [("/api/v1/shows/bulk", {"shows": [slot(1, 0), slot(1, 1)]})] +
+            [("/api/v1/shows/", slot(1, n)) for n in range(2, 5)]
+        ))
+        batch, *singles = responses
+        assert len(batch.json()["shows"]) + [response.status_code for response in singles].count(201) == 1
+        shows = client.get(f"/api/v1/shows/theater/{show['theater_id']}?limit=10").json()
+        assert len(shows) == 3
+
+    def test_analytics(self, create_show):
+        show, _ = create_show({"row1": 4})
+        response = client.get(f"/api/v1/analytics/movies/{show['movie_id']}/last-30-days")
+        assert response.status_code == 200
+        response = client.get(f"/api/v1/analytics/theaters/{show['theater_id']}/last-30-days?source=live")
+        assert response.status_code == 200
+        now = datetime.now()
+        response = client.get("/api/v1/analytics/dashboard", params={
+            "start_date": (now - timedelta(days=1)).isoformat(), "end_date": now.isoformat(), "rank_by": "tickets"
+        })
+        assert response.status_code == 200
+        assert "average_booking_value" in response.json()["summary"]
+        assert client.get("/api/v1/analytics/movies/999999/last-30-days").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
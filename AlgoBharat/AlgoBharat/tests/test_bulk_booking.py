@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bulk bookings across several shows (one transaction, all or nothing)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
+
+from app import services
+from app.exceptions import InsufficientSeatsException, SeatAlreadyBookedException, ShowNotFoundException
+from app.models import Seat, Booking, OutboxEvent, DailyMovieStats
+from app.schemas import BulkBookingCreate, ShowCreate
+from app.seat_inventory import seat_inventory
+from app.services import BookingService, SeatService, ShowService
+
+
+@pytest.fixture
+def db(db, seed_halls):
+    movie, theater, (hall,) = seed_halls(db, {"row1": 6})
+    db.movie_id = movie.id
+    db.shows = [
+        ShowService.create_show(db, ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                                               show_time=datetime(2030, 1, 1, 10) + timedelta(hours=3 * n),
+                                               price=10.0 + n, seat_mode=mode))
+        for n, mode in enumerate(["materialized", "materialized", "virtual"])
+    ]
+    db.seat_ids = {
+        show.id: [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+        for show in db.shows[:2]
+    }
+    return db
+
+
+def bulk(user_id, *items):
+    return BulkBookingCreate(user_id=user_id, items=[{"show_id": show_id, "seat_ids": seat_ids}
+                                                     for show_id, seat_ids in items])
+
+
+class TestBulkBooking:
+    def test_books_every_show_in_one_commit(self, db):
+        first, second, virtual = db.shows
+        commits = []
+        event.listen(db.engine, "commit", lambda connection: commits.append(1))
+        bookings = BookingService.create_bulk_booking(db, bulk(
+            7, (second.id, db.seat_ids[second.id][:2]), (virtual.id, [5, 6]), (first.id, db.seat_ids[first.id][3:4])
+        ))
+        assert commits == [1]
+        assert [booking["show_id"] for booking in bookings] == [second.id, virtual.id, first.id]
+        assert [booking["total_amount"] for booking in bookings] == [22.0, 24.0, 10.0]
+        assert [seat["id"] for seat in bookings[0]["seats"]] == db.seat_ids[second.id][:2]
+        assert [(seat["id"], seat["row_number"], seat["seat_number"]) for seat in bookings[1]["seats"]] == \
+            [(5, 1, 5), (6, 1, 6)]
+        assert all(seat["is_booked"] for booking in bookings for seat in booking["seats"])
+
+        # Each booking is counted and announced as a single booking would be
+        assert db.query(OutboxEvent).count() == 3
+        (stats,) = db.query(DailyMovieStats).all()
+        assert (stats.bookings, stats.tickets, stats.gmv) == (3, 5, 56.0)
+        layout = SeatService.get_hall_layout(db, first.hall_id, first.id, SeatService.get_layout_version(
+            first.hall_id, first.id))
+        assert [seat["id"] for seat in layout["booked_seats"]] == db.seat_ids[first.id][3:4]
+
+    @pytest.mark.parametrize("strategy", ["locked", "optimistic"])
+    def test_one_unavailable_seat_books_nothing(self, db, strategy):
+        first, second, virtual = db.shows
+        BookingService.create_bulk_booking(db, bulk(1, (second.id, db.seat_ids[second.id][2:3])))
+        with pytest.raises(InsufficientSeatsException):
+            BookingService.create_bulk_booking(db, bulk(
+                2, (first.id, db.seat_ids[first.id][:2]), (second.id, db.seat_ids[second.id][1:3])
+            ), strategy=strategy)
+        # A seat id belonging to another show is not available either
+        with pytest.raises(InsufficientSeatsException):
+            BookingService.create_bulk_booking(db, bulk(2, (first.id, db.seat_ids[second.id][:1])),
+                                               strategy=strategy)
+        BookingService.create_bulk_booking(db, bulk(1, (virtual.id, [1])))
+        with pytest.raises((InsufficientSeatsException, SeatAlreadyBookedException)):
+            BookingService.create_bulk_booking(db, bulk(
+                2, (first.id, db.seat_ids[first.id][:2]), (virtual.id, [1, 2])
+            ), strategy=strategy)
+        with pytest.raises(InsufficientSeatsException):
+            BookingService.create_bulk_booking(db, bulk(2, (virtual.id, [99])), strategy=strategy)
+
+        db.rollback()
+        assert db.query(Booking).filter(Booking.user_id == 2).count() == 0
+        assert db.query(Seat).filter(Seat.show_id == first.id, Seat.is_booked == True).count() == 0
+        assert db.query(OutboxEvent).count() == 2
+
+    def test_held_seat_fails_the_whole_request(self, db):
+        first, second, _ = db.shows
+        for show in (first, second):
+            SeatService.find_consecutive_seats(db, show.id, 1)
+        token = services.seat_locks.acquire(second.id, db.seat_ids[second.id][:1])
+        with pytest.raises(SeatAlreadyBookedException):
+            BookingService.create_bulk_booking(db, bulk(
+                1, (first.id, db.seat_ids[first.id][:1]), (second.id, db.seat_ids[second.id][:1])
+            ))
+        services.seat_locks.release(second.id, db.seat_ids[second.id][:1], token)
+        # Both shows are suggested from fresh state next time
+        assert seat_inventory.get(first.id) is None and seat_inventory.get(second.id) is None
+        # The first show's seat was released when the second could not be locked
+        assert services.seat_locks.acquire(first.id, db.seat_ids[first.id][:1], wait_ms=0) is not None
+
+    def test_unknown_show_and_repeated_show(self, db):
+        with pytest.raises(ShowNotFoundException):
+            BookingService.create_bulk_booking(db, bulk(1, (db.shows[0].id, [1]), (999, [1])))
+        with pytest.raises(ValidationError):
+            bulk(1, (db.shows[0].id, [1]), (db.shows[0].id, [2]))
+        with pytest.raises(ValidationError):
+            bulk(1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
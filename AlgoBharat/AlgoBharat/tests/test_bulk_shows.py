@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for creating a batch of shows (ShowService.create_shows)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Seat, Show
+from app.schemas import ShowCreate
+from app.services import ShowService
+
+
+@pytest.fixture
+def db(db, seed_halls):
+    movie, theater, db.halls = seed_halls(db, *({"row1": 4, "row2": n + 2} for n in range(2)))
+    db.movie_id, db.theater_id = movie.id, theater.id
+    return db
+
+
+def schedule(db, count, **overrides):
+    return [
+        ShowCreate(**{"movie_id": db.movie_id, "theater_id": db.theater_id, "hall_id": db.halls[n % 2].id,
+                      "show_time": datetime(2030, 1, 1, 10) + timedelta(hours=3 * n), "price": 10.0 + n,
+                      **overrides})
+        for n in range(count)
+    ]
+
+
+def seat_rows(db, show_id):
+    return db.query(Seat.hall_id, Seat.row_number, Seat.seat_number, Seat.is_aisle, Seat.is_booked) \
+        .filter(Seat.show_id == show_id).order_by(Seat.row_number, Seat.seat_number).all()
+
+
+class TestBulkShows:
+    def test_seats_match_single_show_creation(self, db):
+        shows, errors = ShowService.create_shows(db, schedule(db, 4))
+        assert errors == []
+        assert [show["price"] for show in shows] == [10.0, 11.0, 12.0, 13.0]
+        assert all(show["created_at"] is not None for show in shows)
+        for show, payload in zip(shows, schedule(db, 4)):
+            payload.show_time += timedelta(days=365)
+            single = ShowService.create_show(db, payload)
+            assert seat_rows(db, show["id"]) == seat_rows(db, single.id)
+            assert len(seat_rows(db, show["id"])) == 4 + payload.hall_id - db.halls[0].id + 2
+
+    def test_unknown_references_are_reported_per_item(self, db):
+        payloads = schedule(db, 5)
+        payloads[1].movie_id = 999
+        payloads[3].hall_id = 998
+        payloads[4].theater_id = 997
+        shows, errors = ShowService.create_shows(db, payloads)
+        assert [show["price"] for show in shows] == [10.0, 12.0]
+        assert errors == [{"index": 1, "detail": "Movie with id 999 not found"},
+                          {"index": 3, "detail": "Hall with id 998 not found"},
+                          {"index": 4, "detail": "Theater with id 997 not found"}]
+        assert db.query(Show).count() == 2
+
+    def test_mixed_seat_modes_keep_request_order(self, db):
+        payloads = schedule(db, 4)
+        for payload in payloads[::2]:
+            payload.seat_mode = "virtual"
+        shows, _ = ShowService.create_shows(db, payloads)
+        assert [show["seat_mode"] for show in shows] == ["virtual", "materialized"] * 2
+        assert [show["price"] for show in shows] == [10.0, 11.0, 12.0, 13.0]
+        virtual = db.get(Show, shows[0]["id"])
+        assert virtual.seat_layout == db.halls[0].seats_per_row
+        assert db.get(Show, shows[1]["id"]).seat_layout is None
+        assert seat_rows(db, virtual.id) == []
+
+    def test_statements_do_not_grow_with_the_batch(self, db):
+        def create_year(year, count):
+            payloads = schedule(db, count)
+            for payload in payloads:
+                payload.show_time += timedelta(days=365 * year)
+            statements.clear()
+            ShowService.create_shows(db, payloads)
+            return len(statements)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        create_year(0, 2)  # loads both halls' schedules
+        small = create_year(1, 2)
+        # SQLite inserts the show rows one at a time; everything else is per batch
+        assert create_year(2, 40) - 40 == small - 2
+        # One seat statement for the shows of both halls
+        assert len([statement for statement in statements if "INSERT INTO seats" in statement]) == 1
+        assert db.query(Seat).count() == 22 * 6 + 22 * 7
+        assert len(ShowService.get_schedule(db, db.halls[0].id)) == 22
+
+if __name__ == "__main__":
+    pytest.main([__file__])
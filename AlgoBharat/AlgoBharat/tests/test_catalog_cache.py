@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the two-tier catalog cache
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import services
+from app.cache import CatalogCache
+from app.database import Base, create_async_session_factory
+from app.main import app
+from app.models import Movie, Theater, Show
+
+
+class DictRedis:
+    """The three Redis commands the cache uses, backed by a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class DownRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+    set = delete = get
+
+
+@pytest.fixture
+def session_factory(session_factory, seed_halls):
+    SessionLocal = session_factory
+    statements = []
+    event.listen(SessionLocal.kw["bind"], "before_cursor_execute", lambda *args: statements.append(1))
+
+    db = SessionLocal()
+    movie, theater, (hall,) = seed_halls(db, {"row1": 4})
+    db.add(Show(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                show_time=datetime(2030, 1, 1, 18, 30), price=9.0))
+    db.commit()
+    db.close()
+    statements.clear()
+    return SessionLocal, statements
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CatalogCache(DictRedis())
+    monkeypatch.setattr(services, "catalog_cache", cache)
+    return cache
+
+
+class TestCatalogCache:
+    def test_l1_hit_skips_the_database(self, session_factory, cache):
+        SessionLocal, statements = session_factory
+        for _ in range(3):
+            db = SessionLocal()
+            assert services.HallService.get_hall(db, 1).seats_per_row == {"row1": 4}
+            db.close()
+        assert len(statements) == 1
+        assert cache.stats()["kinds"]["halls"] == {
+            "l1_hits": 2, "l2_hits": 0, "misses": 1, "invalidations": 0, "l2_errors": 0, "hit_ratio": 0.6667
+        }
+
+    def test_l2_hit_is_attached_to_the_session(self, session_factory, cache):
+        SessionLocal, statements = session_factory
+        db = SessionLocal()
+        services.ShowService.get_show(db, 1)
+        db.close()
+
+        # Another process: empty L1, same Redis
+        other = CatalogCache(cache.redis)
+        db = SessionLocal()
+        statements.clear()
+        show = other.get(db, Show, 1)
+        assert statements == []
+        assert show.show_time == datetime(2030, 1, 1, 18, 30)
+        assert show in db
+        # Relationships still lazy load from the attached copy
+        assert show.hall.name == "Hall 1"
+        assert other.stats()["kinds"]["shows"]["l2_hits"] == 1
+        db.close()
+
+    def test_updates_and_deletes_invalidate_both_tiers(self, session_factory, cache):
+        SessionLocal, _ = session_factory
+        db = SessionLocal()
+        assert services.MovieService.get_movie(db, 1).price == 10.0
+        services.MovieService.update_movie(db, 1, {"price": 11.0})
+        db.close()
+        assert "catalog:movies:1" not in cache.redis.data
+
+        db = SessionLocal()
+        assert services.MovieService.get_movie(db, 1).price == 11.0
+        db.close()
+
+        db = SessionLocal()
+        services.ShowService.get_show(db, 1)
+        assert services.ShowService.delete_show(db, 1)
+        db.close()
+        db = SessionLocal()
+        assert services.ShowService.get_show(db, 1) is None
+        db.close()
+
+    def test_redis_outage_falls_back_to_l1(self, session_factory, monkeypatch):
+        SessionLocal, statements = session_factory
+        down = DownRedis()
+        cache = CatalogCache(down)
+        for _ in range(3):
+            db = SessionLocal()
+            assert cache.get(db, Theater, 1).name == "Test Theater"
+            db.close()
+        # One failed lookup trips the breaker; the row is still cached locally
+        assert down.calls == 1
+        assert len(statements) == 1
+        assert cache.stats()["kinds"]["theaters"]["l2_errors"] == 1
+
+    def test_l1_is_bounded_and_expires(self, session_factory):
+        SessionLocal, statements = session_factory
+        cache = CatalogCache(max_entries=1, l1_ttl=60)
+        db = SessionLocal()
+        cache.get(db, Movie, 1)
+        cache.get(db, Theater, 1)
+        db.close()
+        assert cache.stats()["l1_entries"] == 1
+
+        cache = CatalogCache(l1_ttl=0)
+        for _ in range(2):
+            db = SessionLocal()
+            cache.get(db, Movie, 1)
+            db.close()
+        assert cache.stats()["kinds"]["movies"]["misses"] == 2
+
+    def test_disabled_cache_always_queries(self, session_factory):
+        SessionLocal, statements = session_factory
+        cache = CatalogCache(enabled=False)
+        for _ in range(2):
+            db = SessionLocal()
+            cache.get(db, Movie, 1)
+            db.close()
+        assert len(statements) == 2
+
+    def test_l2_calls_leave_the_event_loop_free(self, tmp_path):
+        class SlowRedis(DictRedis):
+            threads = []
+
+            def get(self, key):
+                self.threads.append(threading.get_ident())
+                time.sleep(0.2)
+                return super().get(key)
+
+        database_url = f"sqlite:///{tmp_path}/cache.db"
+        engine = create_engine(database_url)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(Movie(title="Loop Movie", duration_minutes=100, price=9.0))
+            db.commit()
+        engine.dispose()
+        AsyncSessionLocal = create_async_session_factory(database_url, poolclass=NullPool)
+        cache = CatalogCache(SlowRedis())
+
+        async def scenario():
+            ticks = []
+
+            async def tick():
+                while True:
+                    ticks.append(1)
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.create_task(tick())
+            async with AsyncSessionLocal() as db:
+                # As the async services call the cache: sync code under run_sync
+                movie = await db.run_sync(lambda session: cache.get(session, Movie, 1))
+                cache.clear()
+                await db.run_sync(lambda session: cache.invalidate(Movie, 1))
+            ticker.cancel()
+            return movie.title, len(ticks)
+
+        title, ticks = asyncio.run(scenario())
+        assert title == "Loop Movie"
+        # Other tasks kept running through the Redis round trip, which was made in a worker thread
+        assert ticks >= 10
+        assert SlowRedis.threads and threading.get_ident() not in SlowRedis.threads
+        assert cache.stats()["kinds"]["movies"]["l2_errors"] == 0
+
+    def test_cache_stats_endpoint(self, monkeypatch):
+        from app.routers import internal
+        monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "ops-token")
+        response = TestClient(app).get("/internal/cache-stats", headers={"X-Internal-Token": "ops-token"})
+        assert response.status_code == 200
+        assert "kinds" in response.json()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the columnar analytics snapshot
+"""
+
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from app.columnar import ColumnarSnapshot, write_snapshot
+from app.models import Movie, Theater, Hall, Show, Seat, Booking
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([Movie(id=1, title="Action", genre="Action", duration_minutes=100, price=10.0),
+                Movie(id=2, title="Drama", genre="Drama", duration_minutes=100, price=10.0),
+                Movie(id=3, title="Untagged", duration_minutes=100, price=10.0)])
+    db.add_all([Theater(id=1, name="North", address="1 Street", city="Pune"),
+                Theater(id=2, name="South", address="2 Street", city="Mumbai")])
+    db.flush()
+    db.add_all([Hall(id=hall_id, theater_id=hall_id, name="Hall", total_rows=1, seats_per_row={"row1": 10})
+                for hall_id in (1, 2)])
+    db.flush()
+    # Show n: movie n in theater 1, except show 2 which plays in theater 2
+    db.add_all([Show(id=1, movie_id=1, theater_id=1, hall_id=1, show_time=datetime(2030, 1, 9), price=10.0),
+                Show(id=2, movie_id=2, theater_id=2, hall_id=2, show_time=datetime(2030, 1, 9), price=10.0),
+                Show(id=3, movie_id=3, theater_id=1, hall_id=1, show_time=datetime(2030, 1, 9), price=10.0)])
+    db.commit()
+    return db
+
+
+def book(db, booking_id, show_id, booking_time, tickets, status="confirmed"):
+    db.execute(insert(Booking), [{
+        "id": booking_id, "user_id": 1, "show_id": show_id, "booking_reference": f"BK{booking_id}",
+        "total_amount": 10.0 * tickets, "booking_status": status, "booking_time": booking_time
+    }])
+    db.execute(insert(Seat), [
+        {"show_id": show_id, "hall_id": 1 if show_id != 2 else 2, "row_number": booking_id, "seat_number": n,
+         "is_booked": True, "booking_id": booking_id}
+        for n in range(1, tickets + 1)
+    ])
+    db.commit()
+
+
+def rows(result):
+    return [(row["key"], row["bookings"], row["tickets"], row["gmv"]) for row in result]
+
+
+class TestColumnarSnapshot:
+    def test_group_by_aggregates(self, db, tmp_path):
+        book(db, 1, 1, datetime(2030, 1, 1, 9, 30), 2)
+        book(db, 2, 2, datetime(2030, 1, 1, 21, 0), 1)
+        book(db, 3, 1, datetime(2030, 1, 2, 9, 5), 3)
+        book(db, 4, 3, datetime(2030, 1, 3, 22, 0), 1)
+        book(db, 5, 1, datetime(2030, 1, 3, 10, 0), 4, status="cancelled")
+        assert write_snapshot(db, str(tmp_path)) == 4
+
+        snapshot = ColumnarSnapshot(str(tmp_path))
+        assert snapshot.days() == [date(2030, 1, 1), date(2030, 1, 2), date(2030, 1, 3)]
+        assert rows(snapshot.aggregate("day")) == [
+            ("2030-01-01", 2, 3, 30.0), ("2030-01-02", 1, 3, 30.0), ("2030-01-03", 1, 1, 10.0)
+        ]
+        assert rows(snapshot.aggregate("hour")) == [(9, 2, 5, 50.0), (21, 1, 1, 10.0), (22, 1, 1, 10.0)]
+        assert rows(snapshot.aggregate("genre")) == [("Action", 2, 5, 50.0), ("Drama", 1, 1, 10.0),
+                                                     ("unknown", 1, 1, 10.0)]
+        assert rows(snapshot.aggregate("city", start=date(2030, 1, 2))) == [("Pune", 2, 4, 40.0)]
+        assert rows(snapshot.aggregate("theater", end=date(2030, 1, 1))) == [(1, 1, 2, 20.0), (2, 1, 1, 10.0)]
+        assert rows(snapshot.aggregate("movie", date(2031, 1, 1))) == []
+        with pytest.raises(ValueError):
+            snapshot.aggregate("weekday")
+
+    def test_since_rewrites_only_later_days(self, db, tmp_path):
+        book(db, 1, 1, datetime(2030, 1, 1, 9, 0), 1)
+        book(db, 2, 1, datetime(2030, 1, 2, 9, 0), 1)
+        write_snapshot(db, str(tmp_path))
+
+        # Day 1 changes behind the snapshot's back; day 2 is rewritten and gains a booking
+        book(db, 3, 1, datetime(2030, 1, 1, 12, 0), 1)
+        book(db, 4, 2, datetime(2030, 1, 2, 12, 0), 2)
+        assert write_snapshot(db, str(tmp_path), since=date(2030, 1, 2)) == 2
+        snapshot = ColumnarSnapshot(str(tmp_path))
+        assert rows(snapshot.aggregate("day")) == [("2030-01-01", 1, 1, 10.0), ("2030-01-02", 2, 3, 30.0)]
+
+        # A rewritten day that lost its bookings disappears
+        db.query(Seat).filter(Seat.booking_id.in_([2, 4])).delete()
+        db.query(Booking).filter(Booking.id.in_([2, 4])).delete()
+        db.commit()
+        write_snapshot(db, str(tmp_path), since=date(2030, 1, 2))
+        assert ColumnarSnapshot(str(tmp_path)).days() == [date(2030, 1, 1)]
+        assert not [name for name in os.listdir(tmp_path / "bookings") if name.startswith(".")]
+
+    def test_partitions_are_memory_mapped_columns(self, db, tmp_path):
+        book(db, 1, 2, datetime(2030, 1, 1, 9, 0), 2)
+        write_snapshot(db, str(tmp_path))
+        columns = ColumnarSnapshot(str(tmp_path)).partition(date(2030, 1, 1), ("booking_id", "movie_id", "gmv"))
+        assert isinstance(columns["gmv"], np.memmap)
+        assert (columns["booking_id"].tolist(), columns["movie_id"].tolist(), columns["gmv"].tolist()) == (
+            [1], [2], [20.0]
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the analytics dashboard: month buckets, top-K selection and
+the closed-month cache
+"""
+
+from datetime import date, datetime
+
+import pytest
+import redis
+from sqlalchemy import event
+
+from app import services
+from app.dashboard import DashboardBucketCache, month_buckets, top_k
+from app.models import Movie, Theater, DailyMovieStats, DailyTheaterStats, MonthlyMovieStats, MonthlyTheaterStats
+from app.services import AnalyticsService
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([Movie(id=movie_id, title=f"Movie {movie_id}", duration_minutes=100, price=10.0)
+                for movie_id in (1, 2, 3)])
+    db.add_all([Theater(id=theater_id, name=f"Theater {theater_id}", address="1 Street", city="City")
+                for theater_id in (1, 2)])
+    db.commit()
+    return db
+
+
+def add_day(db, day, movies, theaters):
+    """Roll up one day: ``movies``/``theaters`` map ids to (bookings, tickets, gmv)"""
+    for model, monthly, key, rows in ((DailyMovieStats, MonthlyMovieStats, "movie_id", movies),
+                                      (DailyTheaterStats, MonthlyTheaterStats, "theater_id", theaters)):
+        db.add_all([model(**{key: key_id}, day=day, bookings=bookings, tickets=tickets, gmv=gmv)
+                    for key_id, (bookings, tickets, gmv) in rows.items()])
+        for key_id, (bookings, tickets, gmv) in rows.items():
+            month = db.get(monthly, (key_id, day.replace(day=1))) or db.merge(
+                monthly(**{key: key_id}, month=day.replace(day=1), bookings=0, tickets=0, gmv=0.0)
+            )
+            month.bookings += bookings
+            month.tickets += tickets
+            month.gmv += gmv
+    db.commit()
+
+
+def count_statements(db, func, *args):
+    statements = []
+    listener = lambda conn, cursor, statement, *rest: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        return func(db, *args), len(statements)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+
+class CounterRedis:
+    """The two Redis commands the rollup generation uses, backed by a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+
+class DownRedis:
+    def get(self, key):
+        raise redis.ConnectionError("Connection refused")
+
+    incr = get
+
+
+class TestMonthBuckets:
+    def test_whole_past_months_are_closed(self):
+        assert month_buckets(date(2030, 1, 15), date(2030, 3, 31), datetime(2030, 5, 1)) == [
+            (date(2030, 1, 15), date(2030, 1, 31), False),
+            (date(2030, 2, 1), date(2030, 2, 28), True),
+            (date(2030, 3, 1), date(2030, 3, 31), True),
+        ]
+
+    def test_current_month_stays_open(self):
+        assert month_buckets(date(2030, 2, 1), date(2030, 3, 31), datetime(2030, 3, 31, 12)) == [
+            (date(2030, 2, 1), date(2030, 2, 28), True),
+            (date(2030, 3, 1), date(2030, 3, 31), False),
+        ]
+        # Just after midnight late commits may still land on the last day
+        assert month_buckets(date(2030, 3, 1), date(2030, 3, 31), datetime(2030, 4, 1, 0, 1)) == [
+            (date(2030, 3, 1), date(2030, 3, 31), False),
+        ]
+
+
+class TestTopK:
+    def test_largest_first_ties_by_lowest_id(self):
+        counters = {1: [1, 2, 30.0], 2: [5, 9, 10.0], 3: [2, 9, 30.0], 4: [1, 1, 5.0]}
+        assert [key for key, _ in top_k(counters, 3, "gmv")] == [1, 3, 2]
+        assert [key for key, _ in top_k(counters, 2, "tickets")] == [2, 3]
+        assert top_k(counters, 10, "bookings")[0] == (2, [5, 9, 10.0])
+        assert top_k({}, 3, "gmv") == []
+
+
+class TestDashboard:
+    def test_totals_and_top_lists(self, db):
+        add_day(db, date(2030, 1, 5), {1: (2, 3, 30.0), 2: (1, 5, 50.0)}, {1: (2, 3, 30.0), 2: (1, 5, 50.0)})
+        add_day(db, date(2030, 2, 7), {1: (1, 4, 40.0), 3: (1, 1, 10.0)}, {1: (2, 5, 50.0)})
+        add_day(db, date(2030, 3, 1), {3: (9, 9, 90.0)}, {2: (9, 9, 90.0)})  # outside the window
+
+        result = AnalyticsService.get_dashboard_analytics(db, datetime(2030, 1, 1), datetime(2030, 2, 28, 23, 59),
+                                                          top=2)
+        assert result["summary"] == {"total_bookings": 5, "total_revenue": 130.0, "total_tickets": 13,
+                                     "average_booking_value": 26.0}
+        assert [(movie["movie_id"], movie["title"], movie["gmv"]) for movie in result["top_movies"]] == [
+            (1, "Movie 1", 70.0), (2, "Movie 2", 50.0)
+        ]
+        assert [(theater["name"], theater["tickets"]) for theater in result["top_theaters"]] == [
+            ("Theater 1", 8), ("Theater 2", 5)
+        ]
+        by_tickets = AnalyticsService.get_dashboard_analytics(db, datetime(2030, 1, 1), datetime(2030, 2, 28),
+                                                              top=1, rank_by="tickets")
+        assert [movie["movie_id"] for movie in by_tickets["top_movies"]] == [1]
+
+    def test_empty_window(self, db):
+        result = AnalyticsService.get_dashboard_analytics(db, datetime(2030, 1, 1), datetime(2030, 1, 31))
+        assert result["summary"]["average_booking_value"] == 0.0
+        assert (result["top_movies"], result["top_theaters"]) == ([], [])
+
+    def test_closed_months_are_cached(self, db):
+        add_day(db, date(2024, 1, 5), {1: (1, 1, 10.0)}, {1: (1, 1, 10.0)})
+        window = (datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59))
+        first, cold = count_statements(db, AnalyticsService.get_dashboard_analytics, *window)
+
+        # The cached month no longer reads the rollups; only names are looked up
+        add_day(db, date(2024, 1, 6), {1: (1, 1, 10.0)}, {1: (1, 1, 10.0)})
+        second, warm = count_statements(db, AnalyticsService.get_dashboard_analytics, *window)
+        assert second["summary"] == first["summary"]
+        assert (cold, warm) == (4, 2)
+
+        # A window ending mid-month is not a closed bucket, so it sees the new day
+        partial = AnalyticsService.get_dashboard_analytics(db, datetime(2024, 1, 1), datetime(2024, 1, 30))
+        assert partial["summary"]["total_bookings"] == 2
+
+        services.dashboard_buckets.clear()
+        assert AnalyticsService.get_dashboard_analytics(db, *window)["summary"]["total_bookings"] == 2
+
+    def test_whole_months_read_the_monthly_rollups(self, db):
+        add_day(db, date(2024, 1, 5), {1: (1, 2, 20.0)}, {1: (1, 2, 20.0)})
+        add_day(db, date(2024, 1, 20), {1: (2, 2, 20.0)}, {1: (2, 2, 20.0)})
+        add_day(db, date(2024, 2, 3), {2: (1, 1, 10.0)}, {2: (1, 1, 10.0)})
+        statements = []
+        listener = lambda conn, cursor, statement, *rest: statements.append(statement)
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        result = AnalyticsService.get_dashboard_analytics(db, datetime(2024, 1, 1), datetime(2024, 2, 10))
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+        assert result["summary"]["total_tickets"] == 5
+        assert [(movie["movie_id"], movie["bookings"]) for movie in result["top_movies"]] == [(1, 3), (2, 1)]
+        rollups = [statement for statement in statements if "_stats" in statement]
+        # January is whole: one row per movie and theater; February is partial
+        assert ["monthly_movie_stats" in statement for statement in rollups] == [True, False, False, False]
+        assert ["monthly_theater_stats" in statement for statement in rollups] == [False, True, False, False]
+
+    def test_backfill_invalidates_every_process(self, db, session_factory, monkeypatch):
+        from scripts import backfill_rollups
+        shared = CounterRedis()
+        monkeypatch.setattr(services, "dashboard_buckets", DashboardBucketCache(client=shared))
+        add_day(db, date(2024, 1, 5), {1: (1, 1, 10.0)}, {1: (1, 1, 10.0)})
+        window = (datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59))
+        assert AnalyticsService.get_dashboard_analytics(db, *window)["summary"]["total_bookings"] == 1
+
+        # The backfill runs in a process of its own; there are no bookings, so it empties the rollups
+        monkeypatch.setattr(backfill_rollups, "SessionLocal", session_factory)
+        monkeypatch.setattr(backfill_rollups, "dashboard_buckets", DashboardBucketCache(client=shared))
+        backfill_rollups.backfill()
+        assert AnalyticsService.get_dashboard_analytics(db, *window)["summary"]["total_bookings"] == 0
+
+    def test_unreadable_generation_caches_nothing(self, db, monkeypatch):
+        monkeypatch.setattr(services, "dashboard_buckets", DashboardBucketCache(client=DownRedis()))
+        add_day(db, date(2024, 1, 5), {1: (1, 1, 10.0)}, {1: (1, 1, 10.0)})
+        window = (datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59))
+        AnalyticsService.get_dashboard_analytics(db, *window)
+        add_day(db, date(2024, 1, 6), {1: (1, 1, 10.0)}, {1: (1, 1, 10.0)})
+        assert AnalyticsService.get_dashboard_analytics(db, *window)["summary"]["total_bookings"] == 2
+
+    def test_bucket_cache_expires(self):
+        cache = DashboardBucketCache(max_entries=1, ttl=0)
+        cache.put(date(2030, 1, 1), {1: [1, 1, 1.0]}, {})
+        assert cache.get(date(2030, 1, 1)) is None
+
+        cache = DashboardBucketCache(max_entries=1)
+        cache.put(date(2030, 1, 1), {}, {})
+        cache.put(date(2030, 2, 1), {}, {})
+        assert cache.get(date(2030, 1, 1)) is None
+        assert cache.get(date(2030, 2, 1)) == ({}, {})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming booking export.
+
+The memory test exports a few thousand bookings by default; set
+TEST_EXPORT_ROWS (e.g. 2000000) to run it against millions of rows.
+"""
+
+import csv
+import io
+import json
+import os
+import tracemalloc
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.export import EXPORT_BATCH_SIZE, EXPORT_COLUMNS, export_chunks
+from app.models import Movie, Theater, Hall, Show, Seat, Booking
+from app.services import BookingService
+
+EXPORT_ROWS = int(os.getenv("TEST_EXPORT_ROWS", 10000))
+INSERT_BATCH = 50000
+
+
+@pytest.fixture
+def db(tmp_path):
+    # A file database: rows are read back in batches, not from one in-memory list
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.add_all([Movie(id=movie_id, title=f"Movie {movie_id}", duration_minutes=100, price=10.0)
+                for movie_id in (1, 2)])
+    db.add_all([Theater(id=theater_id, name=f"Theater {theater_id}", address="1 Street", city="City")
+                for theater_id in (1, 2)])
+    db.flush()
+    db.add_all([Hall(id=hall_id, theater_id=hall_id, name="Hall", total_rows=1, seats_per_row={"row1": 10})
+                for hall_id in (1, 2)])
+    db.flush()
+    # Show n plays movie n in theater n
+    db.add_all([Show(id=show_id, movie_id=show_id, theater_id=show_id, hall_id=show_id,
+                     show_time=datetime(2030, 1, 1, 18, 0), price=10.0, seat_mode="virtual")
+                for show_id in (1, 2)])
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def add_bookings(db, count, first_id=1, show_id=1, booking_time=datetime(2030, 1, 1, 12, 0)):
+    for start in range(first_id, first_id + count, INSERT_BATCH):
+        ids = range(start, min(start + INSERT_BATCH, first_id + count))
+        db.execute(insert(Booking), [
+            {"id": booking_id, "user_id": booking_id % 100, "show_id": show_id,
+             "booking_reference": f"BK{booking_id:08d}", "total_amount": 10.0,
+             "booking_status": "confirmed", "booking_time": booking_time}
+            for booking_id in ids
+        ])
+    db.commit()
+
+
+def export(db, export_format="ndjson", **filters):
+    return b"".join(export_chunks(BookingService.iter_export_rows(db, **filters), export_format)).decode()
+
+
+class TestExport:
+    def test_ndjson_rows(self, db):
+        add_bookings(db, 2)
+        db.add_all([Seat(show_id=1, hall_id=1, row_number=1, seat_number=n, is_booked=True, booking_id=1)
+                    for n in (1, 2)])
+        db.commit()
+        lines = [json.loads(line) for line in export(db).splitlines()]
+        assert [line["booking_id"] for line in lines] == [1, 2]
+        assert list(lines[0]) == list(EXPORT_COLUMNS)
+        assert lines[0]["tickets"] == 2 and lines[1]["tickets"] == 0
+        assert (lines[0]["movie_title"], lines[0]["theater_name"]) == ("Movie 1", "Theater 1")
+        assert lines[0]["booking_time"] == "2030-01-01T12:00:00"
+
+    def test_csv_rows(self, db):
+        add_bookings(db, 3)
+        rows = list(csv.reader(io.StringIO(export(db, "csv"))))
+        assert rows[0] == list(EXPORT_COLUMNS)
+        assert [row[0] for row in rows[1:]] == ["1", "2", "3"]
+
+    def test_filters(self, db):
+        add_bookings(db, 2, first_id=1, show_id=1, booking_time=datetime(2030, 1, 1))
+        add_bookings(db, 2, first_id=3, show_id=2, booking_time=datetime(2030, 2, 1))
+
+        def ids(**filters):
+            return [json.loads(line)["booking_id"] for line in export(db, **filters).splitlines()]
+
+        assert ids() == [1, 2, 3, 4]
+        assert ids(theater_id=2) == [3, 4]
+        assert ids(movie_id=1) == [1, 2]
+        assert ids(start_date=datetime(2030, 1, 15)) == [3, 4]
+        assert ids(end_date=datetime(2030, 1, 15), theater_id=2) == []
+        assert export(db, "csv", movie_id=99).splitlines() == [",".join(EXPORT_COLUMNS)]
+
+    def test_memory_does_not_grow_with_rows(self, db):
+        def peak_export_memory():
+            tracemalloc.start()
+            try:
+                size = sum(len(chunk) for chunk in
+                           export_chunks(BookingService.iter_export_rows(db), "ndjson"))
+                return size, tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        # Both exports span several fetch batches
+        small_rows = max(EXPORT_ROWS // 10, 2 * EXPORT_BATCH_SIZE)
+        add_bookings(db, small_rows)
+        small_size, small_peak = peak_export_memory()
+        add_bookings(db, EXPORT_ROWS - small_rows, first_id=small_rows + 1)
+        size, peak = peak_export_memory()
+        assert size >= EXPORT_ROWS // small_rows * small_size
+        # Several times the rows, about the same working set: rows are never all held at once
+        assert peak < small_peak * 1.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
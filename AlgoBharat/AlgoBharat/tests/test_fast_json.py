@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the projected (column tuple + orjson) list response path
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.fast_json import FastJSONResponse, page_response, pick_fields
+from app.models import Seat
+from app.pagination import NEXT_CURSOR_HEADER
+from app.schemas import BookingCreate, ShowCreate
+from app.services import BookingService, SeatService, ShowService
+
+
+@pytest.fixture
+def db(db, seed_halls):
+    movie, theater, (hall,) = seed_halls(db, {"row1": 5, "row2": 5})
+    db.movie_id, db.theater_id = movie.id, theater.id
+    db.shows = [
+        ShowService.create_show(db, ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                                               show_time=datetime(2030, 1, 1, 10) + timedelta(hours=3 * n),
+                                               price=12.5, seat_mode=mode))
+        for n, mode in enumerate(["materialized", "virtual", "materialized"])
+    ]
+    return db
+
+
+def as_response_model(schema, items):
+    """What the response_model path sends for ``items``"""
+    return json.loads(json.dumps(jsonable_encoder([schema.model_validate(item) for item in items])))
+
+
+def render(content):
+    return json.loads(FastJSONResponse(content).body)
+
+
+class TestFastJSON:
+    def test_projected_shows_match_the_response_model(self, db):
+        shows, cursor = ShowService.get_shows_by_movie(db, db.movie_id, limit=2)
+        rows, projected_cursor = ShowService.get_shows_by_movie(db, db.movie_id, limit=2, projected=True)
+        assert projected_cursor == cursor
+        response = page_response(rows, projected_cursor)
+        assert json.loads(response.body) == as_response_model(schemas.Show, shows)
+        assert response.headers[NEXT_CURSOR_HEADER] == cursor
+
+        rows, next_cursor = ShowService.get_shows_by_theater(db, db.theater_id, cursor, projected=True)
+        assert [row.id for row in rows] == [db.shows[2].id]
+        assert next_cursor is None
+        assert NEXT_CURSOR_HEADER not in page_response(rows, None).headers
+
+    def test_user_booking_rows_match_the_response_model(self, db):
+        seat_ids = [seat_id for (seat_id,) in
+                    db.query(Seat.id).filter(Seat.show_id == db.shows[0].id).order_by(Seat.id)]
+        BookingService.create_booking(db, BookingCreate(user_id=3, show_id=db.shows[0].id, seat_ids=seat_ids[:2]))
+        BookingService.create_booking(db, BookingCreate(user_id=3, show_id=db.shows[1].id, seat_ids=[4, 5, 6]))
+        BookingService.create_booking(db, BookingCreate(user_id=4, show_id=db.shows[0].id, seat_ids=seat_ids[2:3]))
+        db.expire_all()
+
+        rows = BookingService.get_user_booking_rows(db, 3)
+        assert [len(row["seats"]) for row in rows] == [2, 3]
+        expected = as_response_model(schemas.BookingResponse, BookingService.get_user_bookings(db, 3))
+        for booking in expected:
+            booking["seats"].sort(key=lambda seat: seat["id"])
+        # The virtual show's seats keep the layout positions they were booked by
+        for seat, position in zip(expected[1]["seats"], [4, 5, 6]):
+            seat["id"] = position
+        assert render(rows) == expected
+        assert BookingService.get_user_booking_rows(db, 99) == []
+
+    def test_suggestions_keep_only_schema_fields(self, db):
+        suggestions = SeatService.suggest_alternative_shows(db, db.movie_id, 2)
+        assert "price_per_seat" in suggestions[0]
+        assert render(pick_fields(suggestions, schemas.SeatSuggestion)) == \
+            as_response_model(schemas.SeatSuggestion, suggestions)
+
+    def test_datetimes_are_written_like_pydantic(self):
+        values = [datetime(2030, 1, 1, 9, 30, 0, 250000), datetime(2030, 1, 1, tzinfo=timezone.utc),
+                  datetime(2030, 1, 1, tzinfo=timezone(timedelta(hours=5, minutes=30)))]
+        assert FastJSONResponse(values).body == TypeAdapter(List[datetime]).dump_json(values)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
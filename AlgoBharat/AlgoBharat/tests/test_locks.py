@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-seat booking locks
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.locks import AsyncLocalSeatLocks, AsyncSeatLocks, LocalSeatLocks, SeatLocks, seat_lock_keys
+
+
+class TestSeatLocks:
+    def test_keys_are_per_seat_and_share_a_hash_tag(self):
+        assert seat_lock_keys(7, [3, 1, 3]) == ["seat_lock:{7}:1", "seat_lock:{7}:3"]
+
+    def test_overlapping_requests_contend(self):
+        locks = LocalSeatLocks()
+        assert locks.acquire(1, [1, 2, 3], wait_ms=0) is not None
+        assert locks.acquire(1, [3, 4], wait_ms=0) is None
+        assert locks.acquire(1, [4, 5], wait_ms=0) is not None
+        assert locks.acquire(2, [1, 2, 3], wait_ms=0) is not None
+
+    def test_acquire_is_all_or_nothing(self):
+        locks = LocalSeatLocks()
+        locks.acquire(1, [2], wait_ms=0)
+        assert locks.acquire(1, [1, 2], wait_ms=0) is None
+        # Seat 1 must not have been left locked by the failed attempt
+        assert locks.acquire(1, [1], wait_ms=0) is not None
+
+    def test_release_requires_owner_token(self):
+        locks = LocalSeatLocks()
+        token = locks.acquire(1, [1, 2], wait_ms=0)
+        assert locks.release(1, [1, 2], "someone-else") == 0
+        assert locks.acquire(1, [1], wait_ms=0) is None
+        assert locks.release(1, [1, 2], token) == 2
+        assert locks.acquire(1, [1], wait_ms=0) is not None
+
+    def test_expired_lock_is_not_deleted_by_old_owner(self):
+        locks = LocalSeatLocks()
+        old_token = locks.acquire(1, [1], ttl_ms=1, wait_ms=0)
+        time.sleep(0.01)
+        new_token = locks.acquire(1, [1], wait_ms=0)
+        assert new_token is not None
+        assert locks.release(1, [1], old_token) == 0
+        assert locks.acquire(1, [1], wait_ms=0) is None
+
+    def test_waits_for_short_lived_holder(self):
+        locks = LocalSeatLocks()
+        locks.acquire(1, [1], ttl_ms=20, wait_ms=0)
+        assert locks.acquire(1, [1], wait_ms=200) is not None
+
+    def test_shows_are_locked_in_id_order_all_or_nothing(self):
+        attempts = []
+
+        class RecordingLocks(LocalSeatLocks):
+            def try_acquire_keys(self, keys, token, ttl_ms):
+                attempts.append(keys[0].split(":")[1])
+                return super().try_acquire_keys(keys, token, ttl_ms)
+
+        locks = RecordingLocks()
+        token = locks.acquire_shows({9: [1], 2: [5, 4], 5: [1]}, wait_ms=0)
+        assert attempts == ["{2}", "{5}", "{9}"]
+        assert locks.acquire(5, [1], wait_ms=0) is None
+        assert locks.release_shows({9: [1], 2: [5, 4], 5: [1]}, token) == 4
+
+        # Show 7 is held elsewhere: shows 3 and 5, locked before it, are let go
+        locks.acquire(7, [1], wait_ms=0)
+        assert locks.acquire_shows({3: [1], 5: [1], 7: [1, 2]}, wait_ms=0) is None
+        assert locks.acquire(3, [1], wait_ms=0) is not None
+        assert locks.acquire(5, [1], wait_ms=0) is not None
+        assert locks.acquire(7, [2], wait_ms=0) is not None
+
+    def test_async_shows_share_one_token(self):
+        local = LocalSeatLocks()
+        async_locks = AsyncLocalSeatLocks(local)
+
+        async def scenario():
+            token = await async_locks.acquire_shows({4: [1, 2], 1: [3]}, wait_ms=0)
+            assert local.acquire(1, [3], wait_ms=0) is None
+            assert await async_locks.acquire_shows({1: [9], 4: [2]}, wait_ms=0) is None
+            assert local.acquire(1, [9], wait_ms=0) is not None
+            return await async_locks.release_shows({4: [1, 2], 1: [3]}, token)
+
+        assert asyncio.run(scenario()) == 3
+
+    def test_async_locks_share_the_local_table(self):
+        local = LocalSeatLocks()
+        async_locks = AsyncLocalSeatLocks(local)
+
+        async def scenario():
+            token = await async_locks.acquire(1, [1, 2], wait_ms=0)
+            assert local.acquire(1, [2], wait_ms=0) is None
+            assert await async_locks.acquire(1, [2, 3], wait_ms=0) is None
+            assert await async_locks.release(1, [1, 2], token) == 2
+            return local.acquire(1, [2], wait_ms=0)
+
+        assert asyncio.run(scenario()) is not None
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class AcquireOnly(SeatLocks):
+            def try_acquire_keys(self, keys, token, ttl_ms):
+                return True
+
+        class AsyncAcquireOnly(AsyncSeatLocks):
+            async def try_acquire_keys(self, keys, token, ttl_ms):
+                return True
+
+        for backend in (AcquireOnly, AsyncAcquireOnly):
+            with pytest.raises(TypeError):
+                backend()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the booking outbox, its relay and the Celery consumer tasks
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import outbox, worker
+from app.exceptions import InsufficientSeatsException
+from app.models import Seat, OutboxEvent
+from app.outbox import (
+    BOOKING_CONFIRMED, LocalEventStream, consumer, dispatch_events, prune_outbox, relay_once, relay_outbox
+)
+from app.schemas import BookingCreate, ShowCreate
+from app.services import BookingService, ShowService
+
+
+@pytest.fixture(autouse=True)
+def consumers(monkeypatch):
+    """Only the consumers a test registers"""
+    monkeypatch.setattr(outbox, "_consumers", {})
+    monkeypatch.setattr(outbox, "_subscriptions", {})
+
+
+@pytest.fixture
+def db(db, seed_halls):
+    movie, theater, (hall,) = seed_halls(db, {"row1": 6})
+    db.show = ShowService.create_show(db, ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                                                     show_time=datetime(2030, 1, 1, 18, 0), price=10.0))
+    db.seat_ids = [seat_id for (seat_id,) in
+                   db.query(Seat.id).filter(Seat.show_id == db.show.id).order_by(Seat.id)]
+    return db
+
+
+def book(db, seat_ids):
+    return BookingService.create_booking(db, BookingCreate(user_id=7, show_id=db.show.id, seat_ids=seat_ids))
+
+
+class TestOutbox:
+    def test_booking_writes_event_in_its_transaction(self, db):
+        booking = book(db, db.seat_ids[:2])
+        (event,) = db.query(OutboxEvent).all()
+        assert (event.event_type, event.aggregate_id, event.published_at) == (BOOKING_CONFIRMED, booking.id, None)
+        assert event.payload["booking_reference"] == booking.booking_reference
+        assert event.payload["seat_ids"] == db.seat_ids[:2]
+        assert (event.payload["tickets"], event.payload["total_amount"]) == (2, 20.0)
+        assert event.payload["hall_id"] == db.show.hall_id
+
+        # A booking that rolls back leaves no event behind
+        with pytest.raises(InsufficientSeatsException):
+            book(db, db.seat_ids[1:3])
+        db.rollback()
+        assert db.query(OutboxEvent).count() == 1
+
+        # Nor does the optimistic path
+        with pytest.raises(InsufficientSeatsException):
+            BookingService.create_booking(db, BookingCreate(user_id=7, show_id=db.show.id,
+                                                            seat_ids=db.seat_ids[1:3]), strategy="optimistic")
+        assert db.query(OutboxEvent).count() == 1
+
+    def test_booking_does_not_run_consumers(self, db):
+        called = []
+        consumer(BOOKING_CONFIRMED, name="test.record")(called.append)
+        book(db, db.seat_ids[:1])
+        assert called == []
+
+        stream = LocalEventStream()
+        relay_outbox(db, stream)
+        assert dispatch_events(stream, lambda name, event: outbox.get_consumer(name)(event), "reader") == 1
+        assert [event["payload"]["seat_ids"] for event in called] == [db.seat_ids[:1]]
+
+    def test_relay_publishes_in_order_once(self, db):
+        for seat_id in db.seat_ids[:5]:
+            book(db, [seat_id])
+        stream = LocalEventStream()
+        assert relay_once(db, stream, batch=2) == 2
+        assert relay_outbox(db, stream, batch=2) == 3
+        assert relay_outbox(db, stream) == 0
+        events = [event for _, event in stream.read("reader", 10)]
+        assert [event["payload"]["seat_ids"] for event in events] == [[seat_id] for seat_id in db.seat_ids[:5]]
+        assert [event["id"] for event in events] == sorted(event["id"] for event in events)
+        assert {event["type"] for event in events} == {BOOKING_CONFIRMED}
+        assert db.query(OutboxEvent).filter(OutboxEvent.published_at.is_(None)).count() == 0
+
+    def test_failed_publish_leaves_events_unpublished(self, db):
+        book(db, db.seat_ids[:1])
+
+        class BrokenStream(LocalEventStream):
+            def publish(self, events):
+                raise ConnectionError("stream down")
+
+        with pytest.raises(ConnectionError):
+            relay_once(db, BrokenStream())
+        stream = LocalEventStream()
+        assert relay_once(db, stream) == 1
+        assert len(stream) == 1
+
+    def test_incomplete_stream_cannot_be_created(self):
+        class WriteOnlyStream(outbox.EventStream):
+            def publish(self, events):
+                pass
+
+        with pytest.raises(TypeError):
+            WriteOnlyStream()
+
+    def test_prune_keeps_recent_and_unpublished_events(self, db):
+        for seat_id in db.seat_ids[:3]:
+            book(db, [seat_id])
+        relay_once(db, LocalEventStream(), batch=2)
+        first = db.query(OutboxEvent).order_by(OutboxEvent.id).first()
+        first.published_at = datetime.now() - timedelta(days=2)
+        db.commit()
+        assert prune_outbox(db, timedelta(days=1)) == 1
+        db.commit()
+        assert db.query(OutboxEvent).count() == 2
+
+
+class TestWorker:
+    def test_pump_relays_and_runs_consumers(self, db, session_factory, monkeypatch):
+        monkeypatch.setattr(worker, "SessionLocal", session_factory)
+        monkeypatch.setattr(worker, "event_stream", LocalEventStream())
+        monkeypatch.setattr(worker.celery_app.conf, "task_always_eager", True)
+        received = {"first": [], "second": []}
+        consumer(BOOKING_CONFIRMED, name="test.first")(received["first"].append)
+        consumer(BOOKING_CONFIRMED, name="test.second")(received["second"].append)
+        first = book(db, db.seat_ids[:1])
+        second = book(db, db.seat_ids[1:3])
+
+        assert worker.pump_outbox.delay().get() == 2
+        for events in received.values():
+            assert [event["aggregate_id"] for event in events] == [first.id, second.id]
+        assert worker.pump_outbox.delay().get() == 0
+        assert len(received["first"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unit tests for connection pool sizing and pool metrics
+"""
+
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import create_db_engine, pool_options
+from app.main import app
+from app.pool_metrics import PoolMetrics, pool_metrics, pool_stats
+
+
+@pytest.fixture
+def database_url():
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    yield f"sqlite:///{path}"
+    os.remove(path)
+
+
+class TestPoolMetrics:
+    def test_histogram_and_percentiles(self):
+        metrics = PoolMetrics("unit")
+        for waited in (0.0005, 0.0005, 0.003, 0.2):
+            metrics.record_checkout(waited, saturated=waited > 0.1)
+        metrics.record_timeout(2.0)
+        stats = metrics.snapshot()
+        assert stats["checkouts"] == 4
+        assert stats["saturated"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["wait_histogram"]["le_1ms"] == 2
+        assert stats["wait_histogram"]["le_5ms"] == 1
+        assert stats["wait_histogram"]["le_250ms"] == 1
+        assert stats["p50_wait_ms"] == 1
+        assert stats["p99_wait_ms"] == 250
+        assert stats["max_wait_ms"] == 2000.0
+
+    def test_in_memory_sqlite_keeps_default_pool(self):
+        assert pool_options("sqlite://") == {}
+        assert pool_options("sqlite:///x.db", pool_size=2)["pool_size"] == 2
+
+    def test_exhausted_pool_counts_saturation_and_timeouts(self, database_url):
+        engine = create_db_engine(database_url, metrics_name="test_exhausted",
+                                  pool_size=1, max_overflow=0, pool_timeout=0.05)
+        try:
+            with engine.connect() as held:
+                held.execute(text("select 1"))
+                with pytest.raises(PoolTimeoutError):
+                    engine.connect()
+            with engine.connect():
+                pass
+            stats = pool_stats()["test_exhausted"]
+            assert stats["size"] == 1
+            assert stats["checked_out"] == 0
+            assert stats["checkouts"] == 2
+            assert stats["timeouts"] == 1
+            assert stats["saturated"] == 1
+            assert stats["max_wait_ms"] >= 50
+        finally:
+            engine.dispose()
+            pool_metrics.pop("test_exhausted", None)
+
+    def test_metrics_survive_pool_recreate(self, database_url):
+        engine = create_db_engine(database_url, metrics_name="test_recreate")
+        try:
+            with engine.connect():
+                pass
+            engine.dispose()
+            with engine.connect():
+                pass
+            assert pool_stats()["test_recreate"]["checkouts"] == 2
+        finally:
+            engine.dispose()
+            pool_metrics.pop("test_recreate", None)
+
+    def test_internal_endpoint(self, monkeypatch):
+        from app.routers import internal
+        client = TestClient(app)
+        assert client.get("/internal/pool-stats").status_code == 404
+        monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "ops-token")
+        assert client.get("/internal/pool-stats").status_code == 403
+        assert client.get("/internal/pool-stats", headers={"X-Internal-Token": "guess"}).status_code == 403
+        response = client.get("/internal/pool-stats", headers={"X-Internal-Token": "ops-token"})
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["redis"]["size"] > 0
+        assert "wait_histogram" in stats["redis"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
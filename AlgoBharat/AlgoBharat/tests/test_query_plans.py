@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Query plan regression tests: every statement issued by the hot service paths
+must be answered from an index, never by scanning a whole table.
+
+Runs on SQLite; set TEST_POSTGRES_URL to a scratch PostgreSQL database to check
+PostgreSQL plans as well (tables there are created and dropped by the test).
+"""
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import services
+from app.database import Base
+from app.models import Seat
+from app.schemas import BookingCreate, BulkBookingCreate, ShowCreate
+from app.schedule_index import hall_schedules
+from app.services import AnalyticsService, BookingService, HallService, SeatService, ShowService
+
+TABLES = set(Base.metadata.tables)
+
+DATABASES = ["sqlite"]
+if os.getenv("TEST_POSTGRES_URL"):
+    DATABASES.append("postgresql")
+
+
+def sqlite_full_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    # "SCAN <table>" (with or without "USING ... INDEX") reads every row; "SEARCH" does not
+    return [match.group(1) for *_, detail in plan
+            for match in [re.match(r"SCAN (\w+)", detail)] if match and match.group(1) in TABLES]
+
+
+def postgresql_full_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+@pytest.fixture(params=DATABASES)
+def database(request, local_backends, seed_halls):
+    # Every lookup goes to the database (local_backends turns the catalog cache
+    # off) so its plan is checked too
+    if request.param == "sqlite":
+        SessionLocal = request.getfixturevalue("session_factory")
+        engine = SessionLocal.kw["bind"]
+        full_scans = sqlite_full_scans
+    else:
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+
+        @event.listens_for(engine, "connect")
+        def no_seqscan(dbapi_connection, connection_record):
+            # Tiny test tables make a sequential scan the cheapest plan; with scans
+            # priced out, one is only chosen when no index can answer the query
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET enable_seqscan = off")
+            cursor.close()
+
+        full_scans = postgresql_full_scans
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = SessionLocal()
+    movie, theater, (hall,) = seed_halls(db, {"row1": 4, "row2": 4})
+    shows = [
+        ShowService.create_show(db, ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                                               show_time=datetime(2030, 1, day, 18, 0), price=9.0,
+                                               seat_mode=seat_mode))
+        for day, seat_mode in ((1, "materialized"), (2, "virtual"), (3, "materialized"))
+    ]
+    seat_ids = [seat_id for (seat_id,) in db.query(Seat.id).filter(Seat.show_id == shows[0].id).order_by(Seat.id)]
+    ids = {"movie": movie.id, "theater": theater.id, "hall": hall.id,
+           "shows": [show.id for show in shows], "seats": seat_ids}
+
+    yield engine, db, ids, full_scans
+
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@contextmanager
+def no_full_scans(database):
+    """Capture the statements run inside the block and assert none scans a table"""
+    engine, db, _, full_scans = database
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(("INSERT", "SAVEPOINT", "RELEASE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+    with engine.connect() as connection:
+        offenders = [
+            (" ".join(statement.split()), scans)
+            for statement, parameters in statements
+            for scans in [full_scans(connection, statement, parameters)] if scans
+        ]
+    assert offenders == []
+
+
+class TestQueryPlans:
+    def test_inventory_load(self, database):
+        _, db, ids, _ = database
+        with no_full_scans(database):
+            SeatService.load_inventory(db, ids["shows"][0])
+
+    def test_suggestions(self, database):
+        _, db, ids, _ = database
+        with no_full_scans(database):
+            SeatService.suggest_alternative_shows(db, ids["movie"], 2)
+
+    def test_show_listings(self, database):
+        _, db, ids, _ = database
+        _, cursor = ShowService.get_shows_by_movie(db, ids["movie"], limit=1)
+        with no_full_scans(database):
+            ShowService.get_shows_by_movie(db, ids["movie"], cursor, limit=1)
+            ShowService.get_shows_by_theater(db, ids["theater"], cursor, limit=1)
+            ShowService.get_shows_page(db, cursor, limit=1)
+            HallService.get_halls_by_theater(db, ids["theater"])
+
+    def test_locked_booking(self, database):
+        _, db, ids, _ = database
+        with no_full_scans(database):
+            BookingService.create_booking(db, BookingCreate(
+                user_id=1, show_id=ids["shows"][0], seat_ids=ids["seats"][:2]))
+
+    def test_optimistic_booking(self, database):
+        _, db, ids, _ = database
+        with no_full_scans(database):
+            BookingService.create_booking(db, BookingCreate(
+                user_id=1, show_id=ids["shows"][0], seat_ids=ids["seats"][2:4]),
+                strategy=services.BOOKING_STRATEGY_OPTIMISTIC)
+
+    def test_virtual_booking(self, database):
+        _, db, ids, _ = database
+        with no_full_scans(database):
+            BookingService.create_booking(db, BookingCreate(user_id=1, show_id=ids["shows"][1], seat_ids=[1, 2]))
+
+    def test_bulk_booking(self, database):
+        _, db, ids, _ = database
+        bulk = BulkBookingCreate(user_id=1, items=[
+            {"show_id": ids["shows"][0], "seat_ids": ids["seats"][4:6]}, {"show_id": ids["shows"][1], "seat_ids": [3, 4]}
+        ])
+        with no_full_scans(database):
+            BookingService.create_bulk_booking(db, bulk)
+
+    def test_schedule_check(self, database):
+        _, db, ids, _ = database
+        hall_schedules.clear()
+        with no_full_scans(database):
+            # Loads the hall's schedule, then reads in shows added since
+            ShowService.create_show(db, ShowCreate(movie_id=ids["movie"], theater_id=ids["theater"],
+                                                   hall_id=ids["hall"], show_time=datetime(2030, 1, 4, 18, 0),
+                                                   price=9.0, seat_mode="virtual"))
+            ShowService.next_free_slot(db, ids["hall"], datetime(2030, 1, 1, 18, 0), 100)
+
+    def test_user_bookings(self, database):
+        _, db, ids, _ = database
+        BookingService.create_booking(db, BookingCreate(user_id=5, show_id=ids["shows"][0], seat_ids=ids["seats"][:2]))
+        db.expire_all()
+        with no_full_scans(database):
+            for booking in BookingService.get_user_bookings(db, 5):
+                assert len(booking.seats) == 2
+
+    def test_projected_listings(self, database):
+        _, db, ids, _ = database
+        BookingService.create_booking(db, BookingCreate(user_id=5, show_id=ids["shows"][0], seat_ids=ids["seats"][:2]))
+        _, cursor = ShowService.get_shows_by_movie(db, ids["movie"], limit=1, projected=True)
+        with no_full_scans(database):
+            ShowService.get_shows_by_movie(db, ids["movie"], cursor, limit=1, projected=True)
+            (booking,) = BookingService.get_user_booking_rows(db, 5)
+            assert len(booking["seats"]) == 2
+
+    def test_analytics(self, database):
+        _, db, ids, _ = database
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=ids["shows"][0], seat_ids=ids["seats"][:2]))
+        db.expire_all()
+        period = (datetime(2000, 1, 1), datetime(2100, 1, 1))
+        with no_full_scans(database):
+            AnalyticsService.get_movie_analytics(db, ids["movie"], *period)
+            AnalyticsService.get_theater_analytics(db, ids["theater"], *period)
+
+    def test_live_analytics(self, database):
+        _, db, ids, _ = database
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=ids["shows"][0], seat_ids=ids["seats"][:2]))
+        db.expire_all()
+        period = (datetime(2000, 1, 1), datetime(2100, 1, 1))
+        with no_full_scans(database):
+            AnalyticsService.get_movie_analytics(db, ids["movie"], *period, services.ANALYTICS_SOURCE_LIVE)
+            AnalyticsService.get_theater_analytics(db, ids["theater"], *period, services.ANALYTICS_SOURCE_LIVE)
+
+    def test_dashboard(self, database):
+        _, db, ids, _ = database
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=ids["shows"][0], seat_ids=ids["seats"][:2]))
+        now = datetime.now()
+        with no_full_scans(database):
+            AnalyticsService.get_dashboard_analytics(db, now - timedelta(days=365), now)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
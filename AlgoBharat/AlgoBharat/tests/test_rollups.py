@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the daily analytics rollups and the live analytics aggregation
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import rollups, services
+from app.exceptions import InsufficientSeatsException
+from app.models import (
+    Seat, DailyMovieStats, DailyTheaterStats, DailyHallStats, DailyShowStats,
+    MonthlyMovieStats, MonthlyTheaterStats
+)
+from app.rollups import rebuild_rollups
+from app.schemas import BookingCreate, ShowCreate
+from app.services import AnalyticsService, BookingService, ShowService
+
+ROLLUP_MODELS = (DailyMovieStats, DailyTheaterStats, DailyHallStats, DailyShowStats,
+                 MonthlyMovieStats, MonthlyTheaterStats)
+
+
+def rollup_rows(db):
+    return {
+        model.__tablename__: sorted(
+            tuple(getattr(row, column.key) for column in model.__table__.columns)
+            for row in db.query(model)
+        )
+        for model in ROLLUP_MODELS
+    }
+
+
+@pytest.fixture
+def db(db, seed_halls):
+    movie, theater, halls = seed_halls(db, {"row1": 6}, {"row1": 6})
+    db.shows = [
+        ShowService.create_show(db, ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                                               show_time=datetime(2030, 1, 1, 18, 0), price=10.0,
+                                               seat_mode=seat_mode))
+        for hall, seat_mode in ((halls[0], "materialized"), (halls[1], "virtual"))
+    ]
+    db.seat_ids = [seat_id for (seat_id,) in
+                   db.query(Seat.id).filter(Seat.show_id == db.shows[0].id).order_by(Seat.id)]
+    return db
+
+
+def today_window():
+    now = datetime.now()
+    return now - timedelta(days=1), now + timedelta(days=1)
+
+
+class TestRollups:
+    def test_bookings_update_every_rollup(self, db):
+        materialized, virtual = db.shows
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=materialized.id,
+                                                        seat_ids=db.seat_ids[:2]))
+        BookingService.create_booking(db, BookingCreate(user_id=2, show_id=materialized.id,
+                                                        seat_ids=db.seat_ids[2:3]))
+        BookingService.create_booking(db, BookingCreate(user_id=3, show_id=virtual.id, seat_ids=[1, 2, 3]))
+
+        movie = AnalyticsService.get_movie_analytics(db, materialized.movie_id, *today_window())
+        assert (movie["total_bookings"], movie["total_tickets"], movie["total_gmv"]) == (3, 6, 60.0)
+        assert movie["daily_stats"] == [
+            {"date": datetime.now().date().isoformat(), "bookings": 3, "tickets": 6, "gmv": 60.0}
+        ]
+
+        theater = AnalyticsService.get_theater_analytics(db, materialized.theater_id, *today_window())
+        assert (theater["total_bookings"], theater["total_tickets"], theater["total_gmv"]) == (3, 6, 60.0)
+        assert [(stat["hall_id"], stat["bookings"], stat["tickets"]) for stat in theater["hall_stats"]] == [
+            (materialized.hall_id, 2, 3), (virtual.hall_id, 1, 3)
+        ]
+        assert [(row.show_id, row.tickets) for row in db.query(DailyShowStats).order_by(DailyShowStats.show_id)] == [
+            (materialized.id, 3), (virtual.id, 3)
+        ]
+
+    def test_failed_booking_leaves_rollups_untouched(self, db):
+        show = db.shows[0]
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show.id, seat_ids=db.seat_ids[:1]))
+        before = rollup_rows(db)
+        with pytest.raises(InsufficientSeatsException):
+            BookingService.create_booking(db, BookingCreate(user_id=2, show_id=show.id, seat_ids=db.seat_ids[:2]),
+                                          strategy=services.BOOKING_STRATEGY_OPTIMISTIC)
+        assert rollup_rows(db) == before
+
+    def test_rebuild_matches_incremental_rollups(self, db):
+        materialized, virtual = db.shows
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=materialized.id,
+                                                        seat_ids=db.seat_ids[:2]))
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=virtual.id, seat_ids=[4]))
+        incremental = rollup_rows(db)
+
+        rebuild_rollups(db)
+        db.commit()
+        assert rollup_rows(db) == incremental
+
+        rebuild_rollups(db, since=datetime.now().date() + timedelta(days=1))
+        db.commit()
+        assert rollup_rows(db) == incremental
+
+    def test_update_then_insert_without_upsert_support(self, db, monkeypatch):
+        monkeypatch.setattr(rollups, "_UPSERT_DIALECTS", {})
+        show = db.shows[0]
+        for seat_id in db.seat_ids[:2]:
+            BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show.id, seat_ids=[seat_id]))
+        row = db.query(DailyMovieStats).one()
+        assert (row.bookings, row.tickets, row.gmv) == (2, 2, 20.0)
+
+    def test_analytics_read_only_rollups(self, db):
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=db.shows[0].id,
+                                                        seat_ids=db.seat_ids[:2]))
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        AnalyticsService.get_movie_analytics(db, db.shows[0].movie_id, *today_window())
+        AnalyticsService.get_theater_analytics(db, db.shows[0].theater_id, *today_window())
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+        assert statements
+        assert not any(re.search(r"\b(FROM|JOIN) (bookings|seats)\b", statement) for statement in statements)
+
+
+def count_statements(db, func, *args):
+    statements = []
+    listener = lambda conn, cursor, statement, *rest: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        return func(db, *args), len(statements)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+
+class TestLiveAnalytics:
+    def book(self, db):
+        materialized, virtual = db.shows
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=materialized.id,
+                                                        seat_ids=db.seat_ids[:2]))
+        BookingService.create_booking(db, BookingCreate(user_id=2, show_id=materialized.id,
+                                                        seat_ids=db.seat_ids[2:3]))
+        BookingService.create_booking(db, BookingCreate(user_id=3, show_id=virtual.id, seat_ids=[1, 2, 3]))
+
+    def test_live_matches_rollups(self, db):
+        self.book(db)
+        show, window = db.shows[0], today_window()
+        for analytics, key in ((AnalyticsService.get_movie_analytics, show.movie_id),
+                               (AnalyticsService.get_theater_analytics, show.theater_id)):
+            live = analytics(db, key, *window, services.ANALYTICS_SOURCE_LIVE)
+            assert live == analytics(db, key, *window)
+            assert (live["total_bookings"], live["total_tickets"], live["total_gmv"]) == (3, 6, 60.0)
+
+    def test_live_uses_exact_period(self, db):
+        self.book(db)
+        show = db.shows[0]
+        start, _ = today_window()
+        before_bookings = datetime.now() - timedelta(minutes=1)
+        live = AnalyticsService.get_movie_analytics(db, show.movie_id, start, before_bookings,
+                                                    services.ANALYTICS_SOURCE_LIVE)
+        assert (live["total_bookings"], live["daily_stats"]) == (0, [])
+        # The rollup only knows whole days, so it still counts today's bookings
+        rollup = AnalyticsService.get_movie_analytics(db, show.movie_id, start, before_bookings)
+        assert rollup["total_bookings"] == 3
+
+    def test_live_query_count_independent_of_bookings(self, db):
+        show = db.shows[0]
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show.id, seat_ids=db.seat_ids[:1]))
+        db.expire_all()
+        counts = [
+            count_statements(db, analytics, key, *today_window(), services.ANALYTICS_SOURCE_LIVE)[1]
+            for analytics, key in ((AnalyticsService.get_movie_analytics, show.movie_id),
+                                   (AnalyticsService.get_theater_analytics, show.theater_id))
+        ]
+        for seat_id in db.seat_ids[1:5]:
+            BookingService.create_booking(db, BookingCreate(user_id=1, show_id=show.id, seat_ids=[seat_id]))
+        db.expire_all()
+        movie, movie_count = count_statements(db, AnalyticsService.get_movie_analytics, show.movie_id,
+                                              *today_window(), services.ANALYTICS_SOURCE_LIVE)
+        theater, theater_count = count_statements(db, AnalyticsService.get_theater_analytics, show.theater_id,
+                                                  *today_window(), services.ANALYTICS_SOURCE_LIVE)
+        assert (movie["total_bookings"], theater["total_tickets"]) == (5, 5)
+        # The catalog lookup plus one aggregate query, however many bookings there are
+        assert [movie_count, theater_count] == counts == [2, 2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-hall show schedule index and the conflict checks built on it
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.exceptions import ShowScheduleConflictException
+from app.models import Movie, Show
+from app.schedule_index import SHOW_CLEANUP_MINUTES, ScheduleIndex
+from app.schemas import ShowCreate
+from app.services import MovieService, ShowService
+
+START = datetime(2030, 1, 1)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+def scan_overlaps(intervals, start, end):
+    return {show_id for show_id, (low, high) in intervals.items() if low < end and start < high}
+
+
+def scan_free_slot(intervals, after, length):
+    cover = after
+    for low, high in sorted(intervals.values()):
+        if high <= cover:
+            continue
+        if low - cover >= length:
+            return cover
+        cover = max(cover, high)
+    return cover
+
+
+class TestScheduleIndex:
+    def test_matches_a_linear_scan(self):
+        rng = random.Random(7)
+        for _ in range(100):
+            intervals = {}
+            for show_id in range(1, rng.randint(0, 40) + 1):
+                start = at(rng.randint(0, 5000))
+                intervals[show_id] = (start, start + timedelta(minutes=rng.randint(1, 300)))
+            index = ScheduleIndex(1, [(show_id, low, high) for show_id, (low, high) in intervals.items()])
+            for _ in range(50):
+                show_id = rng.randint(1, 60)
+                if rng.random() < 0.2:
+                    start = at(rng.randint(0, 5000))
+                    intervals[show_id] = (start, start + timedelta(minutes=rng.randint(1, 300)))
+                    index.add(show_id, *intervals[show_id])
+                elif rng.random() < 0.1:
+                    intervals.pop(show_id, None)
+                    index.remove(show_id)
+                start = at(rng.randint(-200, 5500))
+                end = start + timedelta(minutes=rng.randint(1, 400))
+                overlaps = scan_overlaps(intervals, start, end)
+                found = index.find_overlap(start, end)
+                assert (found in overlaps) if overlaps else found is None
+                length = timedelta(minutes=rng.randint(1, 400))
+                assert index.next_free_slot(start, length) == scan_free_slot(intervals, start, length)
+            assert len(index) == len(intervals)
+
+    def test_slots_are_half_open(self):
+        index = ScheduleIndex(1, [(1, at(0), at(120)), (2, at(200), at(300))])
+        assert index.find_overlap(at(120), at(200)) is None
+        assert index.find_overlap(at(119), at(121)) == 1
+        assert index.find_overlap(at(119), at(121), exclude=1) is None
+        assert index.find_overlap(at(119), at(121)) == 1  # the excluded show is still indexed
+        assert index.next_free_slot(at(0), timedelta(minutes=80)) == at(120)
+        assert index.next_free_slot(at(0), timedelta(minutes=81)) == at(300)
+        assert index.next_free_slot(at(500), timedelta(days=1)) == at(500)
+
+    def test_replace_window(self):
+        index = ScheduleIndex(1, [(1, at(0), at(120)), (2, at(200), at(300)), (3, at(400), at(500))])
+        index.replace_window(at(100), at(400), [(3, at(250), at(350)), (4, at(150), at(180))])
+        assert sorted(index._intervals) == [1, 3, 4]
+        assert index.find_overlap(at(200), at(240)) is None
+        assert index.find_overlap(at(300), at(320)) == 3
+        assert index.find_overlap(at(450), at(460)) is None
+        assert index.next_free_slot(at(120), timedelta(minutes=50)) == at(180)
+
+    def test_years_of_history_stay_shallow(self):
+        shows = [(n, at(240 * n), at(240 * n + 150)) for n in range(20_000)]
+        index = ScheduleIndex(1, shows)
+
+        def depth(node):
+            return 0 if node is None else 1 + max(depth(node.left), depth(node.right))
+
+        assert depth(index._root) < 60
+        assert index.find_overlap(at(240 * 19_999 + 100), at(240 * 19_999 + 200)) == 19_999
+        assert index.next_free_slot(at(0), timedelta(minutes=100)) == at(20_000 * 240 - 90)
+
+
+@pytest.fixture
+def db(db, seed_halls):
+    db.movie, theater, db.halls = seed_halls(db, {"row1": 4}, {"row1": 4}, duration_minutes=120)
+    db.theater_id = theater.id
+    return db
+
+
+def show_at(db, minutes, hall=0, **fields):
+    return ShowCreate(movie_id=db.movie.id, theater_id=db.theater_id, hall_id=db.halls[hall].id,
+                      show_time=at(minutes), price=10.0, **fields)
+
+
+class TestScheduleConflicts:
+    def test_create_show_rejects_an_overlap(self, db):
+        busy = 120 + SHOW_CLEANUP_MINUTES
+        first = ShowService.create_show(db, show_at(db, 0))
+        with pytest.raises(ShowScheduleConflictException, match=f"overlaps show {first.id}"):
+            ShowService.create_show(db, show_at(db, busy - 1))
+        ShowService.create_show(db, show_at(db, busy))
+        ShowService.create_show(db, show_at(db, 30, hall=1, seat_mode="virtual"))
+        assert ShowService.next_free_slot(db, db.halls[0].id, at(0), 60)["show_time"] == at(2 * busy)
+
+    def test_moving_and_deleting_shows(self, db):
+        first = ShowService.create_show(db, show_at(db, 0))
+        second = ShowService.create_show(db, show_at(db, 300, seat_mode="virtual"))
+        with pytest.raises(ShowScheduleConflictException):
+            ShowService.update_show(db, second.id, {"show_time": at(60)})
+        assert db.get(Show, second.id).show_time == at(300)
+        # A show may move within its own slot, and to another hall
+        ShowService.update_show(db, second.id, {"show_time": at(310)})
+        ShowService.update_show(db, first.id, {"hall_id": db.halls[1].id})
+        ShowService.create_show(db, show_at(db, 0))
+        ShowService.delete_show(db, second.id)
+        ShowService.create_show(db, show_at(db, 200))
+
+    def test_longer_movie_reindexes(self, db):
+        ShowService.create_show(db, show_at(db, 0))
+        MovieService.update_movie(db, db.movie.id, {"duration_minutes": 200})
+        with pytest.raises(ShowScheduleConflictException):
+            ShowService.create_show(db, show_at(db, 150))
+
+    def test_longer_movie_must_not_overlap_the_next_show(self, db):
+        first = ShowService.create_show(db, show_at(db, 0))
+        second = ShowService.create_show(db, show_at(db, 200, seat_mode="virtual"))
+        with pytest.raises(ShowScheduleConflictException, match=f"show {first.id} .* overlaps show {second.id}"):
+            MovieService.update_movie(db, db.movie.id, {"duration_minutes": 200})
+        assert db.get(Movie, db.movie.id).duration_minutes == 120
+        MovieService.update_movie(db, db.movie.id, {"duration_minutes": 200 - SHOW_CLEANUP_MINUTES})
+        with pytest.raises(ShowScheduleConflictException):
+            ShowService.create_show(db, show_at(db, 150, hall=0))
+
+    def test_shows_created_elsewhere_are_seen(self, db):
+        ShowService.get_schedule(db, db.halls[0].id)
+        # Another worker process creates a show, so this process's index never saw it
+        db.add(Show(**show_at(db, 0).dict(exclude={"seat_mode"})))
+        db.commit()
+        with pytest.raises(ShowScheduleConflictException):
+            ShowService.create_show(db, show_at(db, 60))
+
+    def test_shows_moved_or_deleted_elsewhere_are_seen(self, db):
+        moved = ShowService.create_show(db, show_at(db, 0))
+        deleted = ShowService.create_show(db, show_at(db, 1000, seat_mode="virtual"))
+        # Another worker process moves one show and deletes the other; this process's index has neither
+        db.get(Show, moved.id).show_time = at(600)
+        db.delete(db.get(Show, deleted.id))
+        db.commit()
+        with pytest.raises(ShowScheduleConflictException, match=f"overlaps show {moved.id}"):
+            ShowService.create_show(db, show_at(db, 630))
+        ShowService.create_show(db, show_at(db, 60))
+        shows, errors = ShowService.create_shows(db, [show_at(db, 1000), show_at(db, 500)])
+        assert [show["show_time"] for show in shows] == [at(1000)]
+        assert errors[0]["detail"].endswith(f"overlaps show {moved.id} in hall {db.halls[0].id}")
+
+    def test_batch_conflicts_are_reported_per_item(self, db):
+        existing = ShowService.create_show(db, show_at(db, 0))
+        shows, errors = ShowService.create_shows(db, [
+            show_at(db, 60), show_at(db, 600), show_at(db, 660), show_at(db, 660, hall=1), show_at(db, 900)
+        ])
+        assert [show["show_time"] for show in shows] == [at(600), at(660), at(900)]
+        assert errors == [
+            {"index": 0, "detail": f"Show at {at(60)} overlaps show {existing.id} in hall {db.halls[0].id}"},
+            {"index": 2, "detail": f"Show at {at(660)} overlaps item 1 of this batch in hall {db.halls[0].id}"},
+        ]
+        schedule = ShowService.get_schedule(db, db.halls[0].id)
+        assert sorted(schedule._intervals) == sorted([existing.id] + [show["id"] for show in shows[::2]])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
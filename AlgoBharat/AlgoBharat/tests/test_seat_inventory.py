@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bitmap seat inventory
+"""
+
+import random
+
+import pytest
+
+from app.seat_inventory import FreeRunTree, SeatInventory, SeatInventoryRegistry, run_length, seat_template
+
+
+def build_inventory(booked=()):
+    inventory = SeatInventory(show_id=1, hall_id=1, seats_per_row={"row1": 6, "row2": 8})
+    seat_id = 100
+    for row_number, seat_count in ((1, 6), (2, 8)):
+        for seat_number in range(1, seat_count + 1):
+            inventory.add_seat(seat_id, row_number, seat_number, (row_number, seat_number) in booked)
+            seat_id += 1
+    return inventory
+
+
+class TestSeatInventory:
+    def test_layout_splits_booked_and_available(self):
+        inventory = build_inventory(booked={(1, 2), (2, 8)})
+        booked, available = inventory.layout()
+        assert [(s["row_number"], s["seat_number"]) for s in booked] == [(1, 2), (2, 8)]
+        assert len(available) == 12
+        assert available[0] == {"id": 100, "row_number": 1, "seat_number": 1, "is_aisle": True}
+
+    def test_find_consecutive_skips_booked_seats(self):
+        inventory = build_inventory(booked={(1, 3)})
+        seats = inventory.find_consecutive(3)
+        assert [s["seat_number"] for s in seats] == [4, 5, 6]
+        assert all(s["row_number"] == 1 for s in seats)
+
+    def test_find_consecutive_moves_to_next_row(self):
+        inventory = build_inventory(booked={(1, 3), (1, 5)})
+        seats = inventory.find_consecutive(3)
+        assert [(s["row_number"], s["seat_number"]) for s in seats] == [(2, 1), (2, 2), (2, 3)]
+
+    def test_find_consecutive_returns_empty_when_full(self):
+        inventory = build_inventory()
+        assert inventory.find_consecutive(9) == []
+
+    def test_mark_booked_updates_state(self):
+        inventory = build_inventory()
+        inventory.mark_booked([100, 101, 102])
+        assert inventory.available_count() == 11
+        assert inventory.find_consecutive(1)[0]["seat_number"] == 4
+
+    def test_free_run_index_follows_bookings(self):
+        inventory = build_inventory()
+        assert inventory.longest_run() == 8
+        inventory.mark_booked([102, 110])  # row 1 seat 3, row 2 seat 5
+        assert inventory.longest_run() == 4
+        assert inventory.find_consecutive(5) == []
+        seats = inventory.find_consecutive(4)
+        assert [(s["row_number"], s["seat_number"]) for s in seats] == [(2, 1), (2, 2), (2, 3), (2, 4)]
+
+    def test_compact_rows_run_length_encode_seat_states(self):
+        inventory = build_inventory(booked={(1, 2), (1, 3), (2, 8)})
+        assert inventory.compact_rows() == [
+            {"row_number": 1, "first_seat_id": 100, "seats": "a2b3a"},
+            {"row_number": 2, "first_seat_id": 106, "seats": "7ab"},
+        ]
+
+    def test_compact_rows_mark_gaps_and_list_irregular_ids(self):
+        inventory = SeatInventory(show_id=1, hall_id=1, seats_per_row={"row1": 5})
+        inventory.add_seat(10, 1, 1, False)
+        inventory.add_seat(12, 1, 3, True)
+        inventory.add_seat(40, 1, 5, False)
+        assert inventory.compact_rows() == [
+            {"row_number": 1, "first_seat_id": 10, "seats": "axbxa", "seat_ids": [10, None, 12, None, 40]}
+        ]
+
+    def test_run_length(self):
+        assert run_length("") == ""
+        assert run_length("aaabxaa") == "3abx2a"
+        assert run_length("b" * 12) == "12b"
+
+
+def first_run_brute_force(free, length):
+    run = 0
+    for position, is_free in enumerate(free):
+        run = run + 1 if is_free else 0
+        if run >= length:
+            return position - length + 1
+    return -1
+
+
+class TestFreeRunTree:
+    def test_matches_brute_force_under_updates(self):
+        rng = random.Random(42)
+        for seat_count in (1, 5, 13, 32, 47):
+            free = [rng.random() < 0.7 for _ in range(seat_count)]
+            tree = FreeRunTree(free)
+            for _ in range(60):
+                position = rng.randrange(seat_count)
+                free[position] = rng.random() < 0.5
+                tree.set_free(position, free[position])
+                for length in range(1, seat_count + 2):
+                    assert tree.find_first(length) == first_run_brute_force(free, length)
+
+
+class TestSeatInventoryRegistry:
+    def test_lru_eviction(self):
+        registry = SeatInventoryRegistry(max_shows=1, ttl=60)
+        registry.put(SeatInventory(1, 1, {"row1": 4}))
+        registry.put(SeatInventory(2, 1, {"row1": 4}))
+        assert registry.get(1) is None
+        assert registry.get(2) is not None
+
+    def test_expired_inventory_is_reloaded(self):
+        registry = SeatInventoryRegistry(max_shows=4, ttl=-1)
+        loads = []
+        loader = lambda show_id: loads.append(show_id) or SeatInventory(show_id, 1, {"row1": 4})
+        registry.get_or_load(5, loader)
+        registry.get_or_load(5, loader)
+        assert loads == [5, 5]
+
+
+class TestSeatTemplate:
+    def test_template_is_in_row_order_with_aisles(self):
+        template = seat_template({"row2": 2, "row1": 4})
+        assert template == (
+            (1, 1, True), (1, 2, True), (1, 3, True), (1, 4, False),
+            (2, 1, True), (2, 2, True),
+        )
+
+    def test_template_is_compiled_once_per_layout(self):
+        layout = {"row1": 5, "row2": 5}
+        assert seat_template(layout) is seat_template(dict(layout))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the live seat map feeds (server-sent events)
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from app import seat_stream, services
+from app.exceptions import HallNotFoundException
+from app.models import Seat
+from app.schemas import BookingCreate, ShowCreate
+from app.seat_stream import HEARTBEAT, SeatStreamHub
+from app.services import BookingService, SeatService, ShowService
+
+
+@pytest.fixture
+def session_factory(session_factory, seed_halls, monkeypatch):
+    monkeypatch.setattr(services, "seat_streams", SeatStreamHub())
+    SessionLocal = session_factory
+    db = SessionLocal()
+    movie, theater, (hall,) = seed_halls(db, {"row1": 4, "row2": 4})
+    show = ShowService.create_show(db, ShowCreate(movie_id=movie.id, theater_id=theater.id, hall_id=hall.id,
+                                                  show_time=datetime(2030, 1, 1, 18, 0), price=10.0))
+    SessionLocal.show_id, SessionLocal.hall_id = show.id, hall.id
+    SessionLocal.seat_ids = [seat_id for (seat_id,) in
+                             db.query(Seat.id).filter(Seat.show_id == show.id).order_by(Seat.id)]
+    db.close()
+    return SessionLocal
+
+
+def subscribe(SessionLocal, hall_id=None):
+    """Subscribe to the fixture's show the way the sync router does"""
+    hall_id = hall_id or SessionLocal.hall_id
+
+    def load(version):
+        db = SessionLocal()
+        try:
+            return SeatService.get_hall_layout(db, hall_id, SessionLocal.show_id, version)
+        finally:
+            db.close()
+
+    return services.seat_streams.subscribe(
+        SessionLocal.show_id, hall_id,
+        load=lambda version: asyncio.to_thread(load, version),
+        current_version=lambda: asyncio.to_thread(SeatService.get_layout_version, hall_id, SessionLocal.show_id),
+        start_version=lambda: asyncio.to_thread(SeatService.start_layout_version, hall_id, SessionLocal.show_id)
+    )
+
+
+def book(SessionLocal, seat_ids):
+    db = SessionLocal()
+    try:
+        BookingService.create_booking(db, BookingCreate(user_id=1, show_id=SessionLocal.show_id, seat_ids=seat_ids))
+    finally:
+        db.close()
+
+
+def parse(message):
+    event, data = message.decode().rstrip("\n").split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+async def next_event(subscription):
+    return parse(await asyncio.wait_for(subscription.queue.get(), 5))
+
+
+class TestSeatStream:
+    def test_one_read_fans_out_to_every_subscriber(self, session_factory):
+        async def scenario():
+            subscriptions = [await subscribe(session_factory) for _ in range(200)]
+            (feed,) = services.seat_streams.feeds()
+            for subscription in subscriptions:
+                event, layout = await next_event(subscription)
+                assert event == "layout" and len(layout["available_seats"]) == 8
+            assert feed.reads == 1
+
+            await asyncio.to_thread(book, session_factory, session_factory.seat_ids[:2])
+            for subscription in subscriptions:
+                event, delta = await next_event(subscription)
+                assert event == "seats"
+                assert (delta["booked"], delta["released"]) == (session_factory.seat_ids[:2], [])
+            assert feed.reads == 2
+
+            # A late subscriber starts from the current layout
+            late = await subscribe(session_factory)
+            event, layout = await next_event(late)
+            assert [seat["id"] for seat in layout["booked_seats"]] == session_factory.seat_ids[:2]
+            assert feed.reads == 2
+
+            for subscription in subscriptions + [late]:
+                subscription.close()
+            assert services.seat_streams.feeds() == []
+            with pytest.raises(asyncio.CancelledError):
+                await feed.task
+
+        asyncio.run(scenario())
+
+    def test_changes_from_other_processes_are_polled(self, session_factory, monkeypatch):
+        monkeypatch.setattr(seat_stream, "SEAT_STREAM_POLL_SECONDS", 0.05)
+
+        async def scenario():
+            subscription = await subscribe(session_factory)
+            await next_event(subscription)
+            # Booked elsewhere: the rows and the version change, but nothing notifies this process
+            db = session_factory()
+            db.query(Seat).filter(Seat.id == session_factory.seat_ids[-1]).update({"is_booked": True})
+            db.commit()
+            db.close()
+            services.layout_versions.bump_show(session_factory.show_id)
+            event, delta = await next_event(subscription)
+            assert (event, delta["booked"]) == ("seats", [session_factory.seat_ids[-1]])
+            subscription.close()
+
+        asyncio.run(scenario())
+
+    def test_feed_starts_the_versions_it_polls(self, session_factory, monkeypatch):
+        monkeypatch.setattr(seat_stream, "SEAT_STREAM_POLL_SECONDS", 0.01)
+        monkeypatch.setattr(services.layout_versions, "_versions", {})
+
+        async def scenario():
+            subscription = await subscribe(session_factory)
+            await next_event(subscription)
+            await asyncio.sleep(0.2)
+            (feed,) = services.seat_streams.feeds()
+            # At most one read unversioned and one at the started version; later polls only compare
+            assert feed.version is not None
+            assert feed.reads <= 2
+            subscription.close()
+
+        asyncio.run(scenario())
+
+    def test_unknown_hall_raises(self, session_factory):
+        async def scenario():
+            with pytest.raises(HallNotFoundException):
+                await subscribe(session_factory, hall_id=999)
+            assert services.seat_streams.feeds() == []
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_is_dropped(self, session_factory, monkeypatch):
+        monkeypatch.setattr(seat_stream, "SEAT_STREAM_QUEUE_SIZE", 2)
+
+        async def scenario():
+            slow = await subscribe(session_factory)
+            fast = await subscribe(session_factory)
+            await next_event(fast)
+            for seat_id in session_factory.seat_ids[:3]:
+                await asyncio.to_thread(book, session_factory, [seat_id])
+                await next_event(fast)
+            # The slow one never read: it is told to go away and no longer receives events
+            assert [message async for message in slow.events()] == []
+            assert slow not in services.seat_streams.feeds()[0].subscribers
+            fast.close()
+
+        asyncio.run(scenario())
+
+    def test_idle_stream_sends_heartbeats(self, session_factory, monkeypatch):
+        monkeypatch.setattr(seat_stream, "SEAT_STREAM_POLL_SECONDS", 0.01)
+        monkeypatch.setattr(seat_stream, "SEAT_STREAM_HEARTBEAT_SECONDS", 0.01)
+
+        async def scenario():
+            subscription = await subscribe(session_factory)
+            events = subscription.events()
+            assert parse(await events.__anext__())[0] == "layout"
+            assert await events.__anext__() == HEARTBEAT
+            await events.aclose()
+            assert services.seat_streams.feeds() == []
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])